@@ -0,0 +1,271 @@
+"""
+Benchmarks for the docker dashboard on synthetic docker-stats logs.
+
+python bench_dashboard.py --lines 2000000 parse --workers 8
+python bench_dashboard.py --lines 50000 wire --html wire-bench.html
+"""
+
+import argparse
+import base64
+import gzip
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from docker_dashboard_server import (
+    HOST_SERIES_KEYS,
+    NUMERIC_COLUMNS,
+    RAW_COLUMNS,
+    SERIES_ENCODINGS,
+    SERIES_KEYS,
+    build_metrics_frame,
+    encode_container,
+    encode_host_view,
+    parse_log_parallel,
+    process_container_frame,
+    process_host_view,
+)
+
+DEFAULT_CONTAINERS = 8
+DEFAULT_LINES = 200_000
+FIXTURE_FILE = "synthetic-docker-stats.log"
+
+
+def synthetic_records(lines, containers=DEFAULT_CONTAINERS, seed=0):
+    """Yield docker-stats records shaped like the collector's output"""
+    rng = random.Random(seed)
+    names = [f"swecc-service-{i}" for i in range(containers)]
+    start = datetime(2025, 1, 1)
+    totals = {name: [0.0, 0.0, 0.0, 0.0] for name in names}
+
+    for i in range(lines):
+        name = names[i % containers]
+        totals[name] = [total + rng.uniform(0, 2) for total in totals[name]]
+        net_in, net_out, block_in, block_out = totals[name]
+        usage = rng.uniform(50, 900)
+        yield {
+            "name": name,
+            "timestamp": (start + timedelta(seconds=i // containers * 10)).strftime(
+                "%Y-%m-%dT%H:%M:%SZ"
+            ),
+            "cpu_percent": f"{rng.uniform(0, 100):.2f}%",
+            "memory": {
+                "usage": f"{usage:.1f}MiB",
+                "limit": "1.944GiB",
+                "percent": f"{usage / 1990 * 100:.2f}%",
+            },
+            "network": {"input": f"{net_in:.1f}MB", "output": f"{net_out:.1f}kB"},
+            "block_io": {"input": f"{block_in:.1f}MB", "output": f"{block_out:.1f}GB"},
+        }
+
+
+def fixture_lines(path):
+    count = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            count += block.count(b"\n")
+    return count
+
+
+def write_fixture(path, lines, containers=DEFAULT_CONTAINERS):
+    with open(path, "w") as f:
+        for record in synthetic_records(lines, containers):
+            f.write(json.dumps(record) + "\n")
+    print(f"Wrote {lines} synthetic lines to {path}")
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label}: {time.perf_counter() - start:.2f}s")
+    return result
+
+
+def bench_parse(args):
+    if not os.path.exists(args.fixture):
+        write_fixture(args.fixture, args.lines, args.containers)
+    elif fixture_lines(args.fixture) != args.lines:
+        print(f"{args.fixture} does not have {args.lines} lines, regenerating it")
+        write_fixture(args.fixture, args.lines, args.containers)
+
+    def serial():
+        with open(args.fixture, "rb") as f:
+            return build_metrics_frame([json.loads(line) for line in f])
+
+    serial_frame = timed("serial (json.loads + build_metrics_frame)", serial)
+    buffer_frame = timed(
+        f"parallel buffer ({args.workers or os.cpu_count()} workers)",
+        lambda: parse_log_parallel(
+            open(args.fixture, "rb").read(), args.workers, args.chunk_mb << 20
+        ),
+    )
+    file_frame = timed(
+        f"parallel file ({args.workers or os.cpu_count()} workers)",
+        lambda: parse_log_parallel(args.fixture, args.workers, args.chunk_mb << 20),
+    )
+
+    def ordered(frame):
+        frame = frame.sort_values(["name", "timestamp"], kind="stable").reset_index(
+            drop=True
+        )
+        # the parsers may pick different resolutions; the dashboard converts anyway
+        frame["timestamp"] = frame["timestamp"].astype("datetime64[ns]")
+        return frame
+
+    # the parallel parse keeps the raw strings of each container's latest sample only
+    columns = ["name", "timestamp", *NUMERIC_COLUMNS]
+    expected = ordered(serial_frame)
+    expected_latest = expected.groupby("name").tail(1).reset_index(drop=True)
+    for frame in (buffer_frame, file_frame):
+        frame = ordered(frame)
+        pd.testing.assert_frame_equal(frame[columns], expected[columns])
+        pd.testing.assert_frame_equal(
+            frame.groupby("name").tail(1).reset_index(drop=True)[RAW_COLUMNS],
+            expected_latest[RAW_COLUMNS],
+            check_dtype=False,
+        )
+    print("parallel frames match the serial frame")
+
+
+def chart_payload(containers, host, encoding):
+    """The series part of what the dashboard template embeds"""
+    encoded = [encode_container(container, encoding) for container in containers]
+    encoded_host = encode_host_view(host, encoding)
+    return {
+        "containers": [
+            {key: container[key] for key in ["timestamps"] + SERIES_KEYS}
+            for container in encoded
+        ],
+        "host": {key: encoded_host[key] for key in ["timestamps"] + HOST_SERIES_KEYS},
+    }
+
+
+def decode_series(series):
+    """Python mirror of the template's decodeSeries"""
+    if isinstance(series, list):
+        return series
+    raw = base64.b64decode(series["data"])
+    if series["enc"] == "f32":
+        return np.frombuffer(raw, dtype="<f4")
+    return np.cumsum(np.frombuffer(raw, dtype="<i4")) / series["scale"]
+
+
+def decode_payload(text):
+    payload = json.loads(text)
+    for container in payload["containers"]:
+        for key in SERIES_KEYS:
+            decode_series(container[key])
+    for key in HOST_SERIES_KEYS:
+        for series in payload["host"][key]:
+            decode_series(series["values"])
+
+
+WIRE_BENCH_HTML = """<!DOCTYPE html>
+<html>
+<body>
+  <pre id="out"></pre>
+  <script>
+    const payloads = %s;
+
+    function base64Buffer(text) {
+      const binary = atob(text);
+      const bytes = new Uint8Array(binary.length);
+      for (let i = 0; i < binary.length; i++) {
+        bytes[i] = binary.charCodeAt(i);
+      }
+      return bytes.buffer;
+    }
+
+    function decodeSeries(series) {
+      if (Array.isArray(series)) {
+        return series;
+      }
+      if (series.enc === 'f32') {
+        return new Float32Array(base64Buffer(series.data));
+      }
+      const deltas = new Int32Array(base64Buffer(series.data));
+      const values = new Float64Array(deltas.length);
+      let total = 0;
+      for (let i = 0; i < deltas.length; i++) {
+        total += deltas[i];
+        values[i] = total / series.scale;
+      }
+      return values;
+    }
+
+    const out = document.getElementById('out');
+    for (const [encoding, text] of Object.entries(payloads)) {
+      const runs = 20;
+      const start = performance.now();
+      for (let run = 0; run < runs; run++) {
+        const payload = JSON.parse(text);
+        for (const container of payload.containers) {
+          for (const [key, series] of Object.entries(container)) {
+            if (key !== 'timestamps') decodeSeries(series);
+          }
+        }
+      }
+      const ms = (performance.now() - start) / runs;
+      out.textContent += `${encoding}: ${text.length} bytes, parse+decode ${ms.toFixed(2)} ms\\n`;
+    }
+  </script>
+</body>
+</html>
+"""
+
+
+def bench_wire(args):
+    frame = build_metrics_frame(list(synthetic_records(args.lines, args.containers)))
+    containers = process_container_frame(frame)
+    host = process_host_view(frame)
+
+    payloads = {}
+    for encoding in SERIES_ENCODINGS:
+        text = json.dumps(chart_payload(containers, host, encoding))
+        payloads[encoding] = text
+
+        start = time.perf_counter()
+        for _ in range(args.runs):
+            decode_payload(text)
+        decode_ms = (time.perf_counter() - start) / args.runs * 1000
+
+        print(
+            f"{encoding:>5}: {len(text):>10} bytes, "
+            f"{len(gzip.compress(text.encode())):>9} gzipped, "
+            f"python parse+decode {decode_ms:.1f} ms"
+        )
+
+    if args.html:
+        with open(args.html, "w") as f:
+            f.write(WIRE_BENCH_HTML % json.dumps(payloads))
+        print(f"Open {args.html} in a browser for client-side parse times")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Docker dashboard benchmarks")
+    parser.add_argument("--fixture", type=str, default=FIXTURE_FILE)
+    parser.add_argument("--lines", type=int, default=DEFAULT_LINES)
+    parser.add_argument("--containers", type=int, default=DEFAULT_CONTAINERS)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    parse = subparsers.add_parser("parse", help="serial vs parallel log parsing")
+    parse.add_argument("--workers", type=int, default=None)
+    parse.add_argument("--chunk-mb", type=int, default=8)
+    parse.set_defaults(run=bench_parse)
+
+    wire = subparsers.add_parser("wire", help="chart payload size and decode time")
+    wire.add_argument("--runs", type=int, default=5)
+    wire.add_argument("--html", type=str, default=None)
+    wire.set_defaults(run=bench_wire)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,19 @@
+import base64
+import importlib.util
+import io
 import os
-from flask import Flask, render_template_string, request
+import random
+import string
+import threading
+import zlib
+from flask import Flask, Response, render_template_string, request, stream_with_context
 import json
 from datetime import datetime
+import numpy as np
 import pandas as pd
+from pandas.tseries.frequencies import to_offset
 import subprocess
+from concurrent.futures import ProcessPoolExecutor
 
 app = Flask(__name__)
 
@@ -111,6 +121,24 @@ HTML_TEMPLATE = """
     .line-count label {
       color: #666;
     }
+
+    .line-count select {
+      padding: 8px;
+      border: 1px solid #ccc;
+      border-radius: 4px;
+    }
+
+    .top-table {
+      width: 100%;
+      border-collapse: collapse;
+    }
+
+    .top-table th,
+    .top-table td {
+      text-align: left;
+      padding: 6px 10px;
+      border-bottom: 1px solid #eee;
+    }
   </style>
 </head>
 
@@ -121,10 +149,80 @@ HTML_TEMPLATE = """
       <form action="/" method="get" class="line-count">
         <label for="lines">Number of lines:</label>
         <input type="number" id="lines" name="lines" value="{{ line_count }}" min="1">
+        <label for="step">Grid step:</label>
+        <input type="text" id="step" name="step" value="{{ step }}">
+        <label for="fill">Fill:</label>
+        <select id="fill" name="fill">
+          {% for policy in fill_policies %}
+          <option value="{{ policy }}" {% if policy == fill %}selected{% endif %}>{{ policy }}</option>
+          {% endfor %}
+        </select>
+        <label for="encoding">Encoding:</label>
+        <select id="encoding" name="encoding">
+          {% for option in series_encodings %}
+          <option value="{{ option }}" {% if option == encoding %}selected{% endif %}>{{ option }}</option>
+          {% endfor %}
+        </select>
+        <label for="top">Top N:</label>
+        <input type="number" id="top" name="top" value="{{ top_n }}" min="1">
         <button type="submit" class="refresh-button">Refresh Data</button>
       </form>
     </div>
-    <p class="last-update">Last updated: {{ last_update }}</p>
+    <p class="last-update">Last updated: {{ last_update }}<span id="decodeTime"></span></p>
+
+    {% if host %}
+    <div class="card">
+      <h2>Host Totals</h2>
+      <div class="charts-grid">
+        <div class="chart-container">
+          <canvas id="hostCpuChart"></canvas>
+        </div>
+        <div class="chart-container">
+          <canvas id="hostMemChart"></canvas>
+        </div>
+        <div class="chart-container">
+          <canvas id="hostNetChart"></canvas>
+        </div>
+        <div class="chart-container">
+          <canvas id="hostBlockChart"></canvas>
+        </div>
+      </div>
+      <h3>Top {{ top_n }} Consumers</h3>
+      <table class="top-table">
+        <tr>
+          {% for view in host.top %}
+          <th>{{ view.title }}</th>
+          {% endfor %}
+        </tr>
+        {% for rank in range(top_n) %}
+        <tr>
+          {% for view in host.top %}
+          <td>{% if rank < view.rows|length %}{{ view.rows[rank].name }} ({{ view.rows[rank].value }}){% endif %}</td>
+          {% endfor %}
+        </tr>
+        {% endfor %}
+      </table>
+      {% if saturation %}
+      <h3>Saturation Order (CPU &ge; {{ saturation_cpu }}% under load)</h3>
+      <table class="top-table">
+        <tr>
+          <th>Container</th>
+          <th>First at</th>
+          <th>CPU %</th>
+          <th>Load RPS</th>
+        </tr>
+        {% for row in saturation %}
+        <tr>
+          <td>{{ row.name }}</td>
+          <td>{{ row.time }}</td>
+          <td>{{ row.cpu }}</td>
+          <td>{{ row.rps }}</td>
+        </tr>
+        {% endfor %}
+      </table>
+      {% endif %}
+    </div>
+    {% endif %}
 
     <!-- [Rest of the template remains the same] -->
     {% for container in containers %}
@@ -148,6 +246,17 @@ HTML_TEMPLATE = """
           <p>Input: {{ container.current_network.input }}</p>
           <p>Output: {{ container.current_network.output }}</p>
         </div>
+        {% if container.load %}
+        <div class="metric">
+          <h3>Load Test</h3>
+          <p>Peak RPS: {{ container.load.peak_rps }}</p>
+          {% if container.load.saturated_at %}
+          <p>CPU &ge; {{ saturation_cpu }}% from {{ container.load.saturated_at.time }} at {{ container.load.saturated_at.rps }} RPS</p>
+          {% else %}
+          <p>CPU stayed below {{ saturation_cpu }}%</p>
+          {% endif %}
+        </div>
+        {% endif %}
       </div>
       <div class="charts-grid">
         <div class="chart-container">
@@ -169,6 +278,62 @@ HTML_TEMPLATE = """
 
 
   <script>
+    // series may arrive as plain JSON arrays or in a compact encoding
+    // (see encode_series / encode_timestamps on the server)
+    let decodeMs = 0;
+
+    function base64Buffer(text) {
+      const binary = atob(text);
+      const bytes = new Uint8Array(binary.length);
+      for (let i = 0; i < binary.length; i++) {
+        bytes[i] = binary.charCodeAt(i);
+      }
+      return bytes.buffer;
+    }
+
+    function decodeSeries(series) {
+      if (Array.isArray(series)) {
+        return series;
+      }
+      const start = performance.now();
+      let values;
+      if (series.enc === 'f32') {
+        values = new Float32Array(base64Buffer(series.data));
+      } else {
+        const deltas = new Int32Array(base64Buffer(series.data));
+        values = new Float64Array(deltas.length);
+        let total = 0;
+        for (let i = 0; i < deltas.length; i++) {
+          total += deltas[i];
+          values[i] = total / series.scale;
+        }
+      }
+      decodeMs += performance.now() - start;
+      return values;
+    }
+
+    function decodeLabels(timestamps) {
+      if (Array.isArray(timestamps)) {
+        return timestamps;
+      }
+      const start = performance.now();
+      let seconds;
+      if (timestamps.enc === 'range') {
+        seconds = Array.from({ length: timestamps.count }, (_, i) => timestamps.start + i * timestamps.step);
+      } else {
+        const deltas = new Int32Array(base64Buffer(timestamps.data));
+        seconds = new Array(deltas.length);
+        let total = timestamps.start;
+        for (let i = 0; i < deltas.length; i++) {
+          total += deltas[i];
+          seconds[i] = total;
+        }
+      }
+      const labels = seconds.map(second => new Date(second * 1000).toISOString().slice(11, 16));
+      decodeMs += performance.now() - start;
+      return labels;
+    }
+
     const chartOptions = {
       responsive: true,
       maintainAspectRatio: false,
@@ -192,18 +357,139 @@ HTML_TEMPLATE = """
       }
     };
 
+    // load-test overlay: RPS on a right-hand axis plus dashed phase markers
+    const loadAxes = {
+      rps: {
+        type: 'linear',
+        position: 'right',
+        beginAtZero: true,
+        grid: { drawOnChartArea: false },
+        title: { display: true, text: 'Load RPS' }
+      }
+    };
+
+    function loadDatasets(load, withLatency) {
+      if (!load) {
+        return [];
+      }
+      const datasets = [{
+        label: 'Load RPS',
+        data: decodeSeries(load.rps),
+        borderColor: '#343a40',
+        borderDash: [6, 3],
+        pointRadius: 0,
+        tension: 0.1,
+        yAxisID: 'rps'
+      }];
+      if (withLatency) {
+        datasets.push({
+          label: 'Load p95 (ms)',
+          data: decodeSeries(load.p95),
+          borderColor: '#e83e8c',
+          borderDash: [2, 2],
+          pointRadius: 0,
+          tension: 0.1,
+          yAxisID: 'latency'
+        });
+      }
+      return datasets;
+    }
+
+    function loadScales(load, withLatency) {
+      if (!load) {
+        return {};
+      }
+      const scales = { ...loadAxes };
+      if (withLatency) {
+        scales.latency = {
+          type: 'linear',
+          position: 'right',
+          beginAtZero: true,
+          grid: { drawOnChartArea: false },
+          title: { display: true, text: 'p95 ms' }
+        };
+      }
+      return scales;
+    }
+
+    function phasePlugin(load) {
+      const phases = load ? load.phases : [];
+      return {
+        id: 'phases',
+        afterDatasetsDraw(chart) {
+          const { ctx, chartArea, scales } = chart;
+          ctx.save();
+          ctx.strokeStyle = '#6c757d';
+          ctx.fillStyle = '#6c757d';
+          ctx.font = '10px Arial';
+          ctx.setLineDash([4, 4]);
+          phases.forEach(phase => {
+            const x = scales.x.getPixelForValue(phase.index);
+            ctx.beginPath();
+            ctx.moveTo(x, chartArea.top);
+            ctx.lineTo(x, chartArea.bottom);
+            ctx.stroke();
+            ctx.fillText(phase.label, x + 3, chartArea.top + 10);
+          });
+          ctx.restore();
+        }
+      };
+    }
+
+    {% if host %}
+    const palette = ['#007bff', '#28a745', '#dc3545', '#fd7e14', '#6610f2', '#20c997', '#e83e8c', '#17a2b8', '#ffc107', '#6c757d'];
+
+    function stackedChart(canvasId, labels, series, title) {
+      new Chart(document.getElementById(canvasId).getContext('2d'), {
+        type: 'line',
+        data: {
+          labels: labels,
+          datasets: series.map((s, i) => ({
+            label: s.name,
+            data: decodeSeries(s.values),
+            borderColor: palette[i % palette.length],
+            backgroundColor: palette[i % palette.length] + '55',
+            fill: true,
+            pointRadius: 0,
+            tension: 0.1
+          }))
+        },
+        options: {
+          ...chartOptions,
+          scales: {
+            y: {
+              stacked: true,
+              beginAtZero: true,
+              title: { display: true, text: title }
+            },
+            x: chartOptions.scales.x
+          }
+        }
+      });
+    }
+
+    const hostLabels = decodeLabels({{ host.timestamps | tojson }});
+    stackedChart('hostCpuChart', hostLabels, {{ host.cpu | tojson }}, 'CPU %');
+    stackedChart('hostMemChart', hostLabels, {{ host.memory | tojson }}, 'Memory MB');
+    stackedChart('hostNetChart', hostLabels, {{ host.network | tojson }}, 'Network I/O (MB)');
+    stackedChart('hostBlockChart', hostLabels, {{ host.block | tojson }}, 'Block I/O (MB)');
+    {% endif %}
+
     {% for container in containers %}
+    const labels{{ loop.index }} = decodeLabels({{ container.timestamps | tojson }});
+    const load{{ loop.index }} = {{ (container.load or none) | tojson }};
+
     // CPU chart
     new Chart(document.getElementById('cpuChart{{ loop.index }}').getContext('2d'), {
       type: 'line',
       data: {
-        labels: {{ container.timestamps | tojson }},
+        labels: labels{{ loop.index }},
       datasets: [{
         label: 'CPU Usage (%)',
-        data: {{ container.cpu_history | tojson }},
+        data: decodeSeries({{ container.cpu_history | tojson }}),
       borderColor: '#007bff',
       tension: 0.1
-                }]
+                }, ...loadDatasets(load{{ loop.index }}, true)]
             },
       options: {
       responsive: true,
@@ -226,6 +512,7 @@ HTML_TEMPLATE = """
             padding: { top: 10, bottom: 10 }
           }
         },
+        ...loadScales(load{{ loop.index }}, true),
         x: {
           ticks: {
             maxRotation: 45,
@@ -233,26 +520,28 @@ HTML_TEMPLATE = """
           }
         }
       }
-    }});
+    },
+      plugins: [phasePlugin(load{{ loop.index }})]
+    });
 
     // memory chart
     new Chart(document.getElementById('memChart{{ loop.index }}').getContext('2d'), {
       type: 'line',
       data: {
-        labels: {{ container.timestamps | tojson }},
+        labels: labels{{ loop.index }},
       datasets: [{
         label: 'Memory Usage (%)',
-        data: {{ container.memory_history | tojson }},
+        data: decodeSeries({{ container.memory_history | tojson }}),
       borderColor: '#28a745',
       tension: 0.1,
       yAxisID: 'percentage'
                 }, {
         label: 'Memory Usage (MB)',
-        data: {{ container.memory_mb_history | tojson }},
+        data: decodeSeries({{ container.memory_mb_history | tojson }}),
       borderColor: '#20c997',
       tension: 0.1,
       yAxisID: 'megabytes'
-                }]
+                }, ...loadDatasets(load{{ loop.index }}, false)]
             },
       options: {
       responsive: true,
@@ -290,6 +579,7 @@ HTML_TEMPLATE = """
             padding: { top: 10, bottom: 10 }
           }
         },
+        ...loadScales(load{{ loop.index }}, false),
         x: {
           ticks: {
             maxRotation: 45,
@@ -297,24 +587,26 @@ HTML_TEMPLATE = """
           }
         }
       }
-    }});
+    },
+      plugins: [phasePlugin(load{{ loop.index }})]
+    });
 
     // network I/O chart
     new Chart(document.getElementById('netChart{{ loop.index }}').getContext('2d'), {
       type: 'line',
       data: {
-        labels: {{ container.timestamps | tojson }},
+        labels: labels{{ loop.index }},
       datasets: [{
         label: 'Network Input',
-        data: {{ container.net_in_history | tojson }},
+        data: decodeSeries({{ container.net_in_history | tojson }}),
       borderColor: '#dc3545',
       tension: 0.1
                 }, {
         label: 'Network Output',
-        data: {{ container.net_out_history | tojson }},
+        data: decodeSeries({{ container.net_out_history | tojson }}),
       borderColor: '#fd7e14',
       tension: 0.1
-                }]
+                }, ...loadDatasets(load{{ loop.index }}, false)]
             },
       options: {
       responsive: true,
@@ -337,6 +629,7 @@ HTML_TEMPLATE = """
             padding: { top: 10, bottom: 10 }
           }
         },
+        ...loadScales(load{{ loop.index }}, false),
         x: {
           ticks: {
             maxRotation: 45,
@@ -344,24 +637,26 @@ HTML_TEMPLATE = """
           }
         }
       }
-    }});
+    },
+      plugins: [phasePlugin(load{{ loop.index }})]
+    });
 
     // block I/O chart
     new Chart(document.getElementById('blockChart{{ loop.index }}').getContext('2d'), {
       type: 'line',
       data: {
-        labels: {{ container.timestamps | tojson }},
+        labels: labels{{ loop.index }},
       datasets: [{
         label: 'Block Input',
-        data: {{ container.block_in_history | tojson }},
+        data: decodeSeries({{ container.block_in_history | tojson }}),
       borderColor: '#6610f2',
       tension: 0.1
                 }, {
         label: 'Block Output',
-        data: {{ container.block_out_history | tojson }},
+        data: decodeSeries({{ container.block_out_history | tojson }}),
       borderColor: '#20c997',
       tension: 0.1
-                }]
+                }, ...loadDatasets(load{{ loop.index }}, false)]
             },
       options: {
       responsive: true,
@@ -384,6 +679,7 @@ HTML_TEMPLATE = """
             padding: { top: 10, bottom: 10 }
           }
         },
+        ...loadScales(load{{ loop.index }}, false),
         x: {
           ticks: {
             maxRotation: 45,
@@ -391,8 +687,14 @@ HTML_TEMPLATE = """
           }
         }
       }
-    }});
+    },
+      plugins: [phasePlugin(load{{ loop.index }})]
+    });
     {% endfor %}
+
+    if (decodeMs > 0) {
+      document.getElementById('decodeTime').textContent = ` (decoded {{ encoding }} series in ${decodeMs.toFixed(1)} ms)`;
+    }
   </script>
 </body>
 </html>
@@ -420,58 +722,128 @@ def parse_stats_file(file_path):
     return data
 
 
-def process_container_data(data):
-    df = pd.DataFrame(data)
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
 
-    containers = []
-    for name, group in df.groupby("name"):
-        group = group.sort_values("timestamp")
+# gauges are averaged within a grid step, cumulative I/O counters keep the last sample
+GAUGE_COLUMNS = ["cpu", "mem_percent", "mem_mb"]
+COUNTER_COLUMNS = ["net_in_mb", "net_out_mb", "block_in_mb", "block_out_mb"]
+METRIC_COLUMNS = GAUGE_COLUMNS + COUNTER_COLUMNS
 
-        cpu_values = [float(str(cpu).rstrip("%")) for cpu in group["cpu_percent"]]
+FILL_POLICIES = ["ffill", "zero", "interpolate", "none"]
+DEFAULT_STEP = "1min"
+DEFAULT_FILL = "ffill"
+DEFAULT_TOP_N = 5
 
-        # memory
-        memory_values = [
-            float(str(mem["percent"]).rstrip("%")) for mem in group["memory"]
-        ]
-        memory_mb_values = [convert_to_mb(mem["usage"]) for mem in group["memory"]]
 
-        # network I/O
-        net_in_values = [convert_to_mb(net["input"]) for net in group["network"]]
-        net_out_values = [convert_to_mb(net["output"]) for net in group["network"]]
+SIZE_UNITS_MB = {"KIB": 1 / 1024, "KB": 1 / 1024, "MIB": 1, "MB": 1, "GIB": 1024, "GB": 1024}
 
-        # block I/O
-        block_in_values = [convert_to_mb(block["input"]) for block in group["block_io"]]
-        block_out_values = [
-            convert_to_mb(block["output"]) for block in group["block_io"]
-        ]
+# raw docker-stats fields, flattened, as (column, record key, nested key)
+RAW_FIELDS = [
+    ("name", "name", None),
+    ("timestamp", "timestamp", None),
+    ("cpu_percent", "cpu_percent", None),
+    ("memory_usage", "memory", "usage"),
+    ("memory_limit", "memory", "limit"),
+    ("memory_percent", "memory", "percent"),
+    ("network_input", "network", "input"),
+    ("network_output", "network", "output"),
+    ("block_input", "block_io", "input"),
+    ("block_output", "block_io", "output"),
+]
+
+
+def sizes_to_mb(sizes):
+    """Vectorized convert_to_mb over a Series of size strings"""
+    sizes = sizes.astype(str)
+    numbers = pd.to_numeric(sizes.str.rstrip(string.ascii_letters + " "), errors="coerce")
+    units = sizes.str.lstrip("0123456789. ").str.upper()
+    return numbers * units.map(SIZE_UNITS_MB).fillna(1.0)
 
-        timestamps = [
-            datetime.strptime(ts, "%Y-%m-%dT%H:%M:%SZ").strftime("%H:%M")
-            for ts in group["timestamp"]
+
+def percents_to_float(percents):
+    """Vectorized float(str(p).rstrip("%")) over a Series"""
+    return pd.to_numeric(percents.astype(str).str.rstrip("%"), errors="coerce")
+
+
+def records_to_columns(data):
+    """Transpose raw records into one list of strings per RAW_FIELDS column"""
+    return {
+        column: [
+            record[key] if nested is None else record[key][nested] for record in data
         ]
+        for column, key, nested in RAW_FIELDS
+    }
 
-        latest = group.iloc[-1]
 
-        current_memory_mb = convert_to_mb(latest["memory"]["usage"])
-        memory_limit_mb = convert_to_mb(latest["memory"]["limit"])
+def columns_to_frame(columns):
+    """Vectorized conversion of raw string columns into a metrics frame.
+
+    The raw strings needed for the "current" cards are kept alongside the
+    numeric columns so the frame is the only thing the views need.
+    """
+    raw = pd.DataFrame(columns)
+    return pd.DataFrame(
+        {
+            "name": raw["name"],
+            "timestamp": pd.to_datetime(raw["timestamp"], format=TIMESTAMP_FORMAT),
+            "cpu": percents_to_float(raw["cpu_percent"]),
+            "mem_percent": percents_to_float(raw["memory_percent"]),
+            "mem_mb": sizes_to_mb(raw["memory_usage"]),
+            "mem_limit_mb": sizes_to_mb(raw["memory_limit"]),
+            "net_in_mb": sizes_to_mb(raw["network_input"]),
+            "net_out_mb": sizes_to_mb(raw["network_output"]),
+            "block_in_mb": sizes_to_mb(raw["block_input"]),
+            "block_out_mb": sizes_to_mb(raw["block_output"]),
+            "cpu_percent": raw["cpu_percent"],
+            "memory_usage": raw["memory_usage"],
+            "memory_limit": raw["memory_limit"],
+            "memory_percent": raw["memory_percent"],
+            "network_input": raw["network_input"],
+            "network_output": raw["network_output"],
+        }
+    )
+
+
+def build_metrics_frame(data):
+    """Flatten raw docker-stats records into one numeric row per sample"""
+    frame = columns_to_frame(records_to_columns(data))
+    return frame.sort_values(["name", "timestamp"], kind="stable").reset_index(
+        drop=True
+    )
+
+
+def process_container_frame(frame):
+    containers = []
+    for name, group in frame.groupby("name", sort=False):
+        latest = group.iloc[-1]
 
         containers.append(
             {
                 "name": name,
                 "current_cpu": latest["cpu_percent"],
-                "avg_cpu": f"{sum(cpu_values) / len(cpu_values):.2f}",
-                "current_memory": latest["memory"],
-                "current_memory_mb": f"{current_memory_mb:.2f}",
-                "memory_limit_mb": f"{memory_limit_mb:.2f}",
-                "current_network": latest["network"],
-                "timestamps": timestamps,
-                "cpu_history": cpu_values,
-                "memory_history": memory_values,
-                "memory_mb_history": memory_mb_values,
-                "net_in_history": net_in_values,
-                "net_out_history": net_out_values,
-                "block_in_history": block_in_values,
-                "block_out_history": block_out_values,
+                "avg_cpu": f"{group['cpu'].mean():.2f}",
+                "current_memory": {
+                    "usage": latest["memory_usage"],
+                    "limit": latest["memory_limit"],
+                    "percent": latest["memory_percent"],
+                },
+                "current_memory_mb": f"{latest['mem_mb']:.2f}",
+                "memory_limit_mb": f"{latest['mem_limit_mb']:.2f}",
+                "current_network": {
+                    "input": latest["network_input"],
+                    "output": latest["network_output"],
+                },
+                "timestamps": group["timestamp"].dt.strftime("%H:%M").tolist(),
+                "epoch_seconds": group["timestamp"].to_numpy("datetime64[s]").astype(
+                    np.int64
+                ),
+                "cpu_history": group["cpu"].tolist(),
+                "memory_history": group["mem_percent"].tolist(),
+                "memory_mb_history": group["mem_mb"].tolist(),
+                "net_in_history": group["net_in_mb"].tolist(),
+                "net_out_history": group["net_out_mb"].tolist(),
+                "block_in_history": group["block_in_mb"].tolist(),
+                "block_out_history": group["block_out_mb"].tolist(),
             }
         )
 
@@ -480,16 +852,354 @@ def process_container_data(data):
     return containers
 
 
+def process_container_data(data):
+    return process_container_frame(build_metrics_frame(data))
+
+
+def align_to_grid(frame, step=DEFAULT_STEP, fill=DEFAULT_FILL):
+    """Resample every container onto one shared time grid.
+
+    Returns a DataFrame indexed by grid time with (metric, container) columns,
+    so containers can be compared and summed column-wise.
+    """
+    if fill not in FILL_POLICIES:
+        raise ValueError(f"Unknown fill policy: {fill}")
+
+    binned = frame.assign(timestamp=frame["timestamp"].dt.floor(step))
+    aggregations = {column: "mean" for column in GAUGE_COLUMNS}
+    aggregations.update({column: "last" for column in COUNTER_COLUMNS})
+    aligned = (
+        binned.groupby(["timestamp", "name"])[METRIC_COLUMNS]
+        .agg(aggregations)
+        .unstack("name")
+    )
+
+    grid = pd.date_range(aligned.index.min(), aligned.index.max(), freq=step)
+    aligned = aligned.reindex(grid)
+
+    if fill == "ffill":
+        aligned = aligned.ffill()
+    elif fill == "zero":
+        aligned = aligned.fillna(0.0)
+    elif fill == "interpolate":
+        aligned = aligned.interpolate(method="time", limit_area="inside")
+
+    return aligned
+
+
+def top_consumers(aligned, n=DEFAULT_TOP_N):
+    """Rank containers per metric from the aligned matrix.
+
+    One aggregation pass yields mean/min/max for every (metric, container)
+    column; gauges are ranked by their mean and cumulative counters by how
+    much they grew over the window.
+    """
+    summary = aligned.agg(["mean", "min", "max"])
+    score = pd.concat(
+        [
+            summary.loc["mean", GAUGE_COLUMNS],
+            summary.loc["max", COUNTER_COLUMNS] - summary.loc["min", COUNTER_COLUMNS],
+        ]
+    )
+    return {
+        metric: score[metric].dropna().nlargest(n)
+        for metric in score.index.get_level_values(0).unique()
+    }
+
+
+def _stacked_series(matrix):
+    return [
+        {"name": name, "values": matrix[name].fillna(0.0).round(3).tolist()}
+        for name in sorted(matrix.columns)
+    ]
+
+
+def process_host_view(frame, step=DEFAULT_STEP, fill=DEFAULT_FILL, top_n=DEFAULT_TOP_N):
+    """Host-total stacked series and top consumers on a shared time grid"""
+    aligned = align_to_grid(frame, step, fill)
+    top = top_consumers(aligned, top_n)
+
+    top_views = [
+        ("CPU (avg %)", top["cpu"]),
+        ("Memory (avg MB)", top["mem_mb"]),
+        ("Network In (MB)", top["net_in_mb"]),
+        ("Network Out (MB)", top["net_out_mb"]),
+        ("Block In (MB)", top["block_in_mb"]),
+        ("Block Out (MB)", top["block_out_mb"]),
+    ]
+
+    return {
+        "timestamps": aligned.index.strftime("%H:%M").tolist(),
+        "epoch_seconds": aligned.index.to_numpy("datetime64[s]").astype(np.int64),
+        "cpu": _stacked_series(aligned["cpu"]),
+        "memory": _stacked_series(aligned["mem_mb"]),
+        "network": _stacked_series(
+            aligned["net_in_mb"].add(aligned["net_out_mb"], fill_value=0.0)
+        ),
+        "block": _stacked_series(
+            aligned["block_in_mb"].add(aligned["block_out_mb"], fill_value=0.0)
+        ),
+        "top": [
+            {
+                "title": title,
+                "rows": [
+                    {"name": name, "value": f"{value:.2f}"}
+                    for name, value in ranking.items()
+                ],
+            }
+            for title, ranking in top_views
+        ],
+    }
+
+
+SERIES_ENCODINGS = ["json", "f32", "delta"]
+SERIES_KEYS = [
+    "cpu_history",
+    "memory_history",
+    "memory_mb_history",
+    "net_in_history",
+    "net_out_history",
+    "block_in_history",
+    "block_out_history",
+]
+HOST_SERIES_KEYS = ["cpu", "memory", "network", "block"]
+# load-test series overlaid on a container's charts
+LOAD_SERIES_KEYS = ["rps", "p95"]
+# delta encoding keeps three decimals, which is what the charts can show anyway
+DELTA_SCALE = 1000
+
+
+def _base64(values):
+    return base64.b64encode(values.tobytes()).decode("ascii")
+
+
+def encode_series(values, encoding):
+    """Encode a float series as little-endian Float32 or scaled Int32 deltas"""
+    values = np.nan_to_num(np.asarray(values, dtype=np.float64))
+    if encoding == "f32":
+        return {"enc": "f32", "data": _base64(values.astype("<f4"))}
+
+    scaled = np.round(values * DELTA_SCALE).astype(np.int64)
+    deltas = np.diff(scaled, prepend=0).astype("<i4")
+    return {"enc": "delta", "scale": DELTA_SCALE, "data": _base64(deltas)}
+
+
+def encode_timestamps(seconds):
+    """Encode epoch seconds as start + step when regular, Int32 deltas otherwise"""
+    seconds = np.asarray(seconds, dtype=np.int64)
+    start = int(seconds[0]) if len(seconds) else 0
+    steps = np.diff(seconds)
+    if len(steps) == 0 or (steps == steps[0]).all():
+        step = int(steps[0]) if len(steps) else 0
+        return {"enc": "range", "start": start, "step": step, "count": len(seconds)}
+
+    deltas = np.diff(seconds, prepend=start).astype("<i4")
+    return {"enc": "delta", "start": start, "data": _base64(deltas)}
+
+
+def encode_container(container, encoding):
+    """Copy of a container view with its chart series in the given encoding"""
+    encoded = dict(container)
+    if encoding == "json":
+        return encoded
+    encoded["timestamps"] = encode_timestamps(container["epoch_seconds"])
+    for key in SERIES_KEYS:
+        encoded[key] = encode_series(container[key], encoding)
+    if container.get("load"):
+        encoded["load"] = dict(container["load"])
+        for key in LOAD_SERIES_KEYS:
+            encoded["load"][key] = encode_series(container["load"][key], encoding)
+    return encoded
+
+
+def encode_host_view(host, encoding):
+    encoded = dict(host)
+    if encoding == "json":
+        return encoded
+    encoded["timestamps"] = encode_timestamps(host["epoch_seconds"])
+    for key in HOST_SERIES_KEYS:
+        encoded[key] = [
+            {"name": series["name"], "values": encode_series(series["values"], encoding)}
+            for series in host[key]
+        ]
+    return encoded
+
+
+# columns produced by the parallel parser, in the order each worker packs them
+NUMERIC_COLUMNS = ["cpu", "mem_percent", "mem_mb", "mem_limit_mb"] + COUNTER_COLUMNS
+RAW_COLUMNS = [
+    "cpu_percent",
+    "memory_usage",
+    "memory_limit",
+    "memory_percent",
+    "network_input",
+    "network_output",
+]
+
+PARSE_MODES = ["serial", "parallel"]
+PARSE_CHUNK_BYTES = 8 * 1024 * 1024
+
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+
+def parse_chunk(chunk):
+    """Decode newline-delimited records into per-container columnar partials.
+
+    Each partial holds int64 epoch seconds, a float64 matrix with
+    NUMERIC_COLUMNS and the raw strings of its latest sample only, which
+    keeps what travels back from a worker process small.
+    """
+    data = []
+    errors = 0
+    for line in chunk.splitlines():
+        if not line.strip():
+            continue
+        try:
+            data.append(json.loads(line))
+        except json.JSONDecodeError:
+            errors += 1
+
+    if not data:
+        return {}, errors
+
+    frame = columns_to_frame(records_to_columns(data))
+    partials = {}
+    for name, group in frame.groupby("name", sort=False):
+        # stable sort so that timestamp ties resolve to the later line
+        group = group.sort_values("timestamp", kind="stable")
+        latest = group.iloc[-1]
+        partials[name] = {
+            "timestamp": group["timestamp"].to_numpy("datetime64[s]").astype(np.int64),
+            "values": group[NUMERIC_COLUMNS].to_numpy(np.float64),
+            "latest": {
+                "timestamp": int(group["timestamp"].iloc[-1].timestamp()),
+                **{column: latest[column] for column in RAW_COLUMNS},
+            },
+        }
+    return partials, errors
+
+
+def parse_file_range(file_path, start, end):
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        return parse_chunk(f.read(end - start))
+
+
+def newline_boundaries(size, chunk_bytes, find_newline):
+    """Split [0, size) into ranges that each end just after a newline"""
+    boundaries = [0]
+    while boundaries[-1] < size:
+        target = boundaries[-1] + chunk_bytes
+        if target >= size:
+            boundaries.append(size)
+            break
+        newline = find_newline(target)
+        boundaries.append(size if newline < 0 else newline + 1)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def _file_newline_finder(file_path):
+    def find_newline(offset):
+        with open(file_path, "rb") as f:
+            f.seek(offset)
+            f.readline()
+            position = f.tell()
+        return position - 1 if position > offset else -1
+
+    return find_newline
+
+
+def merge_partials(results):
+    """Merge worker partials (in chunk order) into one metrics frame"""
+    by_name = {}
+    errors = 0
+    for partials, chunk_errors in results:
+        errors += chunk_errors
+        for name, partial in partials.items():
+            by_name.setdefault(name, []).append(partial)
+
+    if errors:
+        print(f"Skipped {errors} unparseable log lines")
+
+    frames = []
+    for name, parts in by_name.items():
+        timestamps = np.concatenate([part["timestamp"] for part in parts])
+        values = np.concatenate([part["values"] for part in parts])
+        order = np.argsort(timestamps, kind="stable")
+
+        frame = pd.DataFrame(values[order], columns=NUMERIC_COLUMNS)
+        frame.insert(0, "timestamp", pd.to_datetime(timestamps[order], unit="s"))
+        frame.insert(0, "name", name)
+
+        latest = parts[0]["latest"]
+        for part in parts[1:]:
+            if part["latest"]["timestamp"] >= latest["timestamp"]:
+                latest = part["latest"]
+        for column in RAW_COLUMNS:
+            frame[column] = None
+            frame.at[len(frame) - 1, column] = latest[column]
+
+        frames.append(frame)
+
+    if not frames:
+        return None
+    return pd.concat(frames, ignore_index=True)
+
+
+def _get_parse_pool(workers=None):
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(max_workers=workers)
+        return _parse_pool
+
+
+def parse_log_parallel(source, workers=None, chunk_bytes=PARSE_CHUNK_BYTES):
+    """Parse a docker-stats log buffer (bytes) or file path across processes.
+
+    The input is split into newline-aligned chunks; buffers are shipped to the
+    workers while files are read by each worker from its own byte range.
+    Inputs that fit in a single chunk are parsed in-process.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        ranges = newline_boundaries(
+            len(source), chunk_bytes, lambda offset: source.find(b"\n", offset)
+        )
+        if len(ranges) <= 1:
+            return merge_partials([parse_chunk(source)])
+        chunks = [source[start:end] for start, end in ranges]
+        results = _get_parse_pool(workers).map(parse_chunk, chunks)
+    else:
+        size = os.path.getsize(source)
+        ranges = newline_boundaries(size, chunk_bytes, _file_newline_finder(source))
+        if len(ranges) <= 1:
+            return merge_partials([parse_file_range(source, 0, size)])
+        pool = _get_parse_pool(workers)
+        futures = [
+            pool.submit(parse_file_range, source, start, end) for start, end in ranges
+        ]
+        results = [future.result() for future in futures]
+
+    return merge_partials(results)
+
+
 last_update = None
 
+REMOTE_ALIAS = "swecc-server"
+REMOTE_PATH = "/var/log/docker-stats.log"
+
+
+def remote_log_command(remote_alias, remote_path, line_count=None):
+    if line_count:
+        return f"ssh {remote_alias} 'sudo tail -n {line_count} {remote_path}'"
+    return f"ssh {remote_alias} 'sudo cat {remote_path}'"
+
 
 def fetch_remote_logs(remote_alias, remote_path, line_count=None):
     """Fetch logs from remote server using SSH and tail"""
     try:
-        if line_count:
-            command = f"ssh {remote_alias} 'sudo tail -n {line_count} {remote_path}'"
-        else:
-            command = f"ssh {remote_alias} 'sudo cat {remote_path}'"
+        command = remote_log_command(remote_alias, remote_path, line_count)
 
         result = subprocess.run(command, shell=True, capture_output=True, text=True)
 
@@ -512,27 +1222,588 @@ def fetch_remote_logs(remote_alias, remote_path, line_count=None):
         return []
 
 
+def fetch_remote_log_bytes(remote_alias, remote_path, line_count=None):
+    """Fetch the raw log buffer without decoding it, for the parallel parser"""
+    try:
+        command = remote_log_command(remote_alias, remote_path, line_count)
+
+        result = subprocess.run(command, shell=True, capture_output=True)
+
+        if result.returncode != 0:
+            print(f"Error fetching logs: {result.stderr.decode(errors='replace')}")
+            return b""
+
+        return result.stdout
+    except Exception as e:
+        print(f"Error executing SSH command: {e}")
+        return b""
+
+
+def load_metrics_frame(line_count=None, parse_mode=None):
+    """Fetch the remote log and turn it into a metrics frame (None on failure)"""
+    parse_mode = parse_mode or os.getenv("DASHBOARD_PARSE_MODE", "serial")
+
+    if parse_mode == "parallel":
+        buffer = fetch_remote_log_bytes(REMOTE_ALIAS, REMOTE_PATH, line_count)
+        if not buffer:
+            return None
+        workers = os.getenv("DASHBOARD_PARSE_WORKERS")
+        return parse_log_parallel(buffer, int(workers) if workers else None)
+
+    data = fetch_remote_logs(REMOTE_ALIAS, REMOTE_PATH, line_count)
+    if not data:
+        return None
+    return build_metrics_frame(data)
+
+
+REFRESH_INTERVAL = float(os.getenv("DASHBOARD_REFRESH_INTERVAL", "60"))
+REFRESH_JITTER = float(os.getenv("DASHBOARD_REFRESH_JITTER", "0.1"))
+REFRESH_MAX_BACKOFF = float(os.getenv("DASHBOARD_REFRESH_MAX_BACKOFF", "600"))
+REFRESH_LINES = os.getenv("DASHBOARD_REFRESH_LINES")
+# lines of the default view, which the refresher keeps fresh (None: the whole log)
+DEFAULT_LINES = int(REFRESH_LINES) if REFRESH_LINES else None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution.
+
+    The first caller runs the function; callers arriving while it is in
+    flight wait for it and share its result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {
+                    "done": threading.Event(),
+                    "result": None,
+                    "error": None,
+                }
+
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            call["result"] = fn()
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["done"].set()
+        return call["result"]
+
+
+_flights = SingleFlight()
+_snapshots = {}
+_scheduled_keys = set()
+
+
+def _snapshot_key(line_count=None, parse_mode=None):
+    return (line_count, parse_mode or os.getenv("DASHBOARD_PARSE_MODE", "serial"))
+
+
+def refresh_snapshot(line_count=None, parse_mode=None):
+    """Fetch and process the log once, however many callers ask concurrently.
+
+    A successful refresh replaces the stored snapshot for its key; a failed
+    one leaves the previous snapshot in place and returns None.
+    """
+    key = _snapshot_key(line_count, parse_mode)
+
+    def fetch_and_process():
+        frame = load_metrics_frame(*key)
+        if frame is None:
+            return None
+        snapshot = {
+            "frame": frame,
+            "containers": process_container_frame(frame),
+            "fetched_at": datetime.now(),
+        }
+        _snapshots[key] = snapshot
+        return snapshot
+
+    return _flights.do(key, fetch_and_process)
+
+
+def get_snapshot(line_count=None, parse_mode=None, max_age=REFRESH_INTERVAL):
+    """Latest completed snapshot, refreshed on the request path only if stale"""
+    key = _snapshot_key(line_count, parse_mode)
+    snapshot = _snapshots.get(key)
+    if snapshot is not None and key in _scheduled_keys:
+        return snapshot
+    if (
+        snapshot is not None
+        and (datetime.now() - snapshot["fetched_at"]).total_seconds() < max_age
+    ):
+        return snapshot
+    return refresh_snapshot(*key) or snapshot
+
+
+class SnapshotRefresher(threading.Thread):
+    """Refresh one snapshot key in the background on a jittered interval.
+
+    Failed fetches (e.g. SSH errors) back off exponentially up to max_backoff.
+    """
+
+    def __init__(
+        self,
+        line_count=None,
+        parse_mode=None,
+        interval=REFRESH_INTERVAL,
+        jitter=REFRESH_JITTER,
+        max_backoff=REFRESH_MAX_BACKOFF,
+    ):
+        super().__init__(name="snapshot-refresher", daemon=True)
+        self.key = _snapshot_key(line_count, parse_mode)
+        self.interval = interval
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self._stopped = threading.Event()
+
+    def next_delay(self, failures):
+        delay = self.interval
+        if failures:
+            delay = min(self.interval * 2**failures, self.max_backoff)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def run(self):
+        _scheduled_keys.add(self.key)
+        failures = 0
+        while not self._stopped.is_set():
+            try:
+                snapshot = refresh_snapshot(*self.key)
+            except Exception as e:
+                print(f"Error refreshing snapshot: {e}")
+                snapshot = None
+
+            failures = 0 if snapshot is not None else failures + 1
+            if failures:
+                print(f"Snapshot refresh failed ({failures} in a row), backing off")
+            self._stopped.wait(self.next_delay(failures))
+        _scheduled_keys.discard(self.key)
+
+    def stop(self):
+        self._stopped.set()
+
+
+def start_refresher():
+    """Start background refreshes of the default view unless disabled"""
+    if REFRESH_INTERVAL <= 0:
+        return None
+    refresher = SnapshotRefresher(DEFAULT_LINES)
+    refresher.start()
+    return refresher
+
+
+# load-test timeline written by load-tests/commons/timeline.py
+TIMELINE_FILE = os.getenv("DASHBOARD_TIMELINE_FILE", "load-tests/load-timeline.jsonl")
+# load is averaged over this window before it is joined to container samples
+LOAD_SMOOTHING = os.getenv("DASHBOARD_LOAD_SMOOTHING", "5s")
+# and joined to the nearest second within this tolerance
+LOAD_TOLERANCE = os.getenv("DASHBOARD_LOAD_TOLERANCE", "30s")
+SATURATION_CPU = float(os.getenv("DASHBOARD_SATURATION_CPU", "80"))
+_timeline_cache = {}
+
+
+def bucket_percentile(buckets, percentile):
+    """Percentile of a {response time: count} histogram"""
+    total = sum(buckets.values())
+    if not total:
+        return np.nan
+    target = percentile / 100 * total
+    seen = 0
+    for value in sorted(buckets):
+        seen += buckets[value]
+        if seen >= target:
+            return value
+    return max(buckets)
+
+
+def parse_timeline(lines):
+    """Per-second load (summed over load processes) and phase markers.
+
+    Returns (load, phases): load has one row per second with rps, failures,
+    users, p50 and p95 in milliseconds; phases has timestamp, scenario and
+    phase. Timestamps are naive UTC like the docker-stats frame.
+    """
+    seconds = {}
+    phases = []
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if record["kind"] == "phase":
+            phases.append((record["ts"], record["scenario"], record["phase"]))
+            continue
+        second = seconds.setdefault(
+            record["ts"], {"requests": 0, "failures": 0, "users": 0, "buckets": {}}
+        )
+        second["requests"] += record["requests"]
+        second["failures"] += record["failures"]
+        second["users"] += record["users"]
+        for value, count in record["response_times"].items():
+            value = int(value)
+            second["buckets"][value] = second["buckets"].get(value, 0) + count
+
+    ts = sorted(seconds)
+    load = pd.DataFrame(
+        {
+            "timestamp": pd.to_datetime(ts, unit="s"),
+            "rps": [seconds[t]["requests"] for t in ts],
+            "failures": [seconds[t]["failures"] for t in ts],
+            "users": [seconds[t]["users"] for t in ts],
+            "p50": [bucket_percentile(seconds[t]["buckets"], 50) for t in ts],
+            "p95": [bucket_percentile(seconds[t]["buckets"], 95) for t in ts],
+        },
+        columns=["timestamp", "rps", "failures", "users", "p50", "p95"],
+    )
+    phases = pd.DataFrame(phases, columns=["timestamp", "scenario", "phase"])
+    phases["timestamp"] = pd.to_datetime(phases["timestamp"], unit="s")
+    return load, phases.sort_values("timestamp", kind="stable")
+
+
+def load_timeline(path=None):
+    """Parsed timeline file, re-read only when it changes (None if absent)"""
+    path = path or TIMELINE_FILE
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = (path, stat.st_mtime, stat.st_size)
+    if _timeline_cache.get("key") != key:
+        with open(path, "r") as f:
+            _timeline_cache["value"] = parse_timeline(f)
+        _timeline_cache["key"] = key
+    return _timeline_cache["value"]
+
+
+def smooth_load(load, window=LOAD_SMOOTHING):
+    """Fill idle seconds with zero load and average over the smoothing window.
+
+    A zero-load second is added past both ends, so samples taken before or
+    after the runs are joined to no load rather than to the edge seconds.
+    """
+    if load.empty:
+        return load
+    indexed = load.set_index("timestamp")
+    first, last = indexed.index.min(), indexed.index.max()
+    indexed = indexed.reindex(pd.date_range(first, last, freq="1s"))
+    indexed[["rps", "failures", "users"]] = indexed[["rps", "failures", "users"]].fillna(0)
+    smoothed = indexed.rolling(window, min_periods=1).mean()
+
+    idle = pd.DataFrame(
+        0.0,
+        index=[first - pd.Timedelta("1s"), last + pd.Timedelta("1s")],
+        columns=smoothed.columns,
+    )
+    smoothed = pd.concat([idle.iloc[:1], smoothed, idle.iloc[1:]])
+    return smoothed.rename_axis("timestamp").reset_index()
+
+
+def overlay_load(containers, timeline, tolerance=LOAD_TOLERANCE):
+    """Copies of the container views with the load joined onto their samples.
+
+    Each container sample gets the (smoothed) load of the nearest second via
+    merge_asof, so the RPS and p95 series line up with the container's own
+    chart labels. Phase markers are placed on the nearest sample, and the
+    first sample with CPU at SATURATION_CPU or above while load was running
+    is reported as the container's saturation point.
+    """
+    if timeline is None:
+        return containers
+    load, phases = timeline
+    if load.empty:
+        return containers
+    smoothed = smooth_load(load)
+    # merge_asof needs both keys at the same resolution
+    smoothed["timestamp"] = smoothed["timestamp"].astype("datetime64[ns]")
+
+    overlaid = []
+    for container in containers:
+        container = dict(container)
+        samples = pd.DataFrame(
+            {
+                "timestamp": pd.to_datetime(
+                    container["epoch_seconds"], unit="s"
+                ).astype("datetime64[ns]"),
+                "cpu": container["cpu_history"],
+            }
+        )
+        joined = pd.merge_asof(
+            samples,
+            smoothed,
+            on="timestamp",
+            direction="nearest",
+            tolerance=pd.Timedelta(tolerance),
+        )
+        if joined["rps"].notna().any():
+            start, end = samples["timestamp"].iloc[0], samples["timestamp"].iloc[-1]
+            window = phases[(phases["timestamp"] >= start) & (phases["timestamp"] <= end)]
+            indices = np.searchsorted(
+                container["epoch_seconds"],
+                window["timestamp"].to_numpy("datetime64[s]").astype(np.int64),
+            )
+            saturated = joined[(joined["cpu"] >= SATURATION_CPU) & (joined["rps"] > 0)]
+            container["load"] = {
+                "rps": joined["rps"].fillna(0.0).round(2).tolist(),
+                "p95": joined["p95"].round(1).fillna(0.0).tolist(),
+                "peak_rps": f"{joined['rps'].max():.1f}",
+                "phases": [
+                    {
+                        "index": int(min(index, len(samples) - 1)),
+                        "label": f"{scenario}: {phase}",
+                    }
+                    for index, scenario, phase in zip(
+                        indices, window["scenario"], window["phase"]
+                    )
+                ],
+                "saturated_at": None,
+            }
+            if not saturated.empty:
+                first = saturated.iloc[0]
+                container["load"]["saturated_at"] = {
+                    "time": first["timestamp"].strftime("%H:%M:%S"),
+                    "epoch": int(first["timestamp"].timestamp()),
+                    "rps": f"{first['rps']:.1f}",
+                    "cpu": f"{first['cpu']:.1f}",
+                }
+        overlaid.append(container)
+    return overlaid
+
+
+def saturation_order(containers):
+    """Containers that crossed SATURATION_CPU under load, earliest first"""
+    saturated = [
+        {"name": container["name"], **container["load"]["saturated_at"]}
+        for container in containers
+        if container.get("load") and container["load"]["saturated_at"]
+    ]
+    return sorted(saturated, key=lambda row: row["epoch"])
+
+
 @app.route("/")
 def dashboard():
-    remote_alias = "swecc-server"
-    remote_path = "/var/log/docker-stats.log"
+    line_count = request.args.get("lines", DEFAULT_LINES, type=int)
+    step = request.args.get("step", DEFAULT_STEP) or DEFAULT_STEP
+    fill = request.args.get("fill", DEFAULT_FILL)
+    top_n = request.args.get("top", DEFAULT_TOP_N, type=int)
+    parse_mode = request.args.get("parse")
+    encoding = request.args.get("encoding", "json")
 
-    line_count = request.args.get("lines", type=int)
+    if parse_mode not in (None, *PARSE_MODES):
+        return f"Error: unknown parse mode '{parse_mode}'.", 400
+    if encoding not in SERIES_ENCODINGS:
+        return f"Error: unknown series encoding '{encoding}'.", 400
+    if fill not in FILL_POLICIES:
+        return f"Error: unknown fill policy '{fill}'.", 400
+    if top_n < 1:
+        return "Error: top N must be at least 1.", 400
+    try:
+        to_offset(step)
+    except ValueError:
+        return f"Error: invalid grid step '{step}'.", 400
 
-    data = fetch_remote_logs(remote_alias, remote_path, line_count)
+    snapshot = get_snapshot(line_count, parse_mode)
 
-    if not data:
+    if snapshot is None:
         return "Error: Could not fetch log data from remote server.", 500
 
-    containers = process_container_data(data)
+    host = process_host_view(snapshot["frame"], step, fill, top_n)
+    try:
+        containers = overlay_load(snapshot["containers"], load_timeline())
+    except (ValueError, KeyError) as e:
+        print(f"Error reading load timeline: {e}")
+        containers = snapshot["containers"]
 
     return render_template_string(
         HTML_TEMPLATE,
-        containers=containers,
-        last_update=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        containers=[encode_container(container, encoding) for container in containers],
+        saturation=saturation_order(containers),
+        saturation_cpu=SATURATION_CPU,
+        host=encode_host_view(host, encoding),
+        last_update=snapshot["fetched_at"].strftime("%Y-%m-%d %H:%M:%S"),
         line_count=line_count or "",
+        step=step,
+        fill=fill,
+        fill_policies=FILL_POLICIES,
+        top_n=top_n,
+        encoding=encoding,
+        series_encodings=SERIES_ENCODINGS,
+    )
+
+
+EXPORT_COLUMNS = ["timestamp", "name"] + METRIC_COLUMNS
+EXPORT_BATCH_ROWS = 5000
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def select_window(frame, start=None, end=None, names=None):
+    """Rows of the metrics frame inside [start, end] for the given containers"""
+    mask = pd.Series(True, index=frame.index)
+    if start is not None:
+        mask &= frame["timestamp"] >= start
+    if end is not None:
+        mask &= frame["timestamp"] <= end
+    if names:
+        mask &= frame["name"].isin(names)
+    return frame.loc[mask, EXPORT_COLUMNS]
+
+
+def iter_export_batches(frame, batch_rows=EXPORT_BATCH_ROWS):
+    """Yield fixed-size slices with timestamps rendered in the log's format"""
+    for offset in range(0, len(frame), batch_rows):
+        batch = frame.iloc[offset : offset + batch_rows]
+        yield batch.assign(timestamp=batch["timestamp"].dt.strftime(TIMESTAMP_FORMAT))
+
+
+def export_csv(batches):
+    yield ",".join(EXPORT_COLUMNS) + "\n"
+    for batch in batches:
+        yield batch.to_csv(header=False, index=False)
+
+
+def export_ndjson(batches):
+    for batch in batches:
+        text = batch.to_json(orient="records", lines=True)
+        yield text if text.endswith("\n") else text + "\n"
+
+
+class _StreamSink(io.RawIOBase):
+    """Write-only file that hands out what was written since the last drain.
+
+    Parquet records absolute offsets in its footer, so the position keeps
+    counting even though the written bytes are released.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def export_parquet(batches):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _StreamSink()
+    writer = None
+    for batch in batches:
+        table = pa.Table.from_pandas(batch, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema)
+        writer.write_table(table)
+        yield sink.drain()
+
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
+
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def parse_window_bound(value):
+    """Parse an ISO timestamp into the naive UTC form used by the frame"""
+    if not value:
+        return None
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert("UTC").tz_localize(None)
+    return timestamp
+
+
+@app.route("/export")
+def export():
+    """Stream processed per-container series as CSV, NDJSON or Parquet.
+
+    Query params: format, start, end (ISO timestamps), container (repeatable),
+    lines, parse, compress=gzip.
+    """
+    export_format = request.args.get("format", "csv")
+    compress = request.args.get("compress")
+    line_count = request.args.get("lines", DEFAULT_LINES, type=int)
+    parse_mode = request.args.get("parse")
+
+    if export_format not in EXPORT_FORMATS:
+        return f"Error: unknown export format '{export_format}'.", 400
+    if parse_mode not in (None, *PARSE_MODES):
+        return f"Error: unknown parse mode '{parse_mode}'.", 400
+    if compress not in (None, "", "gzip"):
+        return f"Error: unknown compression '{compress}'.", 400
+    if export_format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        return "Error: parquet export requires pyarrow.", 400
+    try:
+        start = parse_window_bound(request.args.get("start"))
+        end = parse_window_bound(request.args.get("end"))
+    except ValueError as e:
+        return f"Error: invalid time window: {e}", 400
+
+    snapshot = get_snapshot(line_count, parse_mode)
+
+    if snapshot is None:
+        return "Error: Could not fetch log data from remote server.", 500
+
+    window = select_window(
+        snapshot["frame"], start, end, request.args.getlist("container")
+    )
+
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    writers = {"csv": export_csv, "ndjson": export_ndjson, "parquet": export_parquet}
+    body = writers[export_format](iter_export_batches(window))
+
+    filename = f"docker-stats.{extension}"
+    if compress:
+        body = gzip_stream(body)
+        mimetype = "application/gzip"
+        filename += ".gz"
+
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
 
 
 if __name__ == "__main__":
+    # the debug reloader runs the app in a child process; only refresh there
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_refresher()
     app.run(debug=True, host="0.0.0.0", port=3000)
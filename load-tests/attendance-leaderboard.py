@@ -1,11 +1,20 @@
 import os
 import random
-from locust import HttpUser, task, between, events
+from locust import task, between, events
 import json
 import time
 
+from commons.clients import user_base
+from commons.open_loop import open_loop
+from commons.profiling import section
+from commons.run_hooks import register_run_hooks
 
-class BotUser(HttpUser):
+
+register_run_hooks("attendance_leaderboard", throughput=True)
+
+
+@open_loop
+class BotUser(user_base()):
     wait_time = between(1, 5)
 
     current_order = "last_updated"
@@ -39,20 +48,22 @@ class BotUser(HttpUser):
 
             if response.status_code == 200:
                 response.success()
-                events.request.fire(
-                    request_type="POST",
-                    name="message_success",
-                    response_time=duration * 1000,
-                    response_length=len(response.text),
-                    context={"current_order": self.current_order},
-                )
+                with section("extra_event"):
+                    events.request.fire(
+                        request_type="POST",
+                        name="message_success",
+                        response_time=duration * 1000,
+                        response_length=len(response.text),
+                        context={"current_order": self.current_order},
+                    )
             else:
                 response.failure(f"Unexpected status code: {response.status_code}")
-                print(
-                    f"Error sending message - Status: {response.status_code}, "
-                    f"Current Order: {self.current_order}, "
-                    f"Response: {response.text}"
-                )
+                with section("print"):
+                    print(
+                        f"Error sending message - Status: {response.status_code}, "
+                        f"Current Order: {self.current_order}, "
+                        f"Response: {response.text}"
+                    )
 
 
 @events.test_start.add_listener
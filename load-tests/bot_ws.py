@@ -1,126 +1,100 @@
-import os
-import random
-import json
-import time
-import websocket
-from typing import Dict, List
+from typing import List
 from locust import HttpUser, task, between, events
-import requests
-from threading import Thread
 
-from commons.bot import BASE_URL_WS, SWECCBot, check_connection, BASE_URL_HTTP
+from commons.bot import SWECCBot, check_connection
+from commons.run_hooks import register_run_hooks
+from commons.session_pool import get_session_pool
+from commons.transport import DEFAULT_POOL_SIZE, configure_pool
+from commons.ws_engine import CONNECTIONS_PER_USER, EchoConnection, get_ws_engine
 
+register_run_hooks("websocket_echo")
 
 class SWECCLoadTest(HttpUser):
     wait_time = between(1, 5)
 
     bot: SWECCBot = None
-    ws = None
+    connections: List[EchoConnection] = None
     jwt_token = None
 
     def on_start(self):
-        """Initialize the bot, authenticate, get JWT token, and open WebSocket."""
-        bot_id = random.randint(1, 100)
-        self.bot = SWECCBot.from_idx(bot_id)
+        """Check out a pre-authenticated bot, get JWT token, and open WebSockets."""
+        self.bot = get_session_pool().checkout()
+        self.connections = []
 
-        if not self.bot.ensure_authenticated():
-            raise ValueError(f"Failed to authenticate bot {bot_id}")
+        if not self.bot.has_valid_session():
+            get_session_pool().checkin(self.bot)
+            raise ValueError(f"Failed to authenticate bot {self.bot.idx}")
 
-        self.get_jwt_token()
+        if not self.get_jwt_token():
+            get_session_pool().checkin(self.bot)
+            raise ValueError(f"Failed to get JWT token for bot {self.bot.idx}")
         self.connect_websocket()
 
-        print(f"Bot {bot_id} initialized, authenticated, and connected to WebSocket")
-
-    def get_jwt_token(self):
-        """Get JWT token for WebSocket authentication using the bot's session."""
-        try:
-            response = self.bot.session.get(f"{BASE_URL_HTTP}/auth/jwt/")
-
-            if response.status_code == 200:
-                data = response.json()
-                self.jwt_token = data.get("token")
-                if not self.jwt_token:
-                    raise ValueError("JWT token not found in response")
-                print(f"Successfully retrieved JWT token for bot {self.bot.idx}")
-            else:
-                raise ValueError(
-                    f"Failed to get JWT token: {response.status_code} - {response.text}"
-                )
-        except Exception as e:
-            print(f"Error getting JWT token: {e}")
-            raise
-
-    def connect_websocket(self):
-        """Connect to WebSocket endpoint."""
-        if not self.jwt_token:
-            raise ValueError("Cannot connect to WebSocket without JWT token")
-
-        services = ["echo"]
-        service = random.choice(services)
-
-        ws_url = f"{BASE_URL_WS}/ws/{service}/{self.jwt_token}"
-        print(f"Connecting to WebSocket: {ws_url}")
-        self.ws = websocket.WebSocketApp(
-            ws_url,
-            on_message=self.on_message,
-            on_error=self.on_error,
-            on_close=self.on_close,
-            on_open=self.on_open,
+        print(
+            f"Bot {self.bot.idx} initialized, authenticated, and connected "
+            f"{len(self.connections)} WebSocket(s)"
         )
 
-        thread = Thread(target=self.ws.run_forever)
-        thread.daemon = True
-        thread.start()
-        time.sleep(1)
+    def get_jwt_token(self, refresh: bool = False):
+        """JWT for WebSocket authentication, cached on the bot until it expires.
 
-    def on_message(self, ws, message):
-        # do something
-        ...
+        Only hits /auth/jwt/ when the cached token is missing, about to expire
+        or was rejected by the server; a rejected session logs in once more.
+        """
+        token = self.bot.get_jwt(refresh)
+        if token is None and not self.bot.has_valid_session():
+            # the persisted session was rejected; log in again once
+            if get_session_pool().reauthenticate(self.bot):
+                token = self.bot.get_jwt()
+        self.jwt_token = token
+        return token
 
-    def on_error(self, ws, error):
-        """Handle WebSocket errors."""
-        print(f"WebSocket error: {error}")
+    def connect_websocket(self):
+        """Open this user's echo connections on the shared WebSocket engine.
 
-    def on_close(self, ws, close_status_code, close_msg):
-        """Handle WebSocket connection close."""
-        print(f"WebSocket closed: {close_status_code} - {close_msg}")
-        self.connect_websocket()
+        Connections reconnect on their own with backoff, fetching a new JWT
+        only when the cached one has expired or was rejected.
+        """
+        if not self.jwt_token:
+            raise ValueError("Cannot connect to WebSocket without JWT token")
 
-    def on_open(self, ws):
-        """Handle WebSocket connection open."""
-        print("WebSocket connection established")
+        engine = get_ws_engine()
+        for _ in range(CONNECTIONS_PER_USER - len(self.connections)):
+            self.connections.append(engine.connect(self.get_jwt_token, "echo"))
 
     def on_stop(self):
-        """Clean up WebSocket on test stop."""
-        if self.ws:
-            self.ws.close()
+        """Close WebSockets on test stop and return the bot to the pool."""
+        engine = get_ws_engine()
+        for connection in self.connections or []:
+            engine.close(connection)
+        self.connections = []
+        if self.bot:
+            get_session_pool().checkin(self.bot)
 
     @task(3)
     def send_echo_message(self):
-        """Send an echo message through WebSocket."""
-        if not self.ws:
-            return
-
-        try:
-            message = {
-                "type": "echo",
-                "content": f"Hello from bot {self.bot.idx} at {time.time()}",
-            }
-            self.ws.send(json.dumps(message))
-        except Exception as e:
-            print(f"Error sending echo message: {e}")
-            self.connect_websocket()
+        """Send an echo message on each of this user's WebSockets."""
+        for connection in self.connections:
+            # disconnected sockets are being reconnected by the engine
+            connection.send_echo(f"Hello from bot {self.bot.idx}")
 
 
 @events.test_start.add_listener
 def on_test_start(environment, **kwargs):
     """Check connection to the server before starting the test."""
+    # one keep-alive connection per user sharing this process; sized before
+    # the health check so the shared session gets this pool
+    num_users = getattr(environment.parsed_options, "num_users", None)
+    configure_pool(num_users or DEFAULT_POOL_SIZE)
+
     if not check_connection():
         environment.runner.quit()
         return
+
     print("Starting load test...")
 
 
 @events.test_stop.add_listener
 def on_test_stop(environment, **kwargs):
+    print(get_ws_engine().stats())
     print("Load test completed.")
@@ -1,14 +1,46 @@
+import base64
 import os
+import time
 import requests
 import dataclasses
 import json
 from typing import Optional, Dict, Any
 
+from .profiling import section
+from .transport import new_session, shared_session
+
 HOST = "localhost"
 HTTP = "http"
 WS = "ws"
-BASE_URL_HTTP = "http://localhost"
-BASE_URL_WS = "ws://localhost"
+# point the scripts elsewhere, e.g. SWECC_URL=http://localhost:8000 for mock_server.py
+BASE_URL_HTTP = os.getenv("SWECC_URL", f"{HTTP}://{HOST}").rstrip("/")
+BASE_URL_WS = os.getenv(
+    "SWECC_WS_URL", BASE_URL_HTTP.replace(HTTP, WS, 1)
+).rstrip("/")
+
+# treat sessions as expired this many seconds early
+SESSION_EXPIRY_MARGIN = 60
+# and JWTs this many seconds early, so a socket never connects with one about to lapse
+JWT_EXPIRY_MARGIN = 30
+SESSION_FIELDS = (
+    "sessionid",
+    "csrftoken",
+    "session_expires",
+    "jwt_token",
+    "jwt_expires",
+)
+# bookkeeping that is persisted (or counted) but never sent on registration
+STATE_FIELDS = SESSION_FIELDS + ("is_registered", "is_verified", "round_trips")
+
+
+def jwt_expiry(token: str) -> Optional[float]:
+    """The `exp` claim of a JWT, read without verifying the signature."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
 
 
 @dataclasses.dataclass
@@ -22,6 +54,15 @@ class SWECCBot:
     discord_username: str
     session: Optional[requests.Session] = None
     is_authenticated: bool = False
+    sessionid: Optional[str] = None
+    csrftoken: Optional[str] = None
+    session_expires: Optional[float] = None
+    jwt_token: Optional[str] = None
+    jwt_expires: Optional[float] = None
+    # None until the server tells us; False for bots known not to exist yet
+    is_registered: Optional[bool] = None
+    is_verified: bool = False
+    round_trips: int = 0
 
     @staticmethod
     def from_idx(i: int):
@@ -40,7 +81,7 @@ class SWECCBot:
             email=email,
             password=password,
             discord_username=discord_username,
-            session=requests.Session(),
+            session=new_session(),
         )
 
     @staticmethod
@@ -54,21 +95,110 @@ class SWECCBot:
             email=d["email"],
             password=d["password"],
             discord_username=d["discord_username"],
-            session=requests.Session(),
+            session=new_session(),
             is_authenticated=d.get("is_authenticated", False),
+            sessionid=d.get("sessionid"),
+            csrftoken=d.get("csrftoken"),
+            session_expires=d.get("session_expires"),
+            jwt_token=d.get("jwt_token"),
+            jwt_expires=d.get("jwt_expires"),
+            is_registered=d.get("is_registered"),
+            is_verified=d.get("is_verified", False),
         )
+        bot.restore_session()
         return bot
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert bot to dictionary, excluding session object."""
         data = dataclasses.asdict(self)
         data.pop("session", None)
+        data.pop("round_trips", None)
         return data
 
+    def profile_dict(self) -> Dict[str, Any]:
+        """The bot's profile as sent on registration, without session state."""
+        data = self.to_dict()
+        for field in STATE_FIELDS:
+            data.pop(field, None)
+        return data
+
+    def capture_session(self) -> None:
+        """Remember the session cookies so they can be persisted and reused."""
+        self.sessionid = None
+        self.session_expires = None
+        for cookie in self.session.cookies:
+            if cookie.name == "sessionid":
+                self.sessionid = cookie.value
+                self.session_expires = cookie.expires
+            elif cookie.name == "csrftoken":
+                self.csrftoken = cookie.value
+
+    def restore_session(self) -> None:
+        """Load persisted session cookies into the requests session."""
+        if self.sessionid:
+            self.session.cookies.set("sessionid", self.sessionid)
+        if self.csrftoken:
+            self.session.cookies.set("csrftoken", self.csrftoken)
+
+    def has_valid_session(self) -> bool:
+        """Whether a persisted session exists and has not expired."""
+        if not self.sessionid:
+            return False
+        if self.session_expires is None:
+            return True
+        return self.session_expires - SESSION_EXPIRY_MARGIN > time.time()
+
+    def invalidate_session(self) -> None:
+        """Forget a session the server rejected."""
+        self.is_authenticated = False
+        self.sessionid = None
+        self.session_expires = None
+        self.jwt_token = None
+        self.jwt_expires = None
+        self.session.cookies.clear()
+
+    def has_valid_jwt(self) -> bool:
+        if not self.jwt_token:
+            return False
+        if self.jwt_expires is None:
+            return True
+        return self.jwt_expires - JWT_EXPIRY_MARGIN > time.time()
+
+    def get_jwt(self, refresh: bool = False) -> Optional[str]:
+        """The bot's WebSocket JWT, fetched from /auth/jwt/ only when needed.
+
+        The cached token is reused until shortly before its `exp` claim, or
+        until `refresh` is passed because the server turned it down. If the
+        session itself is rejected it is invalidated, so callers can check
+        has_valid_session() and log in again.
+        """
+        if not refresh and self.has_valid_jwt():
+            return self.jwt_token
+
+        self.jwt_token = None
+        self.jwt_expires = None
+        response = self._send("GET", f"{BASE_URL_HTTP}/auth/jwt/")
+        if response.status_code in (401, 403):
+            self.invalidate_session()
+            return None
+        if response.status_code != 200:
+            print(f"Failed to get JWT token for bot {self.idx}: {response.status_code}")
+            return None
+
+        self.jwt_token = response.json().get("token")
+        if self.jwt_token:
+            self.jwt_expires = jwt_expiry(self.jwt_token)
+        return self.jwt_token
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request on the bot's session, counting the round trip."""
+        self.round_trips += 1
+        return self.session.request(method, url, **kwargs)
+
     def get_csrf_token(self) -> Optional[str]:
         """Retrieve CSRF token from the server."""
         try:
-            response = self.session.get(f"{BASE_URL_HTTP}/auth/csrf/")
+            response = self._send("GET", f"{BASE_URL_HTTP}/auth/csrf/")
             if response.status_code == 200:
                 return self.session.cookies.get("csrftoken")
             print(f"Failed to retrieve CSRF token: {response.status_code}")
@@ -77,20 +207,39 @@ class SWECCBot:
             print(f"Error while retrieving CSRF token: {e}")
             return None
 
-    def register(self) -> bool:
-        """Register the bot on the server."""
-        csrf_token = self.get_csrf_token()
+    def csrf_token(self) -> Optional[str]:
+        """The cached csrftoken cookie, fetched from the server only if missing."""
+        return self.session.cookies.get("csrftoken") or self.get_csrf_token()
+
+    def _post_with_csrf(self, endpoint: str, **kwargs) -> Optional[requests.Response]:
+        """POST with the cached CSRF token, refreshing it once on a 403."""
+        csrf_token = self.csrf_token()
         if not csrf_token:
             print(f"Could not retrieve CSRF token for bot {self.idx}")
-            return False
-
-        headers = {"X-CSRFToken": csrf_token}
+            return None
 
-        response = self.session.post(
-            f"{BASE_URL_HTTP}/auth/register/", json=self.to_dict(), headers=headers
+        headers = kwargs.pop("headers", {})
+        url = f"{BASE_URL_HTTP}{endpoint}"
+        response = self._send(
+            "POST", url, headers={**headers, "X-CSRFToken": csrf_token}, **kwargs
         )
 
+        if response.status_code == 403:
+            csrf_token = self.get_csrf_token()
+            if csrf_token:
+                response = self._send(
+                    "POST", url, headers={**headers, "X-CSRFToken": csrf_token}, **kwargs
+                )
+        return response
+
+    def register(self) -> bool:
+        """Register the bot on the server."""
+        response = self._post_with_csrf("/auth/register/", json=self.profile_dict())
+        if response is None:
+            return False
+
         if response.status_code == 201:
+            self.is_registered = True
             print(f"Bot {self.idx} registered successfully")
             return True
         else:
@@ -102,26 +251,20 @@ class SWECCBot:
 
     def login(self) -> bool:
         """Log in the bot to the server using session-based authentication."""
-        csrf_token = self.get_csrf_token()
-        if not csrf_token:
-            print(f"Could not retrieve CSRF token for bot {self.idx}")
-            return False
-
-        headers = {"X-CSRFToken": csrf_token, "Content-Type": "application/json"}
+        headers = {"Content-Type": "application/json"}
 
         login_data = {"username": self.username, "password": self.password}
 
-        response = self.session.post(
-            f"{BASE_URL_HTTP}/auth/login/", data=json.dumps(login_data), headers=headers
+        response = self._post_with_csrf(
+            "/auth/login/", data=json.dumps(login_data), headers=headers
         )
+        if response is None:
+            return False
 
         if response.status_code == 200:
-            try:
-                print(f"Bot {self.idx} logged in successfully")
-                return True
-            except Exception as e:
-                print(f"Bot {self.idx} login succeeded but encountered an error: {e}")
-                return False
+            self.is_registered = True
+            print(f"Bot {self.idx} logged in successfully")
+            return True
         else:
             print(
                 f"Bot {self.idx} login failed: {response.status_code} - {response.text}"
@@ -146,11 +289,13 @@ class SWECCBot:
             "username": self.username,
         }
 
-        response = requests.put(
+        self.round_trips += 1
+        response = shared_session().put(
             f"{BASE_URL_HTTP}/members/verify-discord/", headers=headers, json=data
         )
 
         if response.status_code == 200:
+            self.is_verified = True
             print(f"Bot {self.idx} verified successfully")
             return True
         else:
@@ -160,29 +305,39 @@ class SWECCBot:
             return False
 
     def ensure_authenticated(self) -> bool:
-        """Ensure the bot is registered, verified and logged in."""
+        """Ensure the bot is registered, verified and logged in.
+
+        Takes the shortest path the known state allows: bots known not to
+        exist register before the first login attempt, bots known to exist
+        never try to register, and verified bots are not verified again.
+        """
 
         if self.is_authenticated:
             return True
 
-        if self.login():
-            self.is_authenticated = True
+        if self.is_registered is False:
+            self.register()
 
-            self.verify()
-            return True
+        logged_in = self.login()
+        if not logged_in and self.is_registered is not True:
+            if self.register():
+                logged_in = self.login()
 
-        self.register()
-        if self.login():
-            self.is_authenticated = True
+        if not logged_in:
+            return False
 
-            self.verify()
-            return True
+        self.is_authenticated = True
+        self.capture_session()
 
-        return False
+        if not self.is_verified:
+            self.verify()
+        return True
 
     def request(self, method: str, endpoint: str, **kwargs) -> requests.Response:
         """Make an authenticated request to the server."""
-        if not self.ensure_authenticated():
+        with section("ensure_authenticated"):
+            authenticated = self.ensure_authenticated()
+        if not authenticated:
             raise ValueError(f"Bot {self.idx} is not authenticated")
 
         url = f"{BASE_URL_HTTP}{endpoint}"
@@ -192,7 +347,7 @@ class SWECCBot:
 def check_connection() -> bool:
     """Check connection to the server."""
     try:
-        response = requests.get(f"{BASE_URL_HTTP}/health")
+        response = shared_session().get(f"{BASE_URL_HTTP}/health")
         if response.status_code == 200:
             print("Connected to the server")
             return True
@@ -0,0 +1,100 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+from .bot import SWECCBot
+
+BOTS_DB = "bots.db"
+
+
+class BotStore:
+    """SQLite-backed bot store indexed by idx.
+
+    Each write commits on its own, so bots are persisted one by one as they
+    finish provisioning and a crash loses at most the bot in flight. Reads
+    are lazy: ids can be listed without building bots, and a SWECCBot (with
+    its requests.Session) is only created when a bot is actually fetched.
+    """
+
+    def __init__(self, filename: str = BOTS_DB):
+        self.filename = filename
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(filename, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS bots (idx INTEGER PRIMARY KEY, data TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM bots").fetchone()[0]
+
+    def __contains__(self, idx: int) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM bots WHERE idx = ?", (idx,)
+            ).fetchone()
+        return row is not None
+
+    def put(self, bot: SWECCBot) -> None:
+        self.put_many([bot])
+
+    def put_many(self, bots: Iterable[SWECCBot]) -> None:
+        rows = [(bot.idx, json.dumps(bot.to_dict())) for bot in bots]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO bots (idx, data) VALUES (?, ?)", rows
+            )
+            self._conn.commit()
+
+    def get(self, idx: int) -> Optional[SWECCBot]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM bots WHERE idx = ?", (idx,)
+            ).fetchone()
+        return SWECCBot.from_dict(json.loads(row[0])) if row else None
+
+    def ids(self, sessions_first: bool = False) -> List[int]:
+        """All bot ids, optionally with bots holding a saved session first."""
+        order = "idx"
+        if sessions_first:
+            order = "json_extract(data, '$.sessionid') IS NULL, idx"
+        with self._lock:
+            rows = self._conn.execute(f"SELECT idx FROM bots ORDER BY {order}")
+            return [row[0] for row in rows]
+
+    def iter_bots(self, ids: Optional[Iterable[int]] = None) -> Iterator[SWECCBot]:
+        """Yield bots one at a time instead of loading the whole store."""
+        for idx in self.ids() if ids is None else ids:
+            bot = self.get(idx)
+            if bot:
+                yield bot
+
+    def import_json(self, filename: str) -> int:
+        """Import a legacy bots.json file written by the old save_bots."""
+        with open(filename, "r") as f:
+            data = json.load(f)
+        rows = [(bot_data["idx"], json.dumps(bot_data)) for bot_data in data]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO bots (idx, data) VALUES (?, ?)", rows
+            )
+            self._conn.commit()
+        return len(rows)
+
+
+def open_store(filename: str = BOTS_DB, legacy_file: str = "bots.json") -> BotStore:
+    """Open the bot store, importing a legacy bots.json the first time."""
+    store = BotStore(filename)
+    if len(store) == 0 and Path(legacy_file).exists():
+        count = store.import_json(legacy_file)
+        print(f"Imported {count} bots from {legacy_file} into {filename}")
+    return store
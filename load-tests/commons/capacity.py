@@ -0,0 +1,297 @@
+"""
+Capacity search: find how much load a scenario sustains before it breaks.
+
+python -m commons.capacity singular_member_load_test.py --host http://localhost:8000 \\
+    --p99-ms 500 --error-rate 0.01
+
+Runs the locustfile in-process on a local Locust runner. Starting at
+--start users, each step sets the user count, waits for the spawn and
+--settle seconds, then measures --sample-seconds windows until the last
+--steady-samples of them agree on RPS within --tolerance (or --max-step
+seconds pass). A step passes while the aggregate p99 and error rate stay
+within their thresholds. The user count grows by --factor until a step
+fails, then bisects between the last pass and the first fail down to
+--resolution. The curve of every step and the max sustainable RPS per
+endpoint are printed and appended to SWECC_CAPACITY_FILE.
+
+The scenario's own hooks (history, timeline, SLOs...) see one long run.
+A LoadTestShape in the locustfile is ignored.
+"""
+
+import argparse
+import dataclasses
+import json
+import math
+import os
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from .run_hooks import SYNTHETIC_NAMES
+from .slo import TOTAL, Snapshot, percentile, snapshot, window_delta
+
+CAPACITY_FILE = os.getenv("SWECC_CAPACITY_FILE", "capacity-curve.jsonl")
+
+
+@dataclasses.dataclass
+class Step:
+    users: int
+    seconds: float
+    steady: bool
+    # entry key -> {"rps", "p50_ms", "p95_ms", "p99_ms", "error_rate", "requests"}
+    endpoints: Dict[str, Dict[str, float]]
+    passed: bool = False
+
+    @property
+    def total(self) -> Dict[str, float]:
+        return self.endpoints.get(TOTAL, {})
+
+
+def step_metrics(window: Snapshot, seconds: float) -> Dict[str, float]:
+    return {
+        "requests": window.requests,
+        "rps": round(window.requests / seconds, 2) if seconds else 0.0,
+        "p50_ms": percentile(window.response_times, 50),
+        "p95_ms": percentile(window.response_times, 95),
+        "p99_ms": percentile(window.response_times, 99),
+        "error_rate": (
+            round(window.failures / window.requests, 4) if window.requests else 0.0
+        ),
+    }
+
+
+class CapacitySearch:
+    def __init__(self, environment, args):
+        self.environment = environment
+        self.args = args
+        self.steps: List[Step] = []
+
+    @property
+    def stopped(self) -> bool:
+        """Whether the run was stopped under the search, e.g. by an SLO abort."""
+        from locust.runners import STATE_STOPPED, STATE_STOPPING
+
+        return self.environment.runner.state in (STATE_STOPPING, STATE_STOPPED)
+
+    def wait_for_users(self, users: int) -> None:
+        import gevent
+
+        deadline = time.monotonic() + users / self.args.spawn_rate + 30
+        while self.environment.runner.user_count != users and not self.stopped:
+            if time.monotonic() > deadline:
+                print(f"Only {self.environment.runner.user_count} of {users} users started")
+                return
+            gevent.sleep(0.2)
+
+    def run_step(self, users: int) -> Step:
+        import gevent
+
+        args = self.args
+        print(f"Step: {users} users")
+        self.environment.runner.start(users, args.spawn_rate)
+        self.wait_for_users(users)
+        gevent.sleep(args.settle)
+
+        started = time.monotonic()
+        # (monotonic time, snapshot) at the edges of the last windows
+        edges = deque([(started, snapshot(self.environment.stats, args.ignore))])
+        steady = False
+        while True:
+            gevent.sleep(args.sample_seconds)
+            edges.append((time.monotonic(), snapshot(self.environment.stats, args.ignore)))
+            if len(edges) > args.steady_samples + 1:
+                edges.popleft()
+            rates = [
+                window_delta(b[1][TOTAL], a[1][TOTAL]).requests / (b[0] - a[0])
+                for a, b in zip(edges, list(edges)[1:])
+            ]
+            if len(rates) == args.steady_samples and rates[0]:
+                mean = sum(rates) / len(rates)
+                steady = (max(rates) - min(rates)) <= args.tolerance * mean
+            if steady or self.stopped or time.monotonic() - started >= args.max_step:
+                break
+
+        (start_time, before), (end_time, after) = edges[0], edges[-1]
+        seconds = end_time - start_time
+        step = Step(
+            users=users,
+            seconds=round(time.monotonic() - started, 1),
+            steady=steady,
+            endpoints={
+                key: step_metrics(window_delta(after[key], before.get(key)), seconds)
+                for key in after
+            },
+        )
+        total = step.total
+        step.passed = (
+            not self.stopped
+            and total.get("requests", 0) > 0
+            and total["p99_ms"] <= args.p99_ms
+            and total["error_rate"] <= args.error_rate
+        )
+        self.steps.append(step)
+        print(
+            f"  {total.get('rps', 0)} RPS, p99 {total.get('p99_ms', 0):g}ms, "
+            f"errors {total.get('error_rate', 0):.2%}"
+            f"{'' if steady else ' (not steady)'}: {'pass' if step.passed else 'FAIL'}"
+        )
+        return step
+
+    def search(self) -> Optional[Step]:
+        """The highest passing step, None if even the first one fails."""
+        args = self.args
+        passed: Optional[Step] = None
+        failed: Optional[Step] = None
+
+        users = args.start
+        while True:
+            step = self.run_step(users)
+            if self.stopped:
+                print("The run was stopped, ending the search")
+                return passed
+            if not step.passed:
+                failed = step
+                break
+            passed = step
+            if users >= args.max_users:
+                print(f"Passed at --max-users {args.max_users}, the knee is beyond it")
+                return passed
+            users = min(max(users + 1, math.ceil(users * args.factor)), args.max_users)
+
+        if passed is None:
+            print(f"Failed at --start {args.start} users, the knee is below it")
+            return None
+
+        while failed.users - passed.users > max(1, args.resolution * passed.users):
+            step = self.run_step((passed.users + failed.users) // 2)
+            if self.stopped:
+                print("The run was stopped, ending the search")
+                break
+            if step.passed:
+                passed = step
+            else:
+                failed = step
+        return passed
+
+    def result(self, knee: Optional[Step]) -> dict:
+        args = self.args
+        return {
+            "locustfile": args.locustfile,
+            "host": self.environment.host,
+            "recorded_at": time.time(),
+            "thresholds": {"p99_ms": args.p99_ms, "error_rate": args.error_rate},
+            "knee_users": knee.users if knee else None,
+            "max_rps": knee.total["rps"] if knee else None,
+            "endpoint_max_rps": {
+                key: metrics["rps"]
+                for key, metrics in (knee.endpoints if knee else {}).items()
+                if key != TOTAL
+            },
+            "curve": [
+                dataclasses.asdict(step)
+                for step in sorted(self.steps, key=lambda s: s.users)
+            ],
+        }
+
+
+def print_curve(result: dict) -> None:
+    print()
+    print(
+        f"{'users':>6} {'rps':>9} {'p50':>7} {'p95':>7} {'p99':>7} "
+        f"{'errors':>7}  result"
+    )
+    for step in result["curve"]:
+        total = step["endpoints"].get(TOTAL, {})
+        print(
+            f"{step['users']:>6} {total.get('rps', 0):>9.1f} "
+            f"{total.get('p50_ms', 0):>7.0f} {total.get('p95_ms', 0):>7.0f} "
+            f"{total.get('p99_ms', 0):>7.0f} {total.get('error_rate', 0):>7.2%}  "
+            f"{'pass' if step['passed'] else 'FAIL'}"
+            f"{'' if step['steady'] else ' (not steady)'}"
+        )
+    print()
+    if result["knee_users"] is None:
+        print("No step passed")
+        return
+    print(
+        f"Max sustainable: {result['max_rps']} RPS at {result['knee_users']} users "
+        f"(p99 <= {result['thresholds']['p99_ms']:g}ms, "
+        f"errors <= {result['thresholds']['error_rate']:.2%})"
+    )
+    for key, rps in sorted(result["endpoint_max_rps"].items()):
+        print(f"  {key:<60} {rps:>9.1f} RPS")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Find the load a scenario sustains within latency and error limits"
+    )
+    parser.add_argument("locustfile", type=str)
+    parser.add_argument("--host", type=str, default=os.getenv("SWECC_URL"))
+    parser.add_argument("--p99-ms", type=float, default=1000.0)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("--start", type=int, default=10, help="Users in the first step")
+    parser.add_argument("--factor", type=float, default=2.0, help="Growth per step")
+    parser.add_argument("--max-users", type=int, default=2000)
+    parser.add_argument(
+        "--resolution",
+        type=float,
+        default=0.1,
+        help="Stop bisecting within this fraction of the user count",
+    )
+    parser.add_argument("--spawn-rate", type=float, default=20.0)
+    parser.add_argument(
+        "--settle", type=float, default=10.0, help="Seconds to wait after spawning"
+    )
+    parser.add_argument("--sample-seconds", type=float, default=5.0)
+    parser.add_argument("--steady-samples", type=int, default=3)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="Max spread of RPS between samples, as a fraction of the mean",
+    )
+    parser.add_argument(
+        "--max-step", type=float, default=120.0, help="Give up on steady state after"
+    )
+    parser.add_argument(
+        "--ignore",
+        action="append",
+        default=None,
+        help=f"Stats entries that are not requests (default: {SYNTHETIC_NAMES})",
+    )
+    args = parser.parse_args()
+    args.ignore = set(args.ignore or SYNTHETIC_NAMES)
+
+    import gevent
+    from locust import events
+    from locust.env import Environment
+    from locust.util.load_locustfile import load_locustfile
+
+    user_classes, _ = load_locustfile(args.locustfile)
+    if not user_classes:
+        parser.error(f"No user classes in {args.locustfile}")
+    environment = Environment(
+        user_classes=list(user_classes.values()),
+        host=args.host,
+        events=events,
+        locustfile=args.locustfile,
+    )
+    environment.create_local_runner()
+
+    search = CapacitySearch(environment, args)
+    try:
+        knee = search.search()
+    finally:
+        environment.runner.quit()
+        gevent.sleep(0)
+
+    result = search.result(knee)
+    with open(CAPACITY_FILE, "a") as f:
+        f.write(json.dumps(result) + "\n")
+    print_curve(result)
+    print(f"Saved to {CAPACITY_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import json
+import os
+import resource
+import time
+from typing import Optional, Type
+
+from locust import FastHttpUser, HttpUser, events
+from locust.contrib.fasthttp import FastHttpSession
+from locust.runners import MasterRunner
+
+# python-requests (HttpUser) or geventhttpclient (FastHttpUser)
+CLIENTS = {"requests": HttpUser, "fast": FastHttpUser}
+DEFAULT_CLIENT = os.getenv("SWECC_CLIENT", "requests")
+THROUGHPUT_FILE = os.getenv("SWECC_THROUGHPUT_FILE", "client-throughput.jsonl")
+
+
+def user_base(client: Optional[str] = None) -> Type[HttpUser]:
+    """The Locust user class to build a scenario on, picked by SWECC_CLIENT.
+
+    Both clients take the same request arguments and support
+    catch_response, so scenarios run unchanged on either and report the
+    same stats names.
+    """
+    client = client or DEFAULT_CLIENT
+    if client not in CLIENTS:
+        raise ValueError(f"Unknown client {client!r}, expected one of {list(CLIENTS)}")
+    return CLIENTS[client]
+
+
+def set_default_headers(user, headers: dict) -> None:
+    """Send `headers` with every request of the user, on either client."""
+    if isinstance(user.client, FastHttpSession):
+        user.client.client.default_headers.update(headers)
+    else:
+        user.client.headers.update(headers)
+
+
+def _cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+class ThroughputRecorder:
+    """Measures requests per second and per busy core of this load process.
+
+    Requests are counted from events.request, since workers reset their
+    stats whenever they report to the master. CPU time is this process's
+    user + system time, so rps_per_core is what one fully loaded core of
+    this client can generate against the target.
+    """
+
+    def __init__(self, scenario: str, ignore_names=(), tags: Optional[dict] = None):
+        self.scenario = scenario
+        self.ignore_names = set(ignore_names)
+        self.tags = tags or {}
+        self.requests = 0
+        self.failures = 0
+        self.started: Optional[float] = None
+        self.cpu_started = 0.0
+
+    def on_request(self, name=None, exception=None, **kwargs) -> None:
+        if name in self.ignore_names:
+            return
+        self.requests += 1
+        if exception:
+            self.failures += 1
+
+    def start(self) -> None:
+        self.requests = 0
+        self.failures = 0
+        self.started = time.monotonic()
+        self.cpu_started = _cpu_seconds()
+
+    def record(self, environment) -> Optional[dict]:
+        if self.started is None or isinstance(environment.runner, MasterRunner):
+            return None
+
+        elapsed = time.monotonic() - self.started
+        cpu = _cpu_seconds() - self.cpu_started
+        result = {
+            "scenario": self.scenario,
+            "client": DEFAULT_CLIENT,
+            "host": environment.host,
+            "requests": self.requests,
+            "failures": self.failures,
+            "seconds": round(elapsed, 2),
+            "cpu_seconds": round(cpu, 2),
+            "rps": round(self.requests / elapsed, 1) if elapsed else 0.0,
+            "rps_per_core": round(self.requests / cpu, 1) if cpu else 0.0,
+            "recorded_at": time.time(),
+            "tags": self.tags,
+        }
+        with open(THROUGHPUT_FILE, "a") as f:
+            f.write(json.dumps(result) + "\n")
+        print(
+            f"{self.scenario} [{DEFAULT_CLIENT}]: {result['rps']} RPS, "
+            f"{result['rps_per_core']} RPS per core ({THROUGHPUT_FILE})"
+        )
+        return result
+
+
+def record_throughput(
+    scenario: str, ignore_names=(), tags: Optional[dict] = None
+) -> ThroughputRecorder:
+    """Hook a ThroughputRecorder into Locust's events for this scenario.
+
+    `ignore_names` are extra events.request entries the scenario fires on
+    top of its HTTP requests, which should not count as requests sent.
+    `tags` (such as the key distribution) are saved with each result.
+    """
+    recorder = ThroughputRecorder(scenario, ignore_names, tags)
+    events.request.add_listener(recorder.on_request)
+    events.test_start.add_listener(lambda **kwargs: recorder.start())
+    events.test_stop.add_listener(
+        lambda environment, **kwargs: recorder.record(environment)
+    )
+    return recorder
+
+
+def summarize(filename: str = THROUGHPUT_FILE) -> None:
+    """Print the latest RPS per core of each client, per scenario, host and tags."""
+    latest = {}
+    with open(filename, "r") as f:
+        for line in f:
+            result = json.loads(line)
+            tags = " ".join(f"{k}={v}" for k, v in result.get("tags", {}).items())
+            key = (result["scenario"], result["host"], tags, result["client"])
+            latest[key] = result
+
+    print(f"{'scenario':<24} {'host':<28} {'client':<9} {'rps':>8} {'rps/core':>9}")
+    for (scenario, host, tags, client), result in sorted(latest.items()):
+        print(
+            f"{scenario:<24} {host:<28} {client:<9} "
+            f"{result['rps']:>8} {result['rps_per_core']:>9}  {tags}"
+        )
+
+
+if __name__ == "__main__":
+    summarize()
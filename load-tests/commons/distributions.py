@@ -0,0 +1,194 @@
+"""
+Parameter distributions for workload files.
+
+A parameter is either a plain value or a spec such as
+{"dist": "choice", "values": ["bot", "test"]},
+{"dist": "uniform", "min": 1, "max": 100} or
+{"dist": "zipf", "n": 1000, "s": 1.1}.
+"""
+
+import bisect
+import itertools
+import math
+import random
+from typing import Any, Dict, List, Optional
+
+
+class Distribution:
+    def sample(self, rng: random.Random) -> Any:
+        raise NotImplementedError
+
+    @property
+    def label(self) -> str:
+        """Short description used to tag stats, e.g. "zipf n=1000 s=1.2"."""
+        raise NotImplementedError
+
+
+class Constant(Distribution):
+    def __init__(self, value: Any):
+        self.value = value
+
+    def sample(self, rng: random.Random) -> Any:
+        return self.value
+
+    @property
+    def label(self) -> str:
+        return str(self.value)
+
+
+class Choice(Distribution):
+    """Pick one of `values`, optionally weighted."""
+
+    def __init__(self, values: List[Any], weights: Optional[List[float]] = None):
+        if not values:
+            raise ValueError("choice needs at least one value")
+        if weights is not None and len(weights) != len(values):
+            raise ValueError("choice weights must match values")
+        self.values = values
+        self.weights = weights
+
+    def sample(self, rng: random.Random) -> Any:
+        if self.weights is None:
+            return rng.choice(self.values)
+        return rng.choices(self.values, weights=self.weights)[0]
+
+    @property
+    def label(self) -> str:
+        return f"choice n={len(self.values)}"
+
+
+class Uniform(Distribution):
+    """Integer uniformly drawn from [min, max], like random.randint."""
+
+    def __init__(self, min: int, max: int):
+        if min > max:
+            raise ValueError(f"uniform min {min} is above max {max}")
+        self.min = min
+        self.max = max
+
+    def sample(self, rng: random.Random) -> int:
+        return rng.randint(self.min, self.max)
+
+    @property
+    def label(self) -> str:
+        return f"uniform n={self.max - self.min + 1}"
+
+
+class Zipf(Distribution):
+    """Rank k of n drawn with probability proportional to 1 / k**s.
+
+    Draws `values[k - 1]` when values are given, otherwise an integer
+    offset by `start` (so ranks 1..n map to ids start..start + n - 1).
+    """
+
+    def __init__(
+        self,
+        n: Optional[int] = None,
+        s: float = 1.0,
+        values: Optional[List[Any]] = None,
+        start: int = 1,
+    ):
+        if values is not None:
+            n = len(values)
+        if not n or n < 1:
+            raise ValueError("zipf needs n >= 1 or a list of values")
+        self.n = n
+        self.s = s
+        self.values = values
+        self.start = start
+        self.cum_weights = list(
+            itertools.accumulate(1 / rank**s for rank in range(1, n + 1))
+        )
+
+    def sample(self, rng: random.Random) -> Any:
+        point = rng.random() * self.cum_weights[-1]
+        index = min(bisect.bisect(self.cum_weights, point), self.n - 1)
+        if self.values is not None:
+            return self.values[index]
+        return self.start + index
+
+    @property
+    def label(self) -> str:
+        return f"zipf n={self.n} s={self.s:g}"
+
+
+class HotSet(Distribution):
+    """Keys start..start + n - 1 where a `hot` fraction gets `share` of draws.
+
+    With hot=0.1 and share=0.9, 10% of the keys receive 90% of the traffic
+    and the rest is spread uniformly over the other 90%.
+    """
+
+    def __init__(
+        self, n: int, hot: float = 0.1, share: float = 0.9, start: int = 1
+    ):
+        if n < 1 or not 0 < hot <= 1 or not 0 <= share <= 1:
+            raise ValueError("hotset needs n >= 1, 0 < hot <= 1 and 0 <= share <= 1")
+        self.n = n
+        self.hot = hot
+        self.share = share
+        self.start = start
+        self.hot_keys = max(1, math.ceil(n * hot))
+
+    def sample(self, rng: random.Random) -> int:
+        if self.hot_keys == self.n or rng.random() < self.share:
+            return self.start + rng.randrange(self.hot_keys)
+        return self.start + self.hot_keys + rng.randrange(self.n - self.hot_keys)
+
+    @property
+    def label(self) -> str:
+        return f"hotset n={self.n} hot={self.hot:g} share={self.share:g}"
+
+
+DISTRIBUTIONS = {
+    "constant": Constant,
+    "choice": Choice,
+    "uniform": Uniform,
+    "zipf": Zipf,
+    "hotset": HotSet,
+}
+KEY_SPACES = ["uniform", "zipf", "hotset"]
+
+
+def make_distribution(spec: Any) -> Distribution:
+    """Build a distribution from a workload spec; plain values are constants."""
+    if isinstance(spec, Distribution):
+        return spec
+    if not isinstance(spec, dict) or "dist" not in spec:
+        return Constant(spec)
+
+    kwargs: Dict[str, Any] = dict(spec)
+    kind = kwargs.pop("dist")
+    if kind not in DISTRIBUTIONS:
+        raise ValueError(
+            f"Unknown distribution {kind!r}, expected one of {list(DISTRIBUTIONS)}"
+        )
+    try:
+        return DISTRIBUTIONS[kind](**kwargs)
+    except TypeError as e:
+        raise ValueError(f"Bad {kind} distribution {spec}: {e}")
+
+
+def key_space(spec: Optional[str], default_n: int, start: int = 1) -> Distribution:
+    """Distribution over ids from `start` given a spec like "zipf:n=1000,s=1.2".
+
+    The kind is uniform, zipf or hotset; options are the constructor
+    arguments, with n defaulting to the scenario's own key-space size.
+    No spec gives the uniform draw the scenarios always used.
+    """
+    kind, _, options = (spec or "uniform").partition(":")
+    if kind not in KEY_SPACES:
+        raise ValueError(f"Unknown key space {kind!r}, expected one of {KEY_SPACES}")
+
+    kwargs: Dict[str, Any] = {"n": default_n}
+    for option in filter(None, options.split(",")):
+        key, _, value = option.partition("=")
+        kwargs[key.strip()] = float(value)
+    n = int(kwargs.pop("n"))
+
+    try:
+        if kind == "uniform":
+            return Uniform(start, start + n - 1)
+        return DISTRIBUTIONS[kind](n=n, start=start, **kwargs)
+    except TypeError as e:
+        raise ValueError(f"Bad key space {spec}: {e}")
@@ -0,0 +1,134 @@
+"""
+Registry of the SWECC requests the load scenarios make.
+
+Each endpoint is a function taking the Locust user plus its parameters and
+making one request through user.client with the same stats name and
+success check as the original scripts. Parameters default to the values
+those scripts picked from; workload files can override them.
+
+Parameters listed as an endpoint's `keys` pick a cache key (such as a
+member id). Their distribution's label is passed to the endpoint as `tag`
+and ends up in the stats name, so runs with different key distributions
+can be told apart.
+"""
+
+import os
+import random
+from typing import Callable, Dict, Tuple
+
+from .distributions import Distribution, key_space, make_distribution
+
+# key space of member ids, e.g. SWECC_MEMBER_KEYS=zipf:n=1000,s=1.1
+MEMBER_KEYS = os.getenv("SWECC_MEMBER_KEYS")
+
+EndpointFn = Callable[..., None]
+
+ENDPOINTS: Dict[str, EndpointFn] = {}
+# parameter name -> default distribution, per endpoint
+DEFAULT_PARAMS: Dict[str, Dict[str, Distribution]] = {}
+ENDPOINT_KEYS: Dict[str, Tuple[str, ...]] = {}
+
+
+def endpoint(name: str, keys: Tuple[str, ...] = (), **default_params):
+    """Register a request function under `name` for workload files."""
+
+    def register(fn: EndpointFn) -> EndpointFn:
+        if name in ENDPOINTS:
+            raise ValueError(f"Endpoint {name} is already registered")
+        ENDPOINTS[name] = fn
+        ENDPOINT_KEYS[name] = keys
+        DEFAULT_PARAMS[name] = {
+            param: make_distribution(spec) for param, spec in default_params.items()
+        }
+        return fn
+
+    return register
+
+
+def call_endpoint(
+    name: str,
+    user,
+    params: Dict[str, Distribution] = None,
+    rng: random.Random = random,
+) -> None:
+    """Make one request, drawing parameters from `params` or the defaults."""
+    distributions = {**DEFAULT_PARAMS[name], **(params or {})}
+    kwargs = {param: dist.sample(rng) for param, dist in distributions.items()}
+    if ENDPOINT_KEYS[name]:
+        kwargs["tag"] = ", ".join(
+            distributions[param].label for param in ENDPOINT_KEYS[name]
+        )
+    ENDPOINTS[name](user, **kwargs)
+
+
+def expect_status(user, response, status: int, action: str) -> None:
+    """Mark a catch_response response, letting the user react to rejections."""
+    if response.status_code == status:
+        response.success()
+        return
+
+    check_session = getattr(user, "check_session", None)
+    if check_session:
+        check_session(response)
+    response.failure(f"Failed to {action}: {response.status_code}")
+
+
+@endpoint("view_directory")
+def view_directory(user) -> None:
+    with user.client.get(
+        "/directory/", name="View Directory", catch_response=True
+    ) as response:
+        expect_status(user, response, 200, "view directory")
+
+
+@endpoint(
+    "search_directory",
+    query={"dist": "choice", "values": ["bot", "test", "user", "admin", "elimelt"]},
+)
+def search_directory(user, query: str) -> None:
+    with user.client.get(
+        f"/directory/search/?q={query}",
+        name=f"Search Directory ({query})",
+        catch_response=True,
+    ) as response:
+        expect_status(user, response, 200, "search directory")
+
+
+@endpoint(
+    "view_attendance_leaderboard",
+    order_by={"dist": "choice", "values": ["attendance", "recent"]},
+)
+def view_attendance_leaderboard(user, order_by: str) -> None:
+    with user.client.get(
+        f"/leaderboard/attendance/?order_by={order_by}",
+        name=f"View Attendance Leaderboard ({order_by})",
+        catch_response=True,
+    ) as response:
+        expect_status(user, response, 200, "view leaderboard")
+
+
+@endpoint("view_profile", keys=("user_id",), user_id=key_space(MEMBER_KEYS, 9))
+def view_profile(user, user_id: int, tag: str) -> None:
+    with user.client.get(
+        f"/directory/{user_id}/",
+        name=f"View User Profile [{tag}]",
+        catch_response=True,
+    ) as response:
+        expect_status(user, response, 200, "view profile")
+
+
+@endpoint(
+    "send_message",
+    channel_id={"dist": "uniform", "min": 1, "max": 10},
+    discord_id=None,
+)
+def send_message(user, channel_id: int, discord_id=None) -> None:
+    """POST an engagement message, as the user's bot unless discord_id is given."""
+    if discord_id is None:
+        discord_id = user.bot.idx
+    data = {"channel_id": channel_id, "discord_id": discord_id}
+
+    with user.client.post(
+        "/engagement/message/", json=data, name="Send Message", catch_response=True
+    ) as response:
+        expect_status(user, response, 202, "send message")
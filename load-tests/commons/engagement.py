@@ -0,0 +1,90 @@
+"""
+The engagement message user the message scenarios build on. It posts to
+/engagement/message/ with the API key, picking the member and channel of
+each message from SWECC_MEMBER_KEYS and SWECC_CHANNEL_KEYS; the scenarios
+add their own tasks.
+"""
+
+import os
+import random
+import time
+from typing import Optional, Tuple
+
+from locust import events
+
+from .clients import user_base
+from .distributions import key_space
+from .profiling import section
+
+# e.g. SWECC_MEMBER_KEYS=zipf:n=1000,s=1.1 or SWECC_CHANNEL_KEYS=hotset:n=50,hot=0.1
+MEMBER_KEYS = key_space(os.getenv("SWECC_MEMBER_KEYS"), 10)
+CHANNEL_KEYS = key_space(os.getenv("SWECC_CHANNEL_KEYS"), 10)
+KEYS_LABEL = f"members {MEMBER_KEYS.label}, channels {CHANNEL_KEYS.label}"
+KEYS_PARAMS = {"member_keys": MEMBER_KEYS.label, "channel_keys": CHANNEL_KEYS.label}
+
+# (discord_id, channel_id)
+Key = Tuple[int, int]
+
+
+class MessageUser(user_base()):
+    abstract = True
+
+    def on_start(self):
+        self.api_key = os.getenv('SWECC_API_KEY')
+        if not self.api_key:
+            raise ValueError("SWECC_API_KEY environment variable not set")
+
+        self.headers = {
+            "Authorization": f"Api-Key {self.api_key}",
+            "Content-Type": "application/json",
+        }
+
+    def next_key(self) -> Key:
+        channel_id = CHANNEL_KEYS.sample(random)
+        user_id = MEMBER_KEYS.sample(random)
+        return user_id, channel_id
+
+    def post_message(self, key: Key) -> Optional[float]:
+        """Send one message; the time its request started if it was accepted."""
+        user_id, channel_id = key
+        data = {
+            "channel_id": channel_id,
+            "discord_id": user_id,
+        }
+
+        start_time = time.time()
+
+        with self.client.post(
+            "/engagement/message/",
+            json=data,
+            headers=self.headers,
+            name=f"/engagement/message/ [{KEYS_LABEL}]",
+            catch_response=True
+        ) as response:
+            duration = time.time() - start_time
+
+            if response.status_code == 202:
+                response.success()
+                with section("extra_event"):
+                    events.request.fire(
+                        request_type="POST",
+                        name="message_success",
+                        response_time=duration * 1000,
+                        response_length=len(response.text),
+                        context={
+                            "channel_id": channel_id,
+                            "user_id": user_id
+                        }
+                    )
+                return start_time
+
+            if response.status_code == 404:
+                response.failure(f"User not found: {user_id}")
+            else:
+                response.failure(f"Unexpected status code: {response.status_code}")
+
+            with section("print"):
+                print(f"Error sending message - Status: {response.status_code}, "
+                      f"Channel: {channel_id}, User: {user_id}, "
+                      f"Response: {response.text}")
+            return None
@@ -0,0 +1,114 @@
+import math
+from typing import Dict, Iterable, Optional
+
+# latencies are recorded in microseconds, up to an hour
+DEFAULT_HIGHEST = 3_600_000_000
+DEFAULT_SIGNIFICANT_DIGITS = 3
+REPORT_PERCENTILES = (50, 90, 99, 99.9, 99.99)
+
+
+class Histogram:
+    """HDR-style latency histogram with a fixed relative precision.
+
+    Values are bucketed log-linearly like HdrHistogram: each power-of-two
+    range is split into the same number of linear sub-buckets, so every
+    recorded value is kept to `significant_digits` digits from 1us up to
+    `highest`, in constant memory and O(1) per record. Unlike Locust's own
+    response time buckets this keeps the tail precise, which is what
+    p99/p999 need. Histograms from several workers can be merged.
+    """
+
+    def __init__(
+        self,
+        highest: int = DEFAULT_HIGHEST,
+        significant_digits: int = DEFAULT_SIGNIFICANT_DIGITS,
+    ):
+        self.highest = highest
+        self.significant_digits = significant_digits
+        largest_single_unit = 2 * 10**significant_digits
+        self.sub_bucket_bits = math.ceil(math.log2(largest_single_unit))
+        self.sub_bucket_count = 1 << self.sub_bucket_bits
+        self.sub_bucket_half_bits = self.sub_bucket_bits - 1
+        self.sub_bucket_half = self.sub_bucket_count // 2
+        self.sub_bucket_mask = self.sub_bucket_count - 1
+
+        bucket_count = 1
+        smallest_untrackable = self.sub_bucket_count
+        while smallest_untrackable <= highest:
+            smallest_untrackable <<= 1
+            bucket_count += 1
+        self.counts = [0] * ((bucket_count + 1) * self.sub_bucket_half)
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max = 0
+
+    def _index(self, value: int) -> int:
+        bucket = (value | self.sub_bucket_mask).bit_length() - self.sub_bucket_bits
+        sub_bucket = value >> bucket
+        base = (bucket + 1) << self.sub_bucket_half_bits
+        return base + sub_bucket - self.sub_bucket_half
+
+    def _value_at(self, index: int) -> int:
+        """Highest value that falls into the bucket at `index`."""
+        bucket = (index >> self.sub_bucket_half_bits) - 1
+        sub_bucket = (index & (self.sub_bucket_half - 1)) + self.sub_bucket_half
+        if bucket < 0:
+            sub_bucket -= self.sub_bucket_half
+            bucket = 0
+        return (sub_bucket << bucket) + (1 << bucket) - 1
+
+    def record(self, value: int, count: int = 1) -> None:
+        value = min(max(int(value), 0), self.highest)
+        self.counts[self._index(value)] += count
+        self.total += count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, percentile: float) -> int:
+        if not self.total:
+            return 0
+        target = max(1, math.ceil(percentile / 100 * self.total))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self._value_at(index), self.max)
+        return self.max
+
+    def percentiles(
+        self, percentiles: Iterable[float] = REPORT_PERCENTILES
+    ) -> Dict[str, int]:
+        return {f"p{p:g}": self.percentile(p) for p in percentiles}
+
+    def merge(self, other: "Histogram") -> None:
+        if len(other.counts) != len(self.counts):
+            raise ValueError("Cannot merge histograms with different ranges")
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def to_dict(self) -> Dict:
+        """Sparse form for saving; the percentiles are included for reading."""
+        return {
+            "highest": self.highest,
+            "significant_digits": self.significant_digits,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+            "percentiles": self.percentiles(),
+            "counts": {str(i): count for i, count in enumerate(self.counts) if count},
+        }
+
+    @staticmethod
+    def from_dict(d: Dict) -> "Histogram":
+        histogram = Histogram(d["highest"], d["significant_digits"])
+        for index, count in d["counts"].items():
+            histogram.counts[int(index)] = count
+        histogram.total = d["total"]
+        histogram.min = d["min"]
+        histogram.max = d["max"]
+        return histogram
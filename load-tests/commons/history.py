@@ -0,0 +1,554 @@
+"""
+Run history for the load scenarios, kept in a local SQLite database.
+
+Each script calls record_history(), which saves every run (on the master
+of a distributed run) with its per-endpoint latency distribution, request
+and failure counts, requests per second, git revision and parameters.
+Runs are then compared from load-tests/:
+
+python -m commons.history list
+python -m commons.history compare 12 15     # run 15 against run 12
+python -m commons.history baseline 12       # make 12 its scenario's baseline
+python -m commons.history compare 15        # against the baseline, or the previous run
+
+compare bootstraps confidence intervals for the change in p50/p95/p99 and
+throughput, and flags changes whose interval excludes zero and which exceed
+the threshold. It exits with 1 when a regression is found, so it can gate CI.
+"""
+
+import argparse
+import json
+import math
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from statistics import NormalDist
+from typing import Dict, List, Optional
+
+HISTORY_DB = os.getenv("SWECC_HISTORY_DB", "load-history.db")
+PERCENTILES = (50, 95, 99)
+BOOTSTRAP_ITERATIONS = 2000
+CONFIDENCE = 0.95
+# relative change below which a significant difference is not flagged
+THRESHOLD = 0.05
+# env vars describing a run; secrets are left out
+PARAM_PREFIX = "SWECC_"
+SECRET_PARAMS = {"SWECC_API_KEY"}
+
+
+def git_revision() -> Optional[str]:
+    """Short SHA of the checkout, with -dirty when it has local changes."""
+    try:
+        result = subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout.strip() or None
+
+
+class RunHistory:
+    """SQLite store of runs and their per-endpoint results."""
+
+    def __init__(self, filename: str = HISTORY_DB):
+        self.filename = filename
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(filename, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scenario TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                finished_at REAL NOT NULL,
+                git_sha TEXT,
+                host TEXT,
+                params TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS endpoints (
+                run_id INTEGER NOT NULL REFERENCES runs(id),
+                method TEXT NOT NULL,
+                name TEXT NOT NULL,
+                requests INTEGER NOT NULL,
+                failures INTEGER NOT NULL,
+                rps REAL NOT NULL,
+                response_times TEXT NOT NULL,
+                per_second TEXT NOT NULL,
+                PRIMARY KEY (run_id, method, name)
+            );
+            CREATE TABLE IF NOT EXISTS baselines (
+                scenario TEXT PRIMARY KEY,
+                run_id INTEGER NOT NULL REFERENCES runs(id)
+            );
+            """
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def add_run(self, run: Dict, endpoints: List[Dict]) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO runs (scenario, started_at, finished_at, git_sha, host, params) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    run["scenario"],
+                    run["started_at"],
+                    run["finished_at"],
+                    run["git_sha"],
+                    run["host"],
+                    json.dumps(run["params"]),
+                ),
+            )
+            run_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT INTO endpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        run_id,
+                        e["method"],
+                        e["name"],
+                        e["requests"],
+                        e["failures"],
+                        e["rps"],
+                        json.dumps(e["response_times"]),
+                        json.dumps(e["per_second"]),
+                    )
+                    for e in endpoints
+                ],
+            )
+            self._conn.commit()
+        return run_id
+
+    def runs(self, scenario: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        query = "SELECT * FROM runs"
+        args: tuple = ()
+        if scenario:
+            query += " WHERE scenario = ?"
+            args = (scenario,)
+        with self._lock:
+            rows = self._conn.execute(
+                query + " ORDER BY id DESC LIMIT ?", args + (limit,)
+            ).fetchall()
+        return [self._run(row) for row in rows]
+
+    def get(self, run_id: int) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM runs WHERE id = ?", (run_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            endpoints = self._conn.execute(
+                "SELECT * FROM endpoints WHERE run_id = ? ORDER BY name, method",
+                (run_id,),
+            ).fetchall()
+        run = self._run(row)
+        run["endpoints"] = {
+            f"{e['method']} {e['name']}": {
+                "requests": e["requests"],
+                "failures": e["failures"],
+                "rps": e["rps"],
+                "response_times": {
+                    int(ms): count for ms, count in json.loads(e["response_times"]).items()
+                },
+                "per_second": {
+                    int(t): count for t, count in json.loads(e["per_second"]).items()
+                },
+            }
+            for e in endpoints
+        }
+        return run
+
+    def set_baseline(self, run_id: int) -> str:
+        run = self.get(run_id)
+        if run is None:
+            raise ValueError(f"No run {run_id}")
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO baselines (scenario, run_id) VALUES (?, ?)",
+                (run["scenario"], run_id),
+            )
+            self._conn.commit()
+        return run["scenario"]
+
+    def reference_for(self, run_id: int) -> Optional[int]:
+        """The baseline of the run's scenario, else the scenario's previous run."""
+        run = self.get(run_id)
+        if run is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT run_id FROM baselines WHERE scenario = ?", (run["scenario"],)
+            ).fetchone()
+            if row is not None and row["run_id"] != run_id:
+                return row["run_id"]
+            row = self._conn.execute(
+                "SELECT id FROM runs WHERE scenario = ? AND id < ? ORDER BY id DESC LIMIT 1",
+                (run["scenario"], run_id),
+            ).fetchone()
+        return row["id"] if row is not None else None
+
+    @staticmethod
+    def _run(row: sqlite3.Row) -> Dict:
+        run = dict(row)
+        run["params"] = json.loads(run["params"])
+        return run
+
+
+def run_params(environment, params: Optional[Dict] = None) -> Dict:
+    """The locust options and SWECC_* settings a run was made with."""
+    options = environment.parsed_options
+    result = {
+        "locustfile": getattr(options, "locustfile", None),
+        "users": getattr(options, "num_users", None),
+        "spawn_rate": getattr(options, "spawn_rate", None),
+        "run_time": getattr(options, "run_time", None),
+        "workers": getattr(environment.runner, "worker_count", None),
+    }
+    result.update(
+        {
+            key: value
+            for key, value in sorted(os.environ.items())
+            if key.startswith(PARAM_PREFIX) and key not in SECRET_PARAMS
+        }
+    )
+    result.update(params or {})
+    return result
+
+
+def endpoint_results(environment, ignore_names=()) -> List[Dict]:
+    ignore_names = set(ignore_names)
+    results = []
+    for entry in environment.stats.entries.values():
+        if entry.name in ignore_names or not entry.num_requests:
+            continue
+        results.append(
+            {
+                "method": entry.method or "",
+                "name": entry.name,
+                "requests": entry.num_requests,
+                "failures": entry.num_failures,
+                "rps": round(entry.total_rps, 2),
+                "response_times": dict(entry.response_times),
+                "per_second": dict(entry.num_reqs_per_sec),
+            }
+        )
+    return results
+
+
+def record_history(scenario: str, ignore_names=(), params: Optional[Dict] = None):
+    """Save every run of the scenario to the history database.
+
+    Runs are saved by the master, whose stats are merged from its workers,
+    or by a standalone process; `ignore_names` are extra events.request
+    entries that are not requests, and `params` (such as key distributions)
+    are saved with the run.
+    """
+    from locust import events
+    from locust.runners import WorkerRunner
+
+    started = {}
+
+    @events.test_start.add_listener
+    def on_test_start(environment, **kwargs):
+        started["at"] = time.time()
+
+    @events.test_stop.add_listener
+    def on_test_stop(environment, **kwargs):
+        if isinstance(environment.runner, WorkerRunner) or "at" not in started:
+            return
+        endpoints = endpoint_results(environment, ignore_names)
+        if not endpoints:
+            return
+        run = {
+            "scenario": scenario,
+            "started_at": started.pop("at"),
+            "finished_at": time.time(),
+            "git_sha": git_revision(),
+            "host": environment.host,
+            "params": run_params(environment, params),
+        }
+        history = RunHistory()
+        try:
+            run_id = history.add_run(run, endpoints)
+        finally:
+            history.close()
+        print(
+            f"Saved run #{run_id} of {scenario} to {HISTORY_DB} "
+            f"(python -m commons.history compare {run_id})"
+        )
+
+
+# comparison
+
+
+def _bootstrap_percentiles(response_times: Dict[int, int], iterations: int, rng):
+    """Bootstrap distribution of PERCENTILES, one row per resample.
+
+    Resampling n latencies from the run's histogram is a multinomial draw
+    over its buckets, so no individual samples are needed.
+    """
+    import numpy as np
+
+    values = np.array(sorted(response_times), dtype=float)
+    counts = np.array([response_times[v] for v in sorted(response_times)], dtype=float)
+    n = int(counts.sum())
+    resampled = rng.multinomial(n, counts / n, size=iterations).cumsum(axis=1)
+    result = np.empty((iterations, len(PERCENTILES)))
+    for column, p in enumerate(PERCENTILES):
+        rank = np.maximum(1, np.ceil(p / 100 * n))
+        index = (resampled < rank).sum(axis=1)
+        result[:, column] = values[np.minimum(index, len(values) - 1)]
+    return result
+
+
+def _steady_seconds(per_second: Dict[int, int]):
+    """Requests per second, without the partial first and last seconds."""
+    import numpy as np
+
+    if not per_second:
+        return np.zeros(1)
+    first, last = min(per_second), max(per_second)
+    seconds = [per_second.get(t, 0) for t in range(first, last + 1)]
+    if len(seconds) > 2:
+        seconds = seconds[1:-1]
+    return np.array(seconds, dtype=float)
+
+
+def _bootstrap_mean(samples, iterations: int, rng):
+    return rng.choice(samples, size=(iterations, len(samples))).mean(axis=1)
+
+
+def _verdict(before: float, low: float, high: float, worse_if_higher: bool, threshold: float):
+    """"regression", "improvement" or "" for a change with interval [low, high]."""
+    if before == 0 or (low <= 0 <= high):
+        return ""
+    change = (low if low > 0 else high) / before
+    if abs(change) < threshold:
+        return ""
+    if (change > 0) == worse_if_higher:
+        return "REGRESSION"
+    return "improvement"
+
+
+def _merge_endpoints(endpoints: Dict[str, Dict]) -> Dict:
+    total = {"requests": 0, "failures": 0, "response_times": {}, "per_second": {}}
+    for endpoint in endpoints.values():
+        total["requests"] += endpoint["requests"]
+        total["failures"] += endpoint["failures"]
+        for key in ("response_times", "per_second"):
+            for bucket, count in endpoint[key].items():
+                total[key][bucket] = total[key].get(bucket, 0) + count
+    return total
+
+
+def compare(
+    before: Dict,
+    after: Dict,
+    iterations: int = BOOTSTRAP_ITERATIONS,
+    confidence: float = CONFIDENCE,
+    threshold: float = THRESHOLD,
+) -> List[Dict]:
+    """Changes from `before` to `after` per endpoint and in aggregate."""
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    tail = (1 - confidence) / 2 * 100
+    endpoints = dict(
+        (key, (before["endpoints"][key], after["endpoints"][key]))
+        for key in sorted(set(before["endpoints"]) & set(after["endpoints"]))
+    )
+    endpoints["Aggregated"] = (
+        _merge_endpoints(before["endpoints"]),
+        _merge_endpoints(after["endpoints"]),
+    )
+
+    changes = []
+    for key, (a, b) in endpoints.items():
+        boot_a = _bootstrap_percentiles(a["response_times"], iterations, rng)
+        boot_b = _bootstrap_percentiles(b["response_times"], iterations, rng)
+        for column, p in enumerate(PERCENTILES):
+            point_a = float(np.median(boot_a[:, column]))
+            point_b = float(np.median(boot_b[:, column]))
+            diff = boot_b[:, column] - boot_a[:, column]
+            low, high = np.percentile(diff, [tail, 100 - tail])
+            changes.append(
+                {
+                    "endpoint": key,
+                    "metric": f"p{p} ms",
+                    "before": point_a,
+                    "after": point_b,
+                    "low": float(low),
+                    "high": float(high),
+                    "verdict": _verdict(point_a, low, high, True, threshold),
+                }
+            )
+
+        rps_a = _steady_seconds(a["per_second"])
+        rps_b = _steady_seconds(b["per_second"])
+        diff = _bootstrap_mean(rps_b, iterations, rng) - _bootstrap_mean(
+            rps_a, iterations, rng
+        )
+        low, high = np.percentile(diff, [tail, 100 - tail])
+        changes.append(
+            {
+                "endpoint": key,
+                "metric": "rps",
+                "before": float(rps_a.mean()),
+                "after": float(rps_b.mean()),
+                "low": float(low),
+                "high": float(high),
+                "verdict": _verdict(float(rps_a.mean()), low, high, False, threshold),
+            }
+        )
+
+        # normal approximation for the difference of two error rates
+        rate_a = a["failures"] / a["requests"]
+        rate_b = b["failures"] / b["requests"]
+        spread = NormalDist().inv_cdf(1 - tail / 100) * math.sqrt(
+            rate_a * (1 - rate_a) / a["requests"] + rate_b * (1 - rate_b) / b["requests"]
+        )
+        low, high = (rate_b - rate_a - spread) * 100, (rate_b - rate_a + spread) * 100
+        changes.append(
+            {
+                "endpoint": key,
+                "metric": "errors %",
+                "before": rate_a * 100,
+                "after": rate_b * 100,
+                "low": low,
+                "high": high,
+                "verdict": "REGRESSION" if low > 0 else ("improvement" if high < 0 else ""),
+            }
+        )
+    return changes
+
+
+def print_changes(
+    before: Dict, after: Dict, changes: List[Dict], confidence: float = CONFIDENCE
+) -> None:
+    for label, run in (("before", before), ("after", after)):
+        print(
+            f"{label}: run #{run['id']} {run['scenario']} @ {run['git_sha']} "
+            f"on {run['host']}, {time.strftime('%Y-%m-%d %H:%M', time.localtime(run['started_at']))}"
+        )
+    differing = {
+        key: (before["params"].get(key), after["params"].get(key))
+        for key in set(before["params"]) | set(after["params"])
+        if before["params"].get(key) != after["params"].get(key)
+    }
+    for key, (a, b) in sorted(differing.items()):
+        print(f"  param {key}: {a} -> {b}")
+
+    print(
+        f"{'endpoint':<44} {'metric':<9} {'before':>9} {'after':>9} "
+        f"{'change':>8} {f'{confidence:.0%} CI of change':>22}"
+    )
+    for change in changes:
+        before_value, after_value = change["before"], change["after"]
+        relative = (
+            f"{(after_value - before_value) / before_value:+.1%}" if before_value else "n/a"
+        )
+        interval = (
+            f"[{change['low']:+.1f}, {change['high']:+.1f}]"
+            if change["low"] is not None
+            else ""
+        )
+        print(
+            f"{change['endpoint'][:44]:<44} {change['metric']:<9} {before_value:>9.1f} "
+            f"{after_value:>9.1f} {relative:>8} {interval:>22} {change['verdict']}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Browse and compare load test runs")
+    parser.add_argument("--db", type=str, default=HISTORY_DB)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="List recent runs")
+    list_parser.add_argument("--scenario", type=str, default=None)
+    list_parser.add_argument("--limit", type=int, default=20)
+
+    show_parser = commands.add_parser("show", help="Show one run")
+    show_parser.add_argument("run", type=int)
+
+    baseline_parser = commands.add_parser(
+        "baseline", help="Make a run its scenario's baseline"
+    )
+    baseline_parser.add_argument("run", type=int)
+
+    compare_parser = commands.add_parser(
+        "compare", help="Compare two runs, or a run against its baseline"
+    )
+    compare_parser.add_argument("runs", type=int, nargs="+", metavar="run")
+    compare_parser.add_argument("--iterations", type=int, default=BOOTSTRAP_ITERATIONS)
+    compare_parser.add_argument("--confidence", type=float, default=CONFIDENCE)
+    compare_parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    history = RunHistory(args.db)
+
+    if args.command == "list":
+        print(f"{'run':>5} {'scenario':<24} {'started':<17} {'git':<16} {'rps':>8} {'host'}")
+        for run in history.runs(args.scenario, args.limit):
+            endpoints = history.get(run["id"])["endpoints"].values()
+            rps = sum(e["rps"] for e in endpoints)
+            started = time.strftime("%Y-%m-%d %H:%M", time.localtime(run["started_at"]))
+            print(
+                f"{run['id']:>5} {run['scenario']:<24} {started:<17} "
+                f"{run['git_sha'] or '':<16} {rps:>8.1f} {run['host']}"
+            )
+
+    elif args.command == "show":
+        run = history.get(args.run)
+        if run is None:
+            sys.exit(f"No run {args.run}")
+        print(json.dumps(run["params"], indent=2))
+        for key, endpoint in run["endpoints"].items():
+            print(
+                f"{key[:48]:<48} {endpoint['requests']:>8} requests "
+                f"{endpoint['failures']:>6} failures {endpoint['rps']:>8.1f} rps"
+            )
+
+    elif args.command == "baseline":
+        scenario = history.set_baseline(args.run)
+        print(f"Run #{args.run} is now the baseline for {scenario}")
+
+    elif args.command == "compare":
+        if len(args.runs) > 2:
+            sys.exit("compare takes one or two runs")
+        if len(args.runs) == 2:
+            before_id, after_id = args.runs
+        else:
+            after_id = args.runs[0]
+            if history.get(after_id) is None:
+                sys.exit(f"No run {after_id}")
+            before_id = history.reference_for(after_id)
+            if before_id is None:
+                sys.exit(f"Run #{after_id} has no baseline or earlier run to compare to")
+        before, after = history.get(before_id), history.get(after_id)
+        if before is None or after is None:
+            sys.exit(f"No run {before_id if before is None else after_id}")
+
+        changes = compare(
+            before, after, args.iterations, args.confidence, args.threshold
+        )
+        print_changes(before, after, changes, args.confidence)
+        if any(change["verdict"] == "REGRESSION" for change in changes):
+            print("Significant regressions found")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
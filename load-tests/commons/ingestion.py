@@ -0,0 +1,297 @@
+"""
+End-to-end lag of the engagement message pipeline.
+
+POST /engagement/message/ answers 202 before the message is applied, so the
+accept rate says nothing about whether ingestion keeps up. An
+IngestionTracker remembers when each accepted message was sent, per
+(discord_id, channel_id) key, and a verifier greenlet polls
+SWECC_INGESTION_POLL for the applied count of every key with messages in
+flight:
+
+    SWECC_INGESTION_POLL=/engagement/message/count/?discord_id={discord_id}&channel_id={channel_id}
+    SWECC_INGESTION_COUNT_FIELD=count
+
+When a key's count goes up by n, its n oldest messages count as applied,
+with a lag from their send to the poll that saw them (so lags are rounded
+up to the poll interval). After the run the verifier keeps polling for up
+to SWECC_INGESTION_DRAIN seconds so the backlog can clear, then reports
+lag percentiles, backlog growth and the sustainable ingestion throughput,
+and appends them to SWECC_INGESTION_FILE.
+
+Counts are attributed to this process's own messages, so nothing else may
+post to the same keys during the run, and it should run as a single
+process rather than with workers.
+"""
+
+import json
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+POLL_TEMPLATE = os.getenv(
+    "SWECC_INGESTION_POLL",
+    "/engagement/message/count/?discord_id={discord_id}&channel_id={channel_id}",
+)
+COUNT_FIELD = os.getenv("SWECC_INGESTION_COUNT_FIELD", "count")
+POLL_INTERVAL = float(os.getenv("SWECC_INGESTION_POLL_INTERVAL", "0.5"))
+POLL_CONCURRENCY = int(os.getenv("SWECC_INGESTION_POLL_CONCURRENCY", "10"))
+DRAIN_SECONDS = float(os.getenv("SWECC_INGESTION_DRAIN", "30"))
+INGESTION_FILE = os.getenv("SWECC_INGESTION_FILE", "ingestion-lag.jsonl")
+# the backlog may grow by this fraction of the accept rate and still keep up
+BACKLOG_TOLERANCE = 0.05
+
+Key = Tuple[int, int]
+
+
+def count_from(payload, field: str = COUNT_FIELD) -> int:
+    """The applied count in a poll response; `field` is a dotted path."""
+    for part in filter(None, field.split(".")):
+        payload = payload[int(part)] if isinstance(payload, list) else payload[part]
+    return int(payload)
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def slope(points: List[Tuple[float, float]]) -> float:
+    """Least-squares slope of (x, y) points, 0 with fewer than two."""
+    if len(points) < 2:
+        return 0.0
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if not variance:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+
+class IngestionTracker:
+    def __init__(self, scenario: str):
+        self.scenario = scenario
+        self.session = None
+        self.host = ""
+        # poll greenlets of both the run loop and drain()
+        self.pool = None
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the previous run, e.g. when a new one starts from the web UI."""
+        self.baselines: Dict[Key, int] = {}
+        # accepted messages not seen applied yet, as send times, oldest first
+        self.pending: Dict[Key, Deque[float]] = {}
+        self.lags: List[float] = []
+        # (seconds since the first send, accepted, applied)
+        self.samples: List[Tuple[float, int, int]] = []
+        self.accepted = 0
+        self.applied = 0
+        self.polls = 0
+        self.poll_errors = 0
+        self.first_send: Optional[float] = None
+        self.last_send: Optional[float] = None
+
+    def connect(self, host: str, api_key: Optional[str]) -> None:
+        import requests
+        from gevent.pool import Pool
+        from requests.adapters import HTTPAdapter
+
+        self.pool = Pool(POLL_CONCURRENCY)
+        self.session = requests.Session()
+        # users reading baselines wait for a connection instead of opening more
+        adapter = HTTPAdapter(pool_maxsize=POLL_CONCURRENCY, pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Authorization"] = f"Api-Key {api_key}"
+        self.host = host.rstrip("/")
+
+    def poll(self, key: Key) -> Optional[int]:
+        discord_id, channel_id = key
+        url = self.host + POLL_TEMPLATE.format(
+            discord_id=discord_id, channel_id=channel_id
+        )
+        self.polls += 1
+        try:
+            response = self.session.get(url, timeout=10)
+            response.raise_for_status()
+            return count_from(response.json())
+        except Exception as e:
+            self.poll_errors += 1
+            if self.poll_errors <= 5:
+                print(f"Ingestion poll of {url} failed: {e}")
+            return None
+
+    def prepare(self, key: Key) -> bool:
+        """Read a key's count before its first message; False if it can't be."""
+        if key in self.baselines:
+            return True
+        count = self.poll(key)
+        if count is None:
+            return False
+        # another user may have read it while this one waited
+        self.baselines.setdefault(key, count)
+        self.pending.setdefault(key, deque())
+        return True
+
+    def sent(self, key: Key, started: float) -> None:
+        """Record an accepted message, by the time its request started."""
+        self.pending[key].append(started)
+        self.accepted += 1
+        if self.first_send is None:
+            self.first_send = started
+        self.last_send = started
+
+    def check(self, key: Key, count: Optional[int], seen: float) -> None:
+        if count is None:
+            return
+        pending = self.pending[key]
+        # a message can be applied before its 202 gets back and sent() runs;
+        # its increment stays unmatched until then instead of being dropped
+        matched = min(max(count - self.baselines[key], 0), len(pending))
+        for _ in range(matched):
+            self.lags.append(seen - pending.popleft())
+        self.applied += matched
+        self.baselines[key] += matched
+
+    @property
+    def backlog(self) -> int:
+        return self.accepted - self.applied
+
+    def sweep(self) -> None:
+        """Poll every key with messages in flight, and sample the backlog."""
+        keys = [key for key, pending in self.pending.items() if pending]
+        for key, count in zip(keys, self.pool.map(self.poll, keys)):
+            self.check(key, count, time.time())
+        if self.first_send is not None:
+            self.samples.append(
+                (time.time() - self.first_send, self.accepted, self.applied)
+            )
+
+    def run(self) -> None:
+        import gevent
+
+        while True:
+            gevent.sleep(POLL_INTERVAL)
+            self.sweep()
+
+    def drain(self, seconds: float = DRAIN_SECONDS) -> float:
+        """Keep polling after the load stops until the backlog clears."""
+        import gevent
+
+        started = time.time()
+        while self.backlog and time.time() - started < seconds:
+            gevent.sleep(POLL_INTERVAL)
+            self.sweep()
+        return time.time() - started
+
+    def summary(self, drain_seconds: float, backlog_at_stop: int) -> dict:
+        sending = (self.last_send - self.first_send) if self.first_send else 0.0
+        during = [s for s in self.samples if s[0] <= sending]
+        accept_rate = self.accepted / sending if sending else 0.0
+        applied_during = during[-1][2] if during else 0
+        apply_rate = applied_during / sending if sending else 0.0
+        growth = slope([(t, accepted - applied) for t, accepted, applied in during])
+        keeps_up = growth <= BACKLOG_TOLERANCE * accept_rate
+        drained = backlog_at_stop - self.backlog
+        return {
+            "scenario": self.scenario,
+            "recorded_at": time.time(),
+            "poll": POLL_TEMPLATE,
+            "poll_interval": POLL_INTERVAL,
+            "send_seconds": round(sending, 1),
+            "accepted": self.accepted,
+            "applied": self.applied,
+            "unapplied": self.backlog,
+            "accept_rate": round(accept_rate, 2),
+            "apply_rate": round(apply_rate, 2),
+            "drain_rate": round(drained / drain_seconds, 2) if backlog_at_stop else None,
+            "backlog_growth": round(growth, 2),
+            "peak_backlog": max((a - b for _, a, b in self.samples), default=0),
+            "keeps_up": keeps_up,
+            # the accept rate when the backlog stays flat, else what was applied
+            "sustainable_rate": round(accept_rate if keeps_up else apply_rate, 2),
+            "lag_ms": {
+                f"p{p}": round(percentile(self.lags, p) * 1000)
+                for p in (50, 95, 99, 100)
+            },
+            "polls": self.polls,
+            "poll_errors": self.poll_errors,
+            "backlog": [
+                [round(t, 1), accepted - applied] for t, accepted, applied in self.samples
+            ],
+        }
+
+    def report(self, summary: dict) -> None:
+        lag = summary["lag_ms"]
+        print(f"Ingestion of {summary['scenario']} ({INGESTION_FILE}):")
+        print(
+            f"  {summary['accepted']} accepted, {summary['applied']} applied, "
+            f"{summary['unapplied']} never seen applied"
+        )
+        drain = summary["drain_rate"]
+        print(
+            f"  accepted {summary['accept_rate']} msg/s, applied "
+            f"{summary['apply_rate']} msg/s while sending"
+            + (f", drained {drain} msg/s after" if drain is not None else "")
+        )
+        print(
+            f"  lag p50 {lag['p50']}ms, p95 {lag['p95']}ms, p99 {lag['p99']}ms, "
+            f"max {lag['p100']}ms (poll every {POLL_INTERVAL:g}s)"
+        )
+        print(
+            f"  backlog grew {summary['backlog_growth']} msg/s, "
+            f"peak {summary['peak_backlog']}"
+        )
+        verdict = "keeps up" if summary["keeps_up"] else "falls behind"
+        print(
+            f"  ingestion {verdict}: sustainable throughput "
+            f"{'at least ' if summary['keeps_up'] else ''}"
+            f"{summary['sustainable_rate']} msg/s"
+        )
+
+
+def track_ingestion(scenario: str, api_key: Optional[str] = None) -> IngestionTracker:
+    """Verify the scenario's messages get applied, polling from a greenlet."""
+    import gevent
+    from locust import events
+    from locust.runners import MasterRunner, WorkerRunner
+
+    tracker = IngestionTracker(scenario)
+    state = {}
+
+    @events.test_start.add_listener
+    def on_test_start(environment, **kwargs):
+        if isinstance(environment.runner, MasterRunner):
+            return
+        if isinstance(environment.runner, WorkerRunner):
+            print(
+                "Warning: ingestion lag is measured per worker; "
+                "workers must not share message keys"
+            )
+        tracker.reset()
+        tracker.connect(environment.host, api_key or os.getenv("SWECC_API_KEY"))
+        state["greenlet"] = gevent.spawn(tracker.run)
+
+    @events.test_stop.add_listener
+    def on_test_stop(environment, **kwargs):
+        greenlet = state.pop("greenlet", None)
+        if greenlet is None:
+            return
+        # stop the run loop and any polls it left running, so they don't race
+        # with drain() over the baselines
+        greenlet.kill(block=True)
+        tracker.pool.kill()
+        backlog = tracker.backlog
+        if backlog:
+            print(f"Waiting up to {DRAIN_SECONDS:g}s for {backlog} messages to apply...")
+        drained = tracker.drain()
+        summary = tracker.summary(drained, backlog)
+        with open(INGESTION_FILE, "a") as f:
+            f.write(json.dumps(summary) + "\n")
+        tracker.report(summary)
+
+    return tracker
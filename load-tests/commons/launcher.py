@@ -0,0 +1,218 @@
+"""
+Runs a Locust master plus N workers on this machine:
+
+python -m commons.launcher -f bots_log_in.py --workers 4 -u 400 -r 50 -t 5m \\
+    --host http://localhost
+
+Each worker is pinned to its own core and gets SWECC_BOT_PARTITION=k/N, so
+workers check out disjoint slices of the bot store. Anything after the
+known options is passed to every locust process. When the master exits
+(or the launcher is interrupted) the workers are shut down, and the run's
+stats, throughput and latency histograms are summarized.
+"""
+
+import argparse
+import csv
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+from .histogram import Histogram
+
+DEFAULT_CSV_PREFIX = "results/run"
+SHUTDOWN_TIMEOUT = 30
+MASTER_PORT = 5557
+# where workers append their results; the defaults of commons.clients and
+# commons.open_loop, which are not imported here as they patch with gevent
+THROUGHPUT_FILE = os.getenv("SWECC_THROUGHPUT_FILE", "client-throughput.jsonl")
+HISTOGRAM_FILE = os.getenv("SWECC_HISTOGRAM_FILE", "latency-histograms.jsonl")
+
+
+def available_cores() -> List[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def worker_cores(workers: int) -> List[Optional[int]]:
+    """One core per worker, leaving the first core to the master when possible."""
+    if not hasattr(os, "sched_setaffinity"):
+        return [None] * workers
+    cores = available_cores()
+    if len(cores) > workers:
+        cores = cores[1:]
+    return [cores[k % len(cores)] for k in range(workers)]
+
+
+def _pin(core: Optional[int]):
+    if core is None:
+        return None
+    return lambda: os.sched_setaffinity(0, {core})
+
+
+def start_master(args, extra: List[str]) -> subprocess.Popen:
+    command = [
+        "locust",
+        "-f",
+        args.locustfile,
+        "--master",
+        "--master-bind-port",
+        str(args.port),
+        "--expect-workers",
+        str(args.workers),
+        "--csv",
+        args.csv,
+        "--headless",
+        "-u",
+        str(args.users),
+        "-r",
+        str(args.spawn_rate),
+    ]
+    if args.run_time:
+        command += ["-t", args.run_time]
+    if args.host:
+        command += ["--host", args.host]
+    # in its own process group, so Ctrl-C reaches only the launcher
+    return subprocess.Popen(command + extra, start_new_session=True)
+
+
+def start_worker(
+    args, extra: List[str], k: int, core: Optional[int]
+) -> subprocess.Popen:
+    command = [
+        "locust",
+        "-f",
+        args.locustfile,
+        "--worker",
+        "--master-host",
+        "127.0.0.1",
+        "--master-port",
+        str(args.port),
+    ]
+    env = {**os.environ, "SWECC_BOT_PARTITION": f"{k}/{args.workers}"}
+    return subprocess.Popen(
+        command + extra, env=env, preexec_fn=_pin(core), start_new_session=True
+    )
+
+
+def stop(processes: List[subprocess.Popen], timeout: float = SHUTDOWN_TIMEOUT):
+    """SIGTERM the processes, then SIGKILL whatever is left after `timeout`."""
+    for process in processes:
+        if process.poll() is None:
+            process.terminate()
+    deadline = time.monotonic() + timeout
+    for process in processes:
+        try:
+            process.wait(max(0.0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            print(f"Process {process.pid} did not exit, killing it")
+            process.kill()
+            process.wait()
+
+
+def _records_since(filename: str, started: float) -> List[Dict]:
+    if not os.path.exists(filename):
+        return []
+    with open(filename, "r") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return [r for r in records if r.get("recorded_at", 0) >= started]
+
+
+def summarize(csv_prefix: str, started: float) -> None:
+    """Print the master's aggregated stats plus what the workers recorded."""
+    stats_file = f"{csv_prefix}_stats.csv"
+    if os.path.exists(stats_file):
+        with open(stats_file, "r") as f:
+            rows = list(csv.DictReader(f))
+        print(
+            f"{'name':<48} {'requests':>9} {'failures':>9} "
+            f"{'rps':>8} {'p50':>6} {'p99':>6}"
+        )
+        for row in rows:
+            name = f"{row['Type']} {row['Name']}".strip()
+            print(
+                f"{name[:48]:<48} {row['Request Count']:>9} "
+                f"{row['Failure Count']:>9} {float(row['Requests/s']):>8.1f} "
+                f"{row['50%']:>6} {row['99%']:>6}"
+            )
+        print(f"Full stats in {csv_prefix}_*.csv")
+
+    throughput = _records_since(THROUGHPUT_FILE, started)
+    if throughput:
+        rps = sum(r["rps"] for r in throughput)
+        cpu = sum(r["cpu_seconds"] for r in throughput)
+        requests = sum(r["requests"] for r in throughput)
+        per_core = requests / cpu if cpu else 0.0
+        print(
+            f"{len(throughput)} workers: {rps:.1f} RPS total, "
+            f"{per_core:.1f} RPS per busy core"
+        )
+
+    merged: Dict[str, Histogram] = {}
+    for record in _records_since(HISTOGRAM_FILE, started):
+        for key, data in record["histograms"].items():
+            histogram = Histogram.from_dict(data)
+            if key in merged:
+                merged[key].merge(histogram)
+            else:
+                merged[key] = histogram
+    if merged:
+        print("Intended-time latency across workers:")
+        for key, histogram in sorted(merged.items()):
+            percentiles = histogram.percentiles().items()
+            values = " ".join(f"{p}={value / 1000:.1f}ms" for p, value in percentiles)
+            print(f"  {key:<40} n={histogram.total:<8} {values}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a Locust master and pinned workers on disjoint bot partitions"
+    )
+    parser.add_argument("-f", "--locustfile", type=str, required=True)
+    parser.add_argument("--workers", type=int, default=len(available_cores()))
+    parser.add_argument("-u", "--users", type=int, default=100)
+    parser.add_argument("-r", "--spawn-rate", type=float, default=10)
+    parser.add_argument("-t", "--run-time", type=str, default=None)
+    parser.add_argument("--host", type=str, default=None)
+    parser.add_argument("--csv", type=str, default=DEFAULT_CSV_PREFIX)
+    parser.add_argument("--port", type=int, default=MASTER_PORT)
+    args, extra = parser.parse_known_args()
+
+    if os.path.dirname(args.csv):
+        os.makedirs(os.path.dirname(args.csv), exist_ok=True)
+
+    started = time.time()
+    master = start_master(args, extra)
+    workers = [
+        start_worker(args, extra, k, core)
+        for k, core in enumerate(worker_cores(args.workers))
+    ]
+    print(
+        f"Started master {master.pid} and {len(workers)} workers "
+        f"({', '.join(str(w.pid) for w in workers)})"
+    )
+
+    def shut_down(signum, frame):
+        print("Stopping load test...")
+        # the master stops the workers and writes its CSV files on SIGTERM
+        if master.poll() is None:
+            master.terminate()
+
+    signal.signal(signal.SIGINT, shut_down)
+    signal.signal(signal.SIGTERM, shut_down)
+
+    try:
+        code = master.wait()
+    finally:
+        stop([master] + workers)
+
+    summarize(args.csv, started)
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,49 @@
 import argparse
-import os
-import json
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Optional
 import concurrent.futures
-from pathlib import Path
 
-from bot import SWECCBot, check_connection
+from .bot import SWECCBot, check_connection
+from .bot_store import BOTS_DB, open_store
+from .transport import configure_pool
+from .provision import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_RATE,
+    DEFAULT_RETRIES,
+    provision_bots,
+)
 
 DEFAULT_NUM_BOTS = 10
-BOTS_FILE = "bots.json"
+BOTS_FILE = BOTS_DB
+ENGINES = ["async", "threads"]
 
 
 def save_bots(bots: List[SWECCBot], filename: str = BOTS_FILE) -> None:
-    """Save bots to a JSON file for later use."""
-    serialized_bots = [bot.to_dict() for bot in bots]
-    with open(filename, "w") as f:
-        json.dump(serialized_bots, f, indent=2)
+    """Save (insert or update) bots in the bot store."""
+    store = open_store(filename)
+    store.put_many(bots)
+    store.close()
     print(f"Saved {len(bots)} bots to {filename}")
 
 
 def load_bots(filename: str = BOTS_FILE) -> List[SWECCBot]:
-    """Load bots from a JSON file."""
-    if not Path(filename).exists():
-        print(f"Bots file {filename} not found")
-        return []
+    """Load every bot from the bot store.
 
-    try:
-        with open(filename, "r") as f:
-            data = json.load(f)
-        bots = [SWECCBot.from_dict(bot_data) for bot_data in data]
-        print(f"Loaded {len(bots)} bots from {filename}")
-        return bots
-    except Exception as e:
-        print(f"Error loading bots from {filename}: {e}")
-        return []
+    This builds a session per bot; prefer BotStore.get/iter_bots when only
+    some bots are needed.
+    """
+    store = open_store(filename)
+    bots = list(store.iter_bots())
+    store.close()
+    print(f"Loaded {len(bots)} bots from {filename}")
+    return bots
 
 
 def setup_bot(bot_id: int) -> Optional[SWECCBot]:
     """Set up a single bot (register, login, verify)."""
     try:
         bot = SWECCBot.from_idx(bot_id)
+        # ids being set up are not in the bot store, so most likely new
+        bot.is_registered = False
         if bot.ensure_authenticated():
             return bot
         return None
@@ -48,31 +52,17 @@ def setup_bot(bot_id: int) -> Optional[SWECCBot]:
         return None
 
 
-def setup_bots(
-    start_id: int = 1, num_bots: int = DEFAULT_NUM_BOTS, max_workers: int = 5
+def setup_bots_threaded(
+    bot_ids: List[int],
+    max_workers: int = 5,
+    on_bot: Optional[Callable[[SWECCBot], None]] = None,
 ) -> List[SWECCBot]:
-    """Set up multiple bots in parallel."""
-    if not check_connection():
-        print("Could not connect to the server")
-        return []
-
-    existing_bots = load_bots()
-    existing_ids = {bot.idx for bot in existing_bots}
-
-    bot_ids_to_setup = [
-        i for i in range(start_id, start_id + num_bots) if i not in existing_ids
-    ]
-
-    if not bot_ids_to_setup:
-        print("All requested bots are already set up")
-        return existing_bots
-
-    print(f"Setting up {len(bot_ids_to_setup)} new bots...")
-
+    """Set up bots with a thread pool of blocking SWECCBot sessions."""
+    configure_pool(max_workers)
     new_bots = []
     with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
         future_to_bot_id = {
-            executor.submit(setup_bot, bot_id): bot_id for bot_id in bot_ids_to_setup
+            executor.submit(setup_bot, bot_id): bot_id for bot_id in bot_ids
         }
         for future in concurrent.futures.as_completed(future_to_bot_id):
             bot_id = future_to_bot_id[future]
@@ -80,21 +70,69 @@ def setup_bots(
                 bot = future.result()
                 if bot:
                     new_bots.append(bot)
+                    if on_bot:
+                        on_bot(bot)
                     print(f"Bot {bot_id} setup completed")
                 else:
                     print(f"Bot {bot_id} setup failed")
             except Exception as e:
                 print(f"Bot {bot_id} setup error: {e}")
 
-    all_bots = existing_bots + new_bots
+    if new_bots:
+        round_trips = sum(bot.round_trips for bot in new_bots)
+        print(f"{round_trips / len(new_bots):.2f} round trips per authenticated bot")
+    return new_bots
 
-    save_bots(all_bots)
 
-    return all_bots
+def setup_bots(
+    start_id: int = 1,
+    num_bots: int = DEFAULT_NUM_BOTS,
+    max_workers: int = 5,
+    engine: str = "async",
+    concurrency: int = DEFAULT_CONCURRENCY,
+    rate: float = DEFAULT_RATE,
+    retries: int = DEFAULT_RETRIES,
+    filename: str = BOTS_FILE,
+) -> List[SWECCBot]:
+    """Set up the bots missing from the store in parallel.
+
+    Each bot is written to the store as soon as it is authenticated. Returns
+    the newly set up bots.
+    """
+    if not check_connection():
+        print("Could not connect to the server")
+        return []
+
+    store = open_store(filename)
+    try:
+        bot_ids_to_setup = [
+            i for i in range(start_id, start_id + num_bots) if i not in store
+        ]
+
+        if not bot_ids_to_setup:
+            print("All requested bots are already set up")
+            return []
+
+        print(f"Setting up {len(bot_ids_to_setup)} new bots...")
+
+        if engine == "threads":
+            new_bots = setup_bots_threaded(bot_ids_to_setup, max_workers, store.put)
+        else:
+            new_bots = provision_bots(
+                bot_ids_to_setup,
+                concurrency=concurrency,
+                rate=rate,
+                retries=retries,
+                on_bot=store.put,
+            )
+
+        print(f"Saved {len(new_bots)} new bots to {filename} ({len(store)} total)")
+        return new_bots
+    finally:
+        store.close()
 
 
 def main():
-    global BOTS_FILE
     """Main function to set up bots from command line."""
     parser = argparse.ArgumentParser(description="Set up bots for load testing")
     parser.add_argument(
@@ -108,17 +146,48 @@ def main():
         "--max-workers",
         type=int,
         default=5,
-        help="Maximum number of parallel worker threads",
+        help="Maximum number of parallel worker threads (threads engine)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="async",
+        help="Provisioning engine",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="Bots provisioned concurrently (async engine)",
     )
     parser.add_argument(
-        "--bots-file", type=str, default=BOTS_FILE, help="File to save/load bot data"
+        "--rate",
+        type=float,
+        default=DEFAULT_RATE,
+        help="Maximum requests per second (async engine)",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=DEFAULT_RETRIES,
+        help="Retries per failed bot (async engine)",
+    )
+    parser.add_argument(
+        "--bots-file", type=str, default=BOTS_FILE, help="Bot store (SQLite) file"
     )
 
     args = parser.parse_args()
 
-    BOTS_FILE = args.bots_file
-
-    bots = setup_bots(args.start_id, args.num_bots, args.max_workers)
+    bots = setup_bots(
+        args.start_id,
+        args.num_bots,
+        args.max_workers,
+        engine=args.engine,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        retries=args.retries,
+        filename=args.bots_file,
+    )
     print(f"Successfully set up {len(bots)} bots")
 
 
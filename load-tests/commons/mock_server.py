@@ -0,0 +1,470 @@
+"""
+Stand-in SWECC server for benchmarking the load generator itself:
+
+python -m commons.mock_server --port 8000 --latency lognormal:median=20,sigma=0.5 \\
+    --latency /directory/search/=exp:mean=40 --error-rate 0.01
+SWECC_URL=http://localhost:8000 locust -f bots_log_in.py --host http://localhost:8000
+
+It serves the endpoints the scripts use with the status codes they expect,
+keeps registered users, sessions and JWTs in memory, and echoes WebSocket
+messages. Each route gets a latency drawn from a distribution and fails with
+a 500 at a given rate, so a run against it measures how much load a script
+can generate rather than how fast the real stack is.
+
+Accepted engagement messages go through a queue that applies them after
+--ingest-delay at up to --ingest-rate messages per second, and
+/engagement/message/count/ reports how many were applied per member and
+channel, for ingestion_lag_test.py.
+"""
+
+import argparse
+import asyncio
+import base64
+import collections
+import json
+import math
+import random
+import secrets
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from aiohttp import WSMsgType, web
+
+DEFAULT_PORT = 8000
+DEFAULT_MEMBERS = 1000
+SESSION_TTL = 14 * 24 * 3600
+JWT_TTL = 3600
+REPORT_INTERVAL = 10.0
+
+LatencyFn = Callable[[random.Random], float]
+
+
+def _lognormal(median: float, sigma: float = 0.5) -> LatencyFn:
+    mu = math.log(median)
+    return lambda rng: rng.lognormvariate(mu, sigma)
+
+
+LATENCIES: Dict[str, Callable[..., LatencyFn]] = {
+    "none": lambda: lambda rng: 0.0,
+    "constant": lambda ms: lambda rng: ms,
+    "uniform": lambda min, max: lambda rng: rng.uniform(min, max),
+    "exp": lambda mean: lambda rng: rng.expovariate(1 / mean),
+    "lognormal": _lognormal,
+}
+
+
+def latency(spec: Optional[str]) -> LatencyFn:
+    """Milliseconds to wait, from a spec like "lognormal:median=20,sigma=0.5"."""
+    kind, _, options = (spec or "none").partition(":")
+    if kind not in LATENCIES:
+        raise ValueError(f"Unknown latency {kind!r}, expected one of {list(LATENCIES)}")
+    kwargs = {}
+    for option in filter(None, options.split(",")):
+        key, _, value = option.partition("=")
+        kwargs[key.strip()] = float(value)
+    try:
+        return LATENCIES[kind](**kwargs)
+    except TypeError as e:
+        raise ValueError(f"Bad latency {spec}: {e}")
+
+
+def per_route(values: List[str]) -> Dict[str, str]:
+    """Split "/route/=value" options; a bare value applies to every route."""
+    result = {}
+    for value in values:
+        if value.startswith("/") and "=" in value:
+            route, _, value = value.partition("=")
+            result[route] = value
+        else:
+            result["default"] = value
+    return result
+
+
+class RouteStats:
+    def __init__(self):
+        self.requests: Dict[str, int] = collections.Counter()
+        self.errors: Dict[str, int] = collections.Counter()
+        self.ws_connections = 0
+        self.ws_peak = 0
+        self.ws_messages = 0
+        self.ingest_backlog = 0
+        self.ingested = 0
+
+    def report(self, interval: float) -> str:
+        lines = [
+            f"{route:<32} {count / interval:>8.1f} rps"
+            + (f" {self.errors[route]} injected errors" if self.errors[route] else "")
+            for route, count in sorted(self.requests.items())
+        ]
+        lines.append(
+            f"ws: {self.ws_connections} open (peak {self.ws_peak}), "
+            f"{self.ws_messages / interval:.1f} msg/s"
+        )
+        if self.ingested or self.ingest_backlog:
+            lines.append(
+                f"ingestion: {self.ingested / interval:.1f} msg/s applied, "
+                f"{self.ingest_backlog} queued"
+            )
+        self.requests.clear()
+        self.errors.clear()
+        self.ws_messages = 0
+        self.ingested = 0
+        return "\n".join(lines)
+
+
+class MockSWECC:
+    def __init__(
+        self,
+        latencies: Dict[str, str],
+        error_rates: Dict[str, float],
+        members: int = DEFAULT_MEMBERS,
+        api_key: Optional[str] = None,
+        session_ttl: float = SESSION_TTL,
+        jwt_ttl: float = JWT_TTL,
+        ingest_delay: Optional[str] = None,
+        ingest_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        # /health stays instant and reliable unless configured explicitly,
+        # so check_connection() does not flake
+        self.latencies = {route: latency(spec) for route, spec in latencies.items()}
+        self.latencies.setdefault("/health", latency(None))
+        self.error_rates = {"/health": 0.0, **error_rates}
+        self.members = members
+        self.api_key = api_key
+        self.session_ttl = session_ttl
+        self.jwt_ttl = jwt_ttl
+        self.rng = random.Random(seed)
+        self.stats = RouteStats()
+        self.ingest_delay = latency(ingest_delay)
+        self.ingest_rate = ingest_rate
+
+        # username -> password, sessionid -> (username, expires), jwt -> expires
+        self.users: Dict[str, str] = {}
+        self.sessions: Dict[str, Tuple[str, float]] = {}
+        self.jwts: Dict[str, float] = {}
+        self.directory = [
+            {"id": i, "username": f"bot{i}username", "first_name": f"Bot{i}First"}
+            for i in range(1, members + 1)
+        ]
+        # (discord_id, channel_id) -> applied messages; queue of (ready at, key)
+        self.message_counts: Dict[Tuple[str, str], int] = collections.Counter()
+        self.ingest_queue: Optional[asyncio.Queue] = None
+
+    def route_of(self, request: web.Request) -> str:
+        resource = request.match_info.route.resource
+        return resource.canonical if resource is not None else request.path
+
+    @web.middleware
+    async def inject(self, request: web.Request, handler):
+        route = self.route_of(request)
+        self.stats.requests[route] += 1
+
+        delay = self.latencies.get(route, self.latencies.get("default"))
+        if delay is not None:
+            seconds = delay(self.rng) / 1000
+            if seconds > 0:
+                await asyncio.sleep(seconds)
+
+        error_rate = self.error_rates.get(route, self.error_rates.get("default", 0.0))
+        if error_rate and self.rng.random() < error_rate:
+            self.stats.errors[route] += 1
+            return web.json_response({"detail": "Injected error"}, status=500)
+        return await handler(request)
+
+    # auth
+
+    def session_user(self, request: web.Request) -> Optional[str]:
+        session = self.sessions.get(request.cookies.get("sessionid", ""))
+        if session is None:
+            return None
+        username, expires = session
+        if expires < time.time():
+            return None
+        return username
+
+    def has_api_key(self, request: web.Request) -> bool:
+        scheme, _, key = request.headers.get("Authorization", "").partition(" ")
+        return scheme == "Api-Key" and (self.api_key is None or key == self.api_key)
+
+    def authorized(self, request: web.Request) -> bool:
+        return self.has_api_key(request) or self.session_user(request) is not None
+
+    def csrf_ok(self, request: web.Request) -> bool:
+        token = request.cookies.get("csrftoken")
+        return bool(token) and request.headers.get("X-CSRFToken") == token
+
+    async def health(self, request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok"})
+
+    async def csrf(self, request: web.Request) -> web.Response:
+        response = web.json_response({"detail": "CSRF cookie set"})
+        response.set_cookie("csrftoken", secrets.token_hex(16), max_age=SESSION_TTL)
+        return response
+
+    async def register(self, request: web.Request) -> web.Response:
+        if not self.csrf_ok(request):
+            return web.json_response({"detail": "CSRF Failed"}, status=403)
+        data = await request.json()
+        username = data.get("username")
+        if not username or not data.get("password"):
+            return web.json_response({"detail": "Missing credentials"}, status=400)
+        if username in self.users:
+            return web.json_response({"detail": "Username taken"}, status=400)
+        self.users[username] = data["password"]
+        return web.json_response({"detail": "Registered"}, status=201)
+
+    async def login(self, request: web.Request) -> web.Response:
+        if not self.csrf_ok(request):
+            return web.json_response({"detail": "CSRF Failed"}, status=403)
+        data = await request.json()
+        username = data.get("username")
+        if username not in self.users or self.users[username] != data.get("password"):
+            return web.json_response({"detail": "Invalid credentials"}, status=401)
+
+        sessionid = secrets.token_hex(16)
+        self.sessions[sessionid] = (username, time.time() + self.session_ttl)
+        response = web.json_response({"detail": "Logged in"})
+        response.set_cookie("sessionid", sessionid, max_age=int(self.session_ttl))
+        return response
+
+    async def jwt(self, request: web.Request) -> web.Response:
+        username = self.session_user(request)
+        if username is None:
+            return web.json_response({"detail": "Not authenticated"}, status=403)
+        expires = time.time() + self.jwt_ttl
+        payload = json.dumps({"username": username, "exp": int(expires)}).encode()
+        token = ".".join(
+            [
+                "eyJhbGciOiJub25lIn0",
+                base64.urlsafe_b64encode(payload).decode().rstrip("="),
+                secrets.token_hex(8),
+            ]
+        )
+        self.jwts[token] = expires
+        return web.json_response({"token": token})
+
+    async def verify_discord(self, request: web.Request) -> web.Response:
+        if not self.has_api_key(request):
+            return web.json_response({"detail": "Invalid API key"}, status=403)
+        data = await request.json()
+        if data.get("username") not in self.users:
+            return web.json_response({"detail": "User not found"}, status=404)
+        return web.json_response({"detail": "Verified"})
+
+    # data
+
+    async def directory_list(self, request: web.Request) -> web.Response:
+        if not self.authorized(request):
+            return web.json_response({"detail": "Not authenticated"}, status=403)
+        return web.json_response(self.directory[:50])
+
+    async def directory_search(self, request: web.Request) -> web.Response:
+        if not self.authorized(request):
+            return web.json_response({"detail": "Not authenticated"}, status=403)
+        query = request.query.get("q", "")
+        matches = [m for m in self.directory if query in m["username"]][:20]
+        return web.json_response(matches)
+
+    async def directory_member(self, request: web.Request) -> web.Response:
+        if not self.authorized(request):
+            return web.json_response({"detail": "Not authenticated"}, status=403)
+        member_id = int(request.match_info["id"])
+        if not 1 <= member_id <= self.members:
+            return web.json_response({"detail": "Not found"}, status=404)
+        return web.json_response(self.directory[member_id - 1])
+
+    async def leaderboard(self, request: web.Request) -> web.Response:
+        if not self.authorized(request):
+            return web.json_response({"detail": "Not authenticated"}, status=403)
+        return web.json_response(
+            [
+                {"user": member["username"], "attendance": self.members - i}
+                for i, member in enumerate(self.directory[:25])
+            ]
+        )
+
+    async def message(self, request: web.Request) -> web.Response:
+        if not self.authorized(request):
+            return web.json_response({"detail": "Not authenticated"}, status=403)
+        data = await request.json()
+        key = (str(data.get("discord_id")), str(data.get("channel_id")))
+        ready = time.monotonic() + self.ingest_delay(self.rng) / 1000
+        self.ingest_queue.put_nowait((ready, key))
+        self.stats.ingest_backlog += 1
+        return web.json_response({"detail": "Accepted"}, status=202)
+
+    async def message_count(self, request: web.Request) -> web.Response:
+        if not self.authorized(request):
+            return web.json_response({"detail": "Not authenticated"}, status=403)
+        key = (request.query.get("discord_id"), request.query.get("channel_id"))
+        return web.json_response({"count": self.message_counts[key]})
+
+    async def ingest(self) -> None:
+        """Apply queued messages in order, each after its delay, at most ingest_rate/s."""
+        while True:
+            ready, key = await self.ingest_queue.get()
+            wait = ready - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self.message_counts[key] += 1
+            self.stats.ingest_backlog -= 1
+            self.stats.ingested += 1
+            if self.ingest_rate > 0:
+                await asyncio.sleep(1 / self.ingest_rate)
+
+    async def ws_echo(self, request: web.Request) -> web.StreamResponse:
+        expires = self.jwts.get(request.match_info["token"])
+        if expires is None or expires < time.time():
+            return web.json_response({"detail": "Invalid token"}, status=401)
+
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.stats.ws_connections += 1
+        self.stats.ws_peak = max(self.stats.ws_peak, self.stats.ws_connections)
+        try:
+            async for msg in ws:
+                if msg.type == WSMsgType.TEXT:
+                    self.stats.ws_messages += 1
+                    await ws.send_str(msg.data)
+        finally:
+            self.stats.ws_connections -= 1
+        return ws
+
+    def app(self, report_interval: float = REPORT_INTERVAL) -> web.Application:
+        app = web.Application(middlewares=[self.inject])
+        app.add_routes(
+            [
+                web.get("/health", self.health),
+                web.get("/auth/csrf/", self.csrf),
+                web.post("/auth/register/", self.register),
+                web.post("/auth/login/", self.login),
+                web.get("/auth/jwt/", self.jwt),
+                web.put("/members/verify-discord/", self.verify_discord),
+                web.get("/directory/", self.directory_list),
+                web.get("/directory/search/", self.directory_search),
+                web.get(r"/directory/{id:\d+}/", self.directory_member),
+                web.get("/leaderboard/attendance/", self.leaderboard),
+                web.post("/engagement/message/", self.message),
+                web.get("/engagement/message/count/", self.message_count),
+                web.get("/ws/echo/{token}", self.ws_echo),
+            ]
+        )
+
+        async def reporter(app):
+            async def report():
+                while True:
+                    await asyncio.sleep(report_interval)
+                    print(self.stats.report(report_interval), flush=True)
+
+            task = asyncio.create_task(report())
+            yield
+            task.cancel()
+
+        async def ingester(app):
+            self.ingest_queue = asyncio.Queue()
+            task = asyncio.create_task(self.ingest())
+            yield
+            task.cancel()
+
+        app.cleanup_ctx.append(ingester)
+        if report_interval > 0:
+            app.cleanup_ctx.append(reporter)
+        return app
+
+
+# options a --config file may set besides "latency" and "error_rate"
+CONFIG_OPTIONS = ["members", "api_key", "ingest_delay", "ingest_rate"]
+
+
+def load_config(filename: Optional[str]) -> Dict:
+    """{"latency": {route: spec}, "error_rate": {route: rate}, ...}; "default" keys
+    apply to every route."""
+    if not filename:
+        return {}
+    with open(filename, "r") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a stand-in SWECC server")
+    parser.add_argument("--host", type=str, default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--config", type=str, default=None, help="JSON file of latencies and error rates"
+    )
+    parser.add_argument(
+        "--latency",
+        action="append",
+        default=[],
+        help="Latency in ms, e.g. lognormal:median=20 or /directory/=exp:mean=30",
+    )
+    parser.add_argument(
+        "--error-rate",
+        action="append",
+        default=[],
+        help="Fraction of requests failing with a 500, e.g. 0.01 or /auth/jwt/=0.1",
+    )
+    parser.add_argument(
+        "--members",
+        type=int,
+        default=None,
+        help=f"Members in the directory (default: {DEFAULT_MEMBERS})",
+    )
+    parser.add_argument(
+        "--api-key", type=str, default=None, help="Only accept this key (default: any)"
+    )
+    parser.add_argument("--session-ttl", type=float, default=SESSION_TTL)
+    parser.add_argument("--jwt-ttl", type=float, default=JWT_TTL)
+    parser.add_argument(
+        "--ingest-delay",
+        type=str,
+        default=None,
+        help="Delay in ms before a message is applied, e.g. exp:mean=200",
+    )
+    parser.add_argument(
+        "--ingest-rate",
+        type=float,
+        default=None,
+        help="Messages applied per second (default: no limit)",
+    )
+    parser.add_argument("--report-interval", type=float, default=REPORT_INTERVAL)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    latencies = {**config.get("latency", {}), **per_route(args.latency)}
+    error_rates = {
+        route: float(rate)
+        for route, rate in {
+            **config.get("error_rate", {}),
+            **per_route(args.error_rate),
+        }.items()
+    }
+
+    # flags given on the command line win over the config file, as for the
+    # latencies and error rates; options set in neither keep their defaults
+    options = {}
+    for key in CONFIG_OPTIONS:
+        value = getattr(args, key)
+        if value is None:
+            value = config.get(key)
+        if value is not None:
+            options[key] = value
+
+    server = MockSWECC(
+        latencies,
+        error_rates,
+        session_ttl=args.session_ttl,
+        jwt_ttl=args.jwt_ttl,
+        seed=args.seed,
+        **options,
+    )
+    print(f"Mock SWECC server on http://{args.host}:{args.port}")
+    web.run_app(
+        server.app(args.report_interval), host=args.host, port=args.port, print=None
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Open-loop (arrival-rate) mode for the Locust scenarios.
+
+With SWECC_ARRIVAL set, a user no longer runs its tasks back to back with
+wait_time in between. It starts tasks on a fixed schedule instead, in their
+own greenlets, whether or not earlier ones have finished. Latency is then
+measured from when each request was meant to start, so time spent queued
+behind a slow server is counted as it would be for real clients:
+
+    SWECC_ARRIVAL=constant:20     20 arrivals/s per user, evenly spaced
+    SWECC_ARRIVAL=poisson:20      20 arrivals/s per user, exponential gaps
+    SWECC_ARRIVAL=step:10,50,100:30   10, 50 then 100 arrivals/s, 30s each
+
+The total rate is users x rate, so run with e.g. -u 1 per worker.
+"""
+
+import json
+import os
+import random
+import time
+from typing import Dict, Iterator, List, Optional
+
+import gevent
+from gevent.local import local
+from gevent.pool import Pool
+from locust import constant, events
+from locust.runners import MasterRunner
+
+from .histogram import Histogram
+from .run_hooks import SYNTHETIC_NAMES
+
+ARRIVAL_SPEC = os.getenv("SWECC_ARRIVAL")
+# arrivals still running before new ones are dropped, to protect the worker
+MAX_OUTSTANDING = int(os.getenv("SWECC_MAX_OUTSTANDING", "10000"))
+HISTOGRAM_FILE = os.getenv("SWECC_HISTOGRAM_FILE", "latency-histograms.jsonl")
+
+ARRIVAL_SHAPES = ["constant", "poisson", "step"]
+
+
+def arrival_offsets(spec: str, rng: random.Random) -> Iterator[float]:
+    """Yield the intended start of each arrival, in seconds from the start."""
+    shape, _, args = spec.partition(":")
+    if shape not in ARRIVAL_SHAPES:
+        raise ValueError(
+            f"Unknown arrival shape {shape!r}, expected one of {ARRIVAL_SHAPES}"
+        )
+
+    if shape == "step":
+        rates, _, hold = args.partition(":")
+        rates = [float(rate) for rate in rates.split(",")]
+        hold = float(hold or 60)
+    else:
+        rates, hold = [float(args)], None
+    if any(rate <= 0 for rate in rates):
+        raise ValueError(f"Arrival rates must be positive: {spec}")
+
+    offset = 0.0
+    for step, rate in enumerate(rates):
+        last = step == len(rates) - 1
+        step_end = None if last else (step + 1) * hold
+        while step_end is None or offset < step_end:
+            if shape == "poisson":
+                offset += rng.expovariate(rate)
+            else:
+                offset += 1 / rate
+            if step_end is not None and offset >= step_end:
+                # the next step starts its spacing from its own boundary
+                offset = step_end
+                break
+            yield offset
+
+
+class IntendedLatency:
+    """Per-endpoint histograms of latency measured from the intended start.
+
+    The scheduler stores the intended start in a greenlet-local before
+    running a task; every request the task makes is then timed from that
+    point by this events.request listener, on top of Locust's own stats.
+    Names in `ignore_names` (the scripts' SYNTHETIC_NAMES, plus any passed to
+    open_loop) are extra events the scenarios fire, not requests.
+    """
+
+    def __init__(self):
+        self.current = local()
+        self.ignore_names = set(SYNTHETIC_NAMES)
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the previous run, e.g. when a new one starts from the web UI."""
+        self.histograms: Dict[str, Histogram] = {}
+        self.scheduled = 0
+        self.dropped = 0
+        self.max_lag = 0.0
+
+    def on_request(self, request_type, name, **kwargs) -> None:
+        intended = getattr(self.current, "intended", None)
+        if intended is None or name in self.ignore_names:
+            return
+        key = f"{request_type} {name}"
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.record((time.perf_counter() - intended) * 1_000_000)
+
+    def report(self, environment) -> None:
+        if isinstance(environment.runner, MasterRunner) or not self.scheduled:
+            return
+
+        print(
+            f"Open loop ({ARRIVAL_SPEC}): {self.scheduled} arrivals, "
+            f"{self.dropped} dropped, scheduler lag up to {self.max_lag * 1000:.0f}ms"
+        )
+        header = " ".join(f"{p:>9}" for p in ("p50", "p90", "p99", "p99.9", "p99.99"))
+        print(f"  {'endpoint':<40} {'n':>8} {header}")
+        for key, histogram in sorted(self.histograms.items()):
+            values = histogram.percentiles().values()
+            row = " ".join(f"{value / 1000:>7.1f}ms" for value in values)
+            print(f"  {key:<40} {histogram.total:>8} {row}")
+
+        with open(HISTOGRAM_FILE, "a") as f:
+            record = {
+                "arrival": ARRIVAL_SPEC,
+                "host": environment.host,
+                "pid": os.getpid(),
+                "recorded_at": time.time(),
+                "scheduled": self.scheduled,
+                "dropped": self.dropped,
+                "histograms": {
+                    key: histogram.to_dict()
+                    for key, histogram in self.histograms.items()
+                },
+            }
+            f.write(json.dumps(record) + "\n")
+
+
+tracker = IntendedLatency()
+
+
+def _run_arrival(user, task, intended: float) -> None:
+    tracker.current.intended = intended
+    try:
+        task(user)
+    except Exception as e:
+        print(f"Open-loop task {task.__name__} failed: {e}")
+
+
+def intended_start() -> Optional[float]:
+    """When the running open-loop arrival was due (perf_counter), else None."""
+    return getattr(tracker.current, "intended", None)
+
+
+def set_intended_start(intended: float) -> None:
+    """Time this greenlet's requests from `intended`.
+
+    Greenlets spawned by a task don't inherit its intended start, so a task
+    that makes requests from its own greenlets sets it in each of them.
+    """
+    tracker.current.intended = intended
+
+
+def open_loop(cls=None, *, ignore_names=()):
+    """Class decorator switching a User to arrival-rate scheduling.
+
+    Without SWECC_ARRIVAL the class is returned unchanged. Otherwise its
+    tasks (with their weights) are picked at random for each arrival.
+    Use as @open_loop, or @open_loop(ignore_names=[...]) when the user
+    fires extra events.request entries besides SYNTHETIC_NAMES.
+    """
+    if cls is None:
+        return lambda cls: open_loop(cls, ignore_names=ignore_names)
+    if not ARRIVAL_SPEC:
+        return cls
+
+    tracker.ignore_names.update(ignore_names)
+    tasks: List = list(cls.tasks)
+    # fail on a bad spec at startup rather than in every user
+    next(arrival_offsets(ARRIVAL_SPEC, random.Random()))
+
+    def run_arrivals(user) -> None:
+        rng = random.Random()
+        pool = Pool()
+        start = time.perf_counter()
+        try:
+            for offset in arrival_offsets(ARRIVAL_SPEC, rng):
+                intended = start + offset
+                delay = intended - time.perf_counter()
+                if delay > 0:
+                    gevent.sleep(delay)
+                else:
+                    tracker.max_lag = max(tracker.max_lag, -delay)
+
+                if len(pool) >= MAX_OUTSTANDING:
+                    tracker.dropped += 1
+                    continue
+                tracker.scheduled += 1
+                pool.spawn(_run_arrival, user, rng.choice(tasks), intended)
+        finally:
+            pool.kill(block=False)
+
+    cls.tasks = [run_arrivals]
+    cls.wait_time = constant(0)
+    return cls
+
+
+if ARRIVAL_SPEC:
+    events.request.add_listener(tracker.on_request)
+    events.test_start.add_listener(lambda **kwargs: tracker.reset())
+    events.test_stop.add_listener(
+        lambda environment, **kwargs: tracker.report(environment)
+    )
@@ -0,0 +1,255 @@
+"""
+Opt-in profiling of the load generator itself (SWECC_PROFILE=1).
+
+Tells apart latency added by the client from latency added by the server:
+
+- client CPU per request: CPU time spent in the greenlet that made each
+  request since its previous one (request building, response parsing,
+  event listeners, prints), excluding time other greenlets ran in between;
+- CPU of named sections such as SWECCBot.request's authentication check,
+  via `with section("name"):`;
+- event-loop lag: how late a greenlet sleeping LAG_INTERVAL wakes up. A
+  gevent worker runs every user on one thread, so this is also the wait
+  for the GIL;
+- saturation: CPU utilisation of the worker process per interval.
+
+When the worker is saturated it prints a warning, as response times then
+include time requests spent queued in the generator. Results are appended
+to SWECC_PROFILE_FILE.
+
+This module imports nothing from locust or gevent until profile_generator()
+is called, so commons.bot can use section() from the asyncio tools too.
+"""
+
+import contextlib
+import json
+import os
+import resource
+import time
+import weakref
+from typing import Dict, List, Optional
+
+from .histogram import Histogram
+
+PROFILE = os.getenv("SWECC_PROFILE", "").lower() in ("1", "true", "yes")
+PROFILE_FILE = os.getenv("SWECC_PROFILE_FILE", "generator-profile.jsonl")
+REPORT_INTERVAL = float(os.getenv("SWECC_PROFILE_INTERVAL", "10"))
+LAG_INTERVAL = 0.05
+# thresholds above which the generator is reported as the bottleneck
+SATURATION_CPU = float(os.getenv("SWECC_PROFILE_MAX_CPU", "0.9"))
+SATURATION_LAG_MS = float(os.getenv("SWECC_PROFILE_MAX_LAG_MS", "20"))
+
+
+def _cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+class GeneratorProfiler:
+    """Greenlet CPU accounting plus event-loop lag and saturation sampling.
+
+    A greenlet trace function charges the thread CPU time elapsed between
+    two switches to the greenlet switched away from, so each greenlet's
+    CPU can be read at any point without counting the others.
+    """
+
+    def __init__(self, ignore_names=()):
+        import greenlet
+
+        self.ignore_names = set(ignore_names)
+        self.greenlet = greenlet
+        self.hub = None
+        self.previous_trace = None
+        self.workers: List = []
+        self.started: Optional[float] = None
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the previous run, e.g. when a new one starts from the web UI."""
+        self.cpu: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        # greenlet -> its CPU at its previous request
+        self.last_request: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self.last_switch = time.thread_time()
+        self.hub_cpu = 0.0
+
+        self.request_cpu = Histogram()
+        self.sections: Dict[str, Histogram] = {}
+        self.lag = Histogram()
+        self.interval_lag = Histogram()
+        self.intervals: List[Dict] = []
+        self.saturated_intervals = 0
+        self.cpu_started = 0.0
+
+    def _trace(self, event, args) -> None:
+        if event in ("switch", "throw"):
+            origin = args[0]
+            now = time.thread_time()
+            spent = now - self.last_switch
+            self.last_switch = now
+            if origin is self.hub:
+                self.hub_cpu += spent
+            else:
+                self.cpu[origin] = self.cpu.get(origin, 0.0) + spent
+        if self.previous_trace is not None:
+            self.previous_trace(event, args)
+
+    def greenlet_cpu(self, glet=None) -> float:
+        """CPU seconds the greenlet (by default the current one) has used."""
+        current = self.greenlet.getcurrent()
+        glet = glet or current
+        cpu = self.cpu.get(glet, 0.0)
+        if glet is current:
+            cpu += time.thread_time() - self.last_switch
+        return cpu
+
+    def on_request(self, name=None, **kwargs) -> None:
+        if self.started is None or name in self.ignore_names:
+            return
+        current = self.greenlet.getcurrent()
+        cpu = self.greenlet_cpu(current)
+        self.request_cpu.record((cpu - self.last_request.get(current, 0.0)) * 1_000_000)
+        self.last_request[current] = cpu
+
+    @contextlib.contextmanager
+    def section(self, name: str):
+        started = self.greenlet_cpu()
+        try:
+            yield
+        finally:
+            histogram = self.sections.get(name)
+            if histogram is None:
+                histogram = self.sections[name] = Histogram()
+            histogram.record((self.greenlet_cpu() - started) * 1_000_000)
+
+    def measure_lag(self) -> None:
+        import gevent
+
+        while True:
+            expected = time.perf_counter() + LAG_INTERVAL
+            gevent.sleep(LAG_INTERVAL)
+            lag = max(0.0, time.perf_counter() - expected) * 1_000_000
+            self.lag.record(lag)
+            self.interval_lag.record(lag)
+
+    def sample(self, environment) -> None:
+        import gevent
+
+        wall, cpu = time.monotonic(), _cpu_seconds()
+        while True:
+            gevent.sleep(REPORT_INTERVAL)
+            now, now_cpu = time.monotonic(), _cpu_seconds()
+            utilisation = (now_cpu - cpu) / (now - wall)
+            wall, cpu = now, now_cpu
+
+            lag_p99 = self.interval_lag.percentile(99) / 1000
+            self.interval_lag = Histogram()
+            users = getattr(environment.runner, "user_count", 0)
+            self.intervals.append(
+                {"cpu": round(utilisation, 3), "lag_p99_ms": lag_p99, "users": users}
+            )
+            if utilisation >= SATURATION_CPU or lag_p99 >= SATURATION_LAG_MS:
+                self.saturated_intervals += 1
+                print(
+                    f"Load generator saturated: {utilisation:.0%} CPU, event-loop "
+                    f"lag p99 {lag_p99:.1f}ms with {users} users. Response times "
+                    f"include time queued in the client; add workers or run fewer "
+                    f"users per worker."
+                )
+
+    def start(self, environment) -> None:
+        import gevent
+
+        self.reset()
+        self.hub = gevent.get_hub()
+        self.previous_trace = self.greenlet.settrace(self._trace)
+        self.started = time.monotonic()
+        self.cpu_started = _cpu_seconds()
+        self.workers = [
+            gevent.spawn(self.measure_lag),
+            gevent.spawn(self.sample, environment),
+        ]
+
+    def stop(self, environment) -> Optional[dict]:
+        if self.started is None:
+            return None
+        for worker in self.workers:
+            worker.kill(block=False)
+        self.greenlet.settrace(self.previous_trace)
+
+        elapsed = time.monotonic() - self.started
+        self.started = None
+        cpu = _cpu_seconds() - self.cpu_started
+        result = {
+            "host": environment.host,
+            "pid": os.getpid(),
+            "recorded_at": time.time(),
+            "seconds": round(elapsed, 2),
+            "cpu_utilisation": round(cpu / elapsed, 3) if elapsed else 0.0,
+            "hub_cpu_share": round(self.hub_cpu / cpu, 3) if cpu else 0.0,
+            "saturated_intervals": self.saturated_intervals,
+            "intervals": self.intervals,
+            "request_cpu": self.request_cpu.to_dict(),
+            "lag": self.lag.to_dict(),
+            "sections": {
+                name: histogram.to_dict() for name, histogram in self.sections.items()
+            },
+        }
+        with open(PROFILE_FILE, "a") as f:
+            f.write(json.dumps(result) + "\n")
+
+        def row(name: str, histogram: Histogram) -> str:
+            values = " ".join(
+                f"{p}={value / 1000:.2f}ms"
+                for p, value in histogram.percentiles((50, 99, 99.9)).items()
+            )
+            return f"  {name:<28} n={histogram.total:<8} {values}"
+
+        print(
+            f"Generator profile: {result['cpu_utilisation']:.0%} CPU, "
+            f"{result['hub_cpu_share']:.0%} of it in the gevent hub, saturated in "
+            f"{self.saturated_intervals}/{len(self.intervals)} intervals "
+            f"({PROFILE_FILE})"
+        )
+        print(row("client CPU per request", self.request_cpu))
+        for name, histogram in sorted(self.sections.items()):
+            print(row(f"section {name}", histogram))
+        print(row("event-loop lag", self.lag))
+        return result
+
+
+profiler: Optional[GeneratorProfiler] = None
+
+
+def section(name: str):
+    """Context manager charging the CPU of its body to `name` when profiling."""
+    if profiler is None or profiler.started is None:
+        return contextlib.nullcontext()
+    return profiler.section(name)
+
+
+def profile_generator(ignore_names=()) -> Optional[GeneratorProfiler]:
+    """Hook the profiler into Locust's events when SWECC_PROFILE is set.
+
+    `ignore_names` are extra events.request entries the scenario fires,
+    whose CPU is then charged to the next real request. Only workers (or a
+    standalone run) are profiled, the master generates no load.
+    """
+    global profiler
+    if not PROFILE or profiler is not None:
+        return profiler
+
+    from locust import events
+    from locust.runners import MasterRunner
+
+    profiler = GeneratorProfiler(ignore_names)
+
+    def on_test_start(environment, **kwargs):
+        if not isinstance(environment.runner, MasterRunner):
+            profiler.start(environment)
+
+    events.request.add_listener(profiler.on_request)
+    events.test_start.add_listener(on_test_start)
+    events.test_stop.add_listener(
+        lambda environment, **kwargs: profiler.stop(environment)
+    )
+    return profiler
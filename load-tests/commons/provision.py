@@ -0,0 +1,328 @@
+import asyncio
+import dataclasses
+import json
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, List, Optional
+
+import aiohttp
+from yarl import URL
+
+from .bot import BASE_URL_HTTP, SWECCBot
+
+PHASES = ["csrf", "login", "register", "verify"]
+
+DEFAULT_CONCURRENCY = 50
+DEFAULT_RATE = 100.0
+DEFAULT_RETRIES = 3
+RETRY_BASE_DELAY = 0.5
+PROGRESS_INTERVAL = 2.0
+
+
+class TokenBucket:
+    """Token bucket for asyncio: `rate` requests per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+@dataclasses.dataclass
+class ProvisionStats:
+    total: int
+    completed: int = 0
+    failed: int = 0
+    retries: int = 0
+    # requests of the attempts that authenticated a bot, and of all others
+    round_trips: int = 0
+    failed_requests: int = 0
+    started: float = dataclasses.field(default_factory=time.monotonic)
+    latencies: Dict[str, List[float]] = dataclasses.field(
+        default_factory=lambda: {phase: [] for phase in PHASES}
+    )
+
+    def record(self, phase: str, seconds: float) -> None:
+        self.latencies[phase].append(seconds)
+
+    def progress(self) -> str:
+        elapsed = time.monotonic() - self.started
+        done = self.completed + self.failed
+        rate = done / elapsed if elapsed else 0.0
+        return (
+            f"Provisioned {self.completed}/{self.total} bots "
+            f"({self.failed} failed, {self.retries} retries, {rate:.1f} bots/s)"
+        )
+
+    def report(self) -> None:
+        """Print per-phase request counts and latency percentiles."""
+        print(self.progress())
+        if self.completed:
+            print(
+                f"  {self.round_trips / self.completed:.2f} round trips per authenticated bot"
+            )
+        if self.failed_requests:
+            print(f"  {self.failed_requests} requests in failed or retried attempts")
+        for phase, samples in self.latencies.items():
+            if not samples:
+                continue
+            samples = sorted(samples)
+            p50 = samples[len(samples) // 2] * 1000
+            p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000
+            print(
+                f"  {phase:<8} n={len(samples):<6} p50={p50:.0f}ms "
+                f"p95={p95:.0f}ms max={samples[-1] * 1000:.0f}ms"
+            )
+
+
+class AsyncBotClient:
+    """Async counterpart of SWECCBot's auth flow.
+
+    All clients share one connector (and so one keep-alive pool); each keeps
+    its own cookie jar so sessions stay per bot.
+    """
+
+    def __init__(
+        self,
+        bot: SWECCBot,
+        connector: aiohttp.TCPConnector,
+        bucket: TokenBucket,
+        stats: ProvisionStats,
+    ):
+        self.bot = bot
+        self.bucket = bucket
+        self.stats = stats
+        self.requests = 0
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            connector_owner=False,
+            cookie_jar=aiohttp.CookieJar(unsafe=True),
+        )
+
+    async def close(self) -> None:
+        await self.session.close()
+
+    async def _request(self, phase: str, method: str, endpoint: str, **kwargs):
+        await self.bucket.acquire()
+        self.requests += 1
+        start = time.perf_counter()
+        async with self.session.request(
+            method, f"{BASE_URL_HTTP}{endpoint}", **kwargs
+        ) as response:
+            text = await response.text()
+        self.stats.record(phase, time.perf_counter() - start)
+        return response.status, text
+
+    def cookie(self, name: str) -> Optional[str]:
+        morsel = self.session.cookie_jar.filter_cookies(URL(BASE_URL_HTTP)).get(name)
+        return morsel.value if morsel else None
+
+    def capture_session(self) -> None:
+        """Copy the session cookies and their expiry onto the bot for persisting."""
+        self.bot.csrftoken = self.cookie("csrftoken")
+        self.bot.sessionid = None
+        self.bot.session_expires = None
+        for cookie in self.session.cookie_jar:
+            if cookie.key != "sessionid":
+                continue
+            self.bot.sessionid = cookie.value
+            if cookie["expires"]:
+                self.bot.session_expires = parsedate_to_datetime(
+                    cookie["expires"]
+                ).timestamp()
+            elif cookie["max-age"]:
+                self.bot.session_expires = time.time() + int(cookie["max-age"])
+        self.bot.restore_session()
+
+    async def get_csrf_token(self) -> Optional[str]:
+        status, _ = await self._request("csrf", "GET", "/auth/csrf/")
+        if status != 200:
+            print(f"Failed to retrieve CSRF token for bot {self.bot.idx}: {status}")
+            return None
+        return self.cookie("csrftoken")
+
+    async def _post_with_csrf(self, phase: str, endpoint: str, **kwargs):
+        """POST with the cached CSRF token, refreshing it once on a 403."""
+        csrf_token = self.cookie("csrftoken") or await self.get_csrf_token()
+        if not csrf_token:
+            return None, ""
+
+        headers = kwargs.pop("headers", {})
+        status, text = await self._request(
+            phase,
+            "POST",
+            endpoint,
+            headers={**headers, "X-CSRFToken": csrf_token},
+            **kwargs,
+        )
+        if status == 403:
+            csrf_token = await self.get_csrf_token()
+            if csrf_token:
+                status, text = await self._request(
+                    phase,
+                    "POST",
+                    endpoint,
+                    headers={**headers, "X-CSRFToken": csrf_token},
+                    **kwargs,
+                )
+        return status, text
+
+    async def login(self) -> bool:
+        status, _ = await self._post_with_csrf(
+            "login",
+            "/auth/login/",
+            data=json.dumps(
+                {"username": self.bot.username, "password": self.bot.password}
+            ),
+            headers={"Content-Type": "application/json"},
+        )
+        if status == 200:
+            self.bot.is_registered = True
+        return status == 200
+
+    async def register(self) -> bool:
+        status, text = await self._post_with_csrf(
+            "register", "/auth/register/", json=self.bot.profile_dict()
+        )
+        if status == 201:
+            self.bot.is_registered = True
+        elif status is not None:
+            print(f"Bot {self.bot.idx} registration failed: {status} - {text}")
+        return status == 201
+
+    async def verify(self) -> bool:
+        api_key = os.getenv("SWECC_API_KEY")
+        if not api_key:
+            print(f"SWECC_API_KEY environment variable not set for bot {self.bot.idx}")
+            return False
+
+        status, text = await self._request(
+            "verify",
+            "PUT",
+            "/members/verify-discord/",
+            json={
+                "discord_id": self.bot.idx,
+                "discord_username": self.bot.discord_username,
+                "username": self.bot.username,
+            },
+            headers={"Authorization": f"Api-Key {api_key}"},
+        )
+        if status == 200:
+            self.bot.is_verified = True
+        else:
+            print(f"Bot {self.bot.idx} verification failed: {status} - {text}")
+        return status == 200
+
+    async def ensure_authenticated(self) -> bool:
+        """Same shortest path as SWECCBot.ensure_authenticated."""
+        if self.bot.is_registered is False:
+            await self.register()
+
+        logged_in = await self.login()
+        if not logged_in and self.bot.is_registered is not True:
+            if await self.register():
+                logged_in = await self.login()
+
+        if not logged_in:
+            return False
+
+        if not self.bot.is_verified:
+            await self.verify()
+        return True
+
+
+async def provision_bot(
+    bot_id: int,
+    connector: aiohttp.TCPConnector,
+    bucket: TokenBucket,
+    stats: ProvisionStats,
+    retries: int,
+) -> Optional[SWECCBot]:
+    """Authenticate one bot, retrying with exponential backoff and jitter."""
+    bot = SWECCBot.from_idx(bot_id)
+    # ids being provisioned are not in the bot store, so most likely new
+    bot.is_registered = False
+    for attempt in range(retries + 1):
+        if attempt:
+            stats.retries += 1
+            delay = RETRY_BASE_DELAY * 2 ** (attempt - 1)
+            await asyncio.sleep(delay + random.uniform(0, delay))
+
+        client = AsyncBotClient(bot, connector, bucket, stats)
+        try:
+            if await client.ensure_authenticated():
+                client.capture_session()
+                bot.is_authenticated = True
+                stats.completed += 1
+                stats.round_trips += client.requests
+                return bot
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Bot {bot_id} attempt {attempt + 1} error: {e}")
+        finally:
+            await client.close()
+        stats.failed_requests += client.requests
+
+    stats.failed += 1
+    print(f"Bot {bot_id} setup failed after {retries + 1} attempts")
+    return None
+
+
+async def _report_progress(stats: ProvisionStats) -> None:
+    while True:
+        await asyncio.sleep(PROGRESS_INTERVAL)
+        print(stats.progress())
+
+
+async def provision_bots_async(
+    bot_ids: List[int],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    rate: float = DEFAULT_RATE,
+    retries: int = DEFAULT_RETRIES,
+    on_bot: Optional[Callable[[SWECCBot], None]] = None,
+) -> List[SWECCBot]:
+    """Provision bots with at most `concurrency` in flight and `rate` requests/s.
+
+    `on_bot` is called with each bot as soon as it is authenticated, so it
+    can be persisted without waiting for the whole batch.
+    """
+    stats = ProvisionStats(total=len(bot_ids))
+    bucket = TokenBucket(rate)
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    async def run(bot_id: int) -> Optional[SWECCBot]:
+        async with semaphore:
+            bot = await provision_bot(bot_id, connector, bucket, stats, retries)
+        if bot and on_bot:
+            on_bot(bot)
+        return bot
+
+    progress = asyncio.create_task(_report_progress(stats))
+    try:
+        results = await asyncio.gather(*(run(bot_id) for bot_id in bot_ids))
+    finally:
+        progress.cancel()
+        await connector.close()
+
+    stats.report()
+    return [bot for bot in results if bot]
+
+
+def provision_bots(bot_ids: List[int], **kwargs) -> List[SWECCBot]:
+    """Blocking entry point for provision_bots_async."""
+    return asyncio.run(provision_bots_async(bot_ids, **kwargs))
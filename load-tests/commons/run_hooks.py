@@ -0,0 +1,37 @@
+"""
+The hooks every scenario registers for its runs: throughput, generator
+profiling, run history, the load timeline and SLO checks.
+"""
+
+from typing import Dict, Optional
+
+from .clients import record_throughput
+from .history import record_history
+from .profiling import profile_generator
+from .slo import check_slos
+from .timeline import record_timeline
+
+# events.request entries the scripts fire on top of their requests; each
+# duplicates the request it follows, so the hooks don't count them
+SYNTHETIC_NAMES = ["message_success"]
+
+
+def register_run_hooks(
+    scenario: str,
+    params: Optional[Dict] = None,
+    slo: Optional[Dict] = None,
+    throughput: bool = False,
+    ignore_names=SYNTHETIC_NAMES,
+) -> None:
+    """Hook the scenario's runs into every recorder.
+
+    `params` (such as the key distribution) are saved with the run, `slo`
+    is the scenario's own SLOs (SWECC_SLO_FILE takes precedence), and
+    `throughput` also records the client throughput of each load process.
+    """
+    if throughput:
+        record_throughput(scenario, ignore_names=ignore_names, tags=params)
+    profile_generator(ignore_names=ignore_names)
+    record_history(scenario, ignore_names=ignore_names, params=params)
+    record_timeline(scenario, ignore_names=ignore_names)
+    check_slos(slo, ignore_names=ignore_names)
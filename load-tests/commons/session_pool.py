@@ -0,0 +1,175 @@
+import os
+import threading
+from collections import deque
+from typing import Iterable, List, Optional, Set, Tuple
+
+from .bot import SWECCBot
+from .bot_store import BotStore, open_store
+from .manage_bots import BOTS_FILE
+from .profiling import section
+
+# bots used when nothing has been provisioned, matching the old random.randint(1, 100)
+FALLBACK_BOT_IDS = range(1, 101)
+# statuses meaning the server no longer accepts the bot's session
+REJECTED_STATUSES = (401, 403)
+
+
+class SessionPool:
+    """Hands out pre-authenticated bots, each to at most one user at a time.
+
+    Bots come from the bot store written by manage_bots together with their
+    persisted session cookies, so checking one out normally costs no requests.
+    Only ids are held up front; a bot (and its requests.Session) is built from
+    the store when it is first checked out. A bot only logs in again when it
+    has no usable session or when the server actually rejects it (see
+    reauthenticate), and the new session is written straight back.
+    """
+
+    def __init__(self, store: BotStore, ids: Optional[Iterable[int]] = None):
+        self.store = store
+        # bots with a saved session go out first
+        self._ids = deque(store.ids(sessions_first=True) if ids is None else ids)
+        self._available = deque()
+        self._in_use: Set[int] = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(
+        cls, filename: str = BOTS_FILE, partition: Optional[Tuple[int, int]] = None
+    ) -> "SessionPool":
+        """Pool over the bot store, optionally only over partition (k, n) of it."""
+        store = open_store(filename)
+        if len(store) == 0:
+            print(f"No provisioned bots, falling back to bots {FALLBACK_BOT_IDS}")
+            ids: List[int] = list(FALLBACK_BOT_IDS)
+        else:
+            ids = store.ids(sessions_first=True)
+
+        if partition:
+            k, n = partition
+            # by id rather than position, so partitions stay disjoint
+            # however the store orders them
+            ids = [idx for idx in ids if idx % n == k]
+            print(f"Using bot partition {k}/{n}: {len(ids)} bots")
+        return cls(store, ids)
+
+    def _build(self, idx: int) -> SWECCBot:
+        return self.store.get(idx) or SWECCBot.from_idx(idx)
+
+    def checkout(self) -> SWECCBot:
+        """Take a bot out of the pool, logging it in only if it has no session."""
+        with self._lock:
+            if self._available:
+                bot = self._available.popleft()
+                idx = bot.idx
+            elif self._ids:
+                bot = None
+                idx = self._ids.popleft()
+            else:
+                raise ValueError(
+                    f"Session pool exhausted: all {len(self._in_use)} bots are in use"
+                )
+            self._in_use.add(idx)
+
+        # a connection error while logging in must not lose the bot for good
+        try:
+            if bot is None:
+                bot = self._build(idx)
+
+            if not bot.has_valid_session():
+                self.reauthenticate(bot)
+        except Exception:
+            if bot is None:
+                with self._lock:
+                    self._in_use.discard(idx)
+                    self._ids.append(idx)
+            else:
+                self.checkin(bot)
+            raise
+        return bot
+
+    def checkin(self, bot: SWECCBot) -> None:
+        with self._lock:
+            self._in_use.discard(bot.idx)
+            self._available.append(bot)
+
+    def reauthenticate(self, bot: SWECCBot) -> bool:
+        """Log a bot in again after its session was rejected or expired."""
+        bot.invalidate_session()
+        with section("reauthenticate"):
+            authenticated = bot.ensure_authenticated()
+        if not authenticated:
+            return False
+        self.store.put(bot)
+        return True
+
+
+def parse_partition(value: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Parse a "k/n" partition such as SWECC_BOT_PARTITION=2/8."""
+    if not value:
+        return None
+    try:
+        k, n = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"Bot partition must look like k/n, got {value!r}")
+    if not 0 <= k < n:
+        raise ValueError(f"Bot partition {value} needs 0 <= k < n")
+    return k, n
+
+
+_pool: Optional[SessionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_session_pool(filename: Optional[str] = None) -> SessionPool:
+    """The process-wide pool shared by all Locust users.
+
+    Workers started by commons.launcher get SWECC_BOT_PARTITION=k/n, so
+    each draws from its own disjoint slice of the bot store.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SessionPool.from_file(
+                filename or os.getenv("SWECC_BOTS_FILE", BOTS_FILE),
+                parse_partition(os.getenv("SWECC_BOT_PARTITION")),
+            )
+        return _pool
+
+
+class PooledBotMixin:
+    """Runs a Locust HttpUser as a bot checked out of the session pool."""
+
+    bot: Optional[SWECCBot] = None
+
+    def checkout_bot(self) -> SWECCBot:
+        """Check a pre-authenticated bot out of the shared session pool."""
+        self.bot = get_session_pool().checkout()
+
+        if not self.bot.has_valid_session():
+            get_session_pool().checkin(self.bot)
+            raise ValueError(f"Failed to authenticate bot {self.bot.idx}")
+
+        self.client.headers.update({"Content-Type": "application/json"})
+        self.use_bot_session()
+        return self.bot
+
+    def checkin_bot(self) -> None:
+        """Return the bot to the pool."""
+        if self.bot:
+            get_session_pool().checkin(self.bot)
+
+    def use_bot_session(self) -> None:
+        """Send the bot's session cookies and CSRF token with every request."""
+        self.client.cookies.clear()
+        self.client.cookies.update(self.bot.session.cookies)
+
+        csrf_token = self.bot.csrftoken or self.bot.get_csrf_token()
+        if csrf_token:
+            self.client.headers.update({"X-CSRFToken": csrf_token})
+
+    def check_session(self, response) -> None:
+        """Log in again only when the server actually rejects the session."""
+        if response.status_code in REJECTED_STATUSES:
+            if get_session_pool().reauthenticate(self.bot):
+                self.use_bot_session()
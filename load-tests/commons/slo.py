@@ -0,0 +1,304 @@
+"""
+Service level objectives checked while a load run is going.
+
+SLOs are read from SWECC_SLO_FILE, or else a workload's "slo" section:
+
+{
+  "window_seconds": 30,
+  "grace_seconds": 15,
+  "budget_seconds": 10,
+  "abort": true,
+  "endpoints": {
+    "GET Search Directory*": {"p95_ms": 300, "p99_ms": 800, "error_rate": 0.01},
+    "Aggregated": {"min_rps": 20, "error_rate": 0.02}
+  }
+}
+
+Endpoint keys are "METHOD name" or a bare name, as Locust shows them, and
+may use shell wildcards; "Aggregated" is the total. Every CHECK_INTERVAL
+seconds each objective is evaluated over the last window_seconds of the
+run (once the grace period has passed and a full window exists). An
+objective is in breach while its window misses the target; when its
+breaches add up to more than budget_seconds, the run is aborted with exit
+code 1 (unless abort is false). The run ends with a pass/fail report.
+"""
+
+import dataclasses
+import fnmatch
+import json
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+SLO_FILE = os.getenv("SWECC_SLO_FILE")
+CHECK_INTERVAL = 2.0
+DEFAULT_WINDOW = 30.0
+DEFAULT_GRACE = 10.0
+DEFAULT_BUDGET = 10.0
+# objective -> True if the measured value must stay at or below the target
+OBJECTIVES = {"p95_ms": True, "p99_ms": True, "error_rate": True, "min_rps": False}
+TOTAL = "Aggregated"
+
+
+@dataclasses.dataclass
+class Objective:
+    pattern: str
+    metric: str
+    target: float
+    breach_seconds: float = 0.0
+    worst: Optional[float] = None
+
+    @property
+    def upper_bound(self) -> bool:
+        return OBJECTIVES[self.metric]
+
+    def met_by(self, value: float) -> bool:
+        return value <= self.target if self.upper_bound else value >= self.target
+
+    def record(self, value: float) -> None:
+        if self.worst is None:
+            self.worst = value
+        elif self.upper_bound:
+            self.worst = max(self.worst, value)
+        else:
+            self.worst = min(self.worst, value)
+
+    def describe(self) -> str:
+        relation = "<=" if self.upper_bound else ">="
+        return f"{self.pattern} {self.metric} {relation} {self.target:g}"
+
+
+@dataclasses.dataclass
+class Snapshot:
+    requests: int
+    failures: int
+    response_times: Dict[int, int]
+
+
+def percentile(response_times: Dict[int, int], p: float) -> float:
+    total = sum(response_times.values())
+    if not total:
+        return 0.0
+    target = p / 100 * total
+    seen = 0
+    for value in sorted(response_times):
+        seen += response_times[value]
+        if seen >= target:
+            return float(value)
+    return float(max(response_times))
+
+
+def snapshot(stats, ignore_names=()) -> Dict[str, Snapshot]:
+    """Cumulative counts per entry, with a total that leaves out ignored names."""
+    result = {}
+    total = Snapshot(0, 0, {})
+    for entry in stats.entries.values():
+        if entry.name in ignore_names:
+            continue
+        result[f"{entry.method} {entry.name}".strip()] = Snapshot(
+            entry.num_requests, entry.num_failures, dict(entry.response_times)
+        )
+        total.requests += entry.num_requests
+        total.failures += entry.num_failures
+        for value, count in entry.response_times.items():
+            total.response_times[value] = total.response_times.get(value, 0) + count
+    result[TOTAL] = total
+    return result
+
+
+def window_delta(now: Snapshot, before: Optional[Snapshot]) -> Snapshot:
+    if before is None:
+        return now
+    return Snapshot(
+        now.requests - before.requests,
+        now.failures - before.failures,
+        {
+            value: count - before.response_times.get(value, 0)
+            for value, count in now.response_times.items()
+            if count - before.response_times.get(value, 0) > 0
+        },
+    )
+
+
+def measure(metric: str, window: Snapshot, seconds: float) -> Optional[float]:
+    """The objective's value over a window, None when it has no requests."""
+    if metric == "min_rps":
+        return window.requests / seconds
+    if not window.requests:
+        return None
+    if metric == "error_rate":
+        return window.failures / window.requests
+    return percentile(window.response_times, 95 if metric == "p95_ms" else 99)
+
+
+class SLOChecker:
+    def __init__(self, spec: Dict, ignore_names=()):
+        self.ignore_names = set(ignore_names)
+        self.window = float(spec.get("window_seconds", DEFAULT_WINDOW))
+        self.grace = float(spec.get("grace_seconds", DEFAULT_GRACE))
+        self.budget = float(spec.get("budget_seconds", DEFAULT_BUDGET))
+        self.abort = bool(spec.get("abort", True))
+        self.objectives: List[Objective] = []
+        for pattern, targets in spec.get("endpoints", {}).items():
+            for metric, target in targets.items():
+                if metric not in OBJECTIVES:
+                    raise ValueError(
+                        f"Unknown SLO {metric!r} for {pattern}, expected one of {list(OBJECTIVES)}"
+                    )
+                self.objectives.append(Objective(pattern, metric, float(target)))
+        if not self.objectives:
+            raise ValueError("No SLOs defined")
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the previous run, e.g. when a new one starts from the web UI."""
+        # (monotonic time, {entry key: snapshot}) for the last window
+        self.history: Deque[Tuple[float, Dict[str, Snapshot]]] = deque()
+        self.started: Optional[float] = None
+        self.last_check: Optional[float] = None
+        self.aborted: Optional[str] = None
+        for objective in self.objectives:
+            objective.breach_seconds = 0.0
+            objective.worst = None
+
+    def matching(self, pattern: str, keys) -> List[str]:
+        return [
+            key
+            for key in keys
+            if fnmatch.fnmatchcase(key, pattern)
+            or (key != TOTAL and fnmatch.fnmatchcase(key.split(" ", 1)[-1], pattern))
+        ]
+
+    def evaluate(
+        self, now: Dict[str, Snapshot], before: Dict[str, Snapshot], seconds: float
+    ) -> List[Tuple[Objective, str, float]]:
+        """Objectives missed between two snapshots, with the entry and value."""
+        missed = []
+        for objective in self.objectives:
+            for key in self.matching(objective.pattern, now):
+                value = measure(
+                    objective.metric, window_delta(now[key], before.get(key)), seconds
+                )
+                if value is None:
+                    continue
+                objective.record(value)
+                if not objective.met_by(value):
+                    missed.append((objective, key, value))
+        return missed
+
+    def check(self, stats) -> Optional[str]:
+        """Evaluate the sliding window; returns why to abort, if the budget is gone."""
+        now = time.monotonic()
+        current = snapshot(stats, self.ignore_names)
+        self.history.append((now, current))
+        if self.started is None:
+            self.started = now
+        # keep the newest snapshot at least a window old as the window's start
+        while len(self.history) > 1 and now - self.history[1][0] >= self.window:
+            self.history.popleft()
+
+        elapsed = self.last_check and now - self.last_check
+        self.last_check = now
+        oldest, before = self.history[0]
+        if now - self.started < self.grace or now - oldest < self.window:
+            return None
+
+        missed = self.evaluate(current, before, now - oldest)
+        for objective in {id(o): o for o, _, _ in missed}.values():
+            objective.breach_seconds += elapsed or CHECK_INTERVAL
+        for objective, key, value in missed:
+            print(
+                f"SLO breach: {key} {objective.metric} = {value:.3g} "
+                f"over the last {self.window:g}s (target {objective.describe()}, "
+                f"{objective.breach_seconds:.0f}s of {self.budget:g}s budget used)"
+            )
+            if objective.breach_seconds > self.budget:
+                return f"{objective.describe()} breached for {objective.breach_seconds:.0f}s"
+        return None
+
+    def report(self, stats) -> bool:
+        """Print the pass/fail report over the whole run; True if all passed."""
+        final = snapshot(stats, self.ignore_names)
+        duration = max(stats.last_request_timestamp - stats.start_time, 1.0) if (
+            stats.last_request_timestamp
+        ) else 1.0
+        print("SLO report:")
+        passed = True
+        for objective in self.objectives:
+            keys = self.matching(objective.pattern, final)
+            values = [
+                (key, measure(objective.metric, final[key], duration)) for key in keys
+            ]
+            values = [(key, value) for key, value in values if value is not None]
+            ok = (
+                bool(values)
+                and all(objective.met_by(value) for _, value in values)
+                and objective.breach_seconds <= self.budget
+            )
+            passed &= ok
+            detail = ", ".join(f"{key}={value:.3g}" for key, value in values) or "no requests"
+            worst = "" if objective.worst is None else f", worst window {objective.worst:.3g}"
+            print(
+                f"  {'PASS' if ok else 'FAIL'}  {objective.describe():<48} "
+                f"run: {detail}{worst}, in breach {objective.breach_seconds:.0f}s"
+            )
+        if self.aborted:
+            print(f"  Aborted early: {self.aborted}")
+        print(f"SLOs {'passed' if passed else 'FAILED'}")
+        return passed
+
+
+def load_slos(path: Optional[str] = SLO_FILE) -> Optional[Dict]:
+    if not path:
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def check_slos(spec: Optional[Dict] = None, ignore_names=()) -> Optional[SLOChecker]:
+    """Check SLOs during the run, from SWECC_SLO_FILE or else `spec`.
+
+    Runs on the master (or a standalone process), whose stats cover every
+    worker. `ignore_names` are extra events.request entries that are not
+    requests. Without SLOs nothing is hooked up.
+    """
+    spec = load_slos() or spec
+    if not spec:
+        return None
+
+    import gevent
+    from locust import events
+    from locust.runners import WorkerRunner
+
+    checker = SLOChecker(spec, ignore_names)
+    state = {}
+
+    def watch(environment):
+        while True:
+            gevent.sleep(CHECK_INTERVAL)
+            reason = checker.check(environment.runner.stats)
+            if reason and checker.abort:
+                checker.aborted = reason
+                print(f"SLO budget exhausted, aborting the run: {reason}")
+                environment.process_exit_code = 1
+                gevent.spawn(environment.runner.quit)
+                return
+
+    @events.test_start.add_listener
+    def on_test_start(environment, **kwargs):
+        if isinstance(environment.runner, WorkerRunner):
+            return
+        checker.reset()
+        state["greenlet"] = gevent.spawn(watch, environment)
+
+    @events.test_stop.add_listener
+    def on_test_stop(environment, **kwargs):
+        greenlet = state.pop("greenlet", None)
+        if greenlet is None:
+            return
+        greenlet.kill(block=False)
+        if not checker.report(environment.runner.stats) or checker.aborted:
+            environment.process_exit_code = 1
+
+    return checker
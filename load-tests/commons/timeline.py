@@ -0,0 +1,164 @@
+"""
+Timeline of a load run, for lining it up with container metrics.
+
+record_timeline() appends to SWECC_TIMELINE_FILE, one JSON object per line:
+
+    {"kind": "phase", "ts": 1700000000.1, "scenario": ..., "phase": "users 50"}
+    {"kind": "second", "ts": 1700000001, "scenario": ..., "pid": ...,
+     "requests": 120, "failures": 0, "users": 50, "response_times": {"12": 30, ...}}
+
+Phase markers come from the master (or a standalone run): test start and
+stop, spawning complete, each change of the target user count (e.g. the
+stages of a load shape), and anything passed to mark_phase(). Per-second
+samples come from every process generating load, with Locust-style
+rounded response time buckets so the samples of several workers can be
+merged exactly. docker_dashboard_server.py overlays them on the container
+charts, so both machines' clocks should be in sync (NTP).
+"""
+
+import json
+import os
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+TIMELINE_FILE = os.getenv("SWECC_TIMELINE_FILE", "load-timeline.jsonl")
+FLUSH_INTERVAL = 1.0
+
+_timeline: Optional["Timeline"] = None
+
+
+def response_time_bucket(milliseconds: float) -> int:
+    """Round like Locust's stats: exact below 100ms, then 2 significant digits."""
+    if milliseconds < 100:
+        return int(round(milliseconds))
+    if milliseconds < 1000:
+        return int(round(milliseconds, -1))
+    if milliseconds < 10000:
+        return int(round(milliseconds, -2))
+    return int(round(milliseconds, -3))
+
+
+class Timeline:
+    def __init__(self, scenario: str, ignore_names=(), filename: str = TIMELINE_FILE):
+        self.scenario = scenario
+        self.ignore_names = set(ignore_names)
+        self.filename = filename
+        # epoch second -> [requests, failures, Counter of response time buckets]
+        self.seconds: Dict[int, list] = {}
+        self.runner = None
+        self.target_users: Optional[int] = None
+        self.generates_load = True
+        self.writes_phases = True
+
+    def _write(self, record: dict) -> None:
+        with open(self.filename, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def mark(self, phase: str, ts: Optional[float] = None) -> None:
+        self._write(
+            {
+                "kind": "phase",
+                "ts": round(ts or time.time(), 3),
+                "scenario": self.scenario,
+                "phase": phase,
+            }
+        )
+
+    def on_request(self, name=None, response_time=None, exception=None, **kwargs):
+        if not self.generates_load or name in self.ignore_names:
+            return
+        second = int(time.time())
+        sample = self.seconds.get(second)
+        if sample is None:
+            sample = self.seconds[second] = [0, 0, Counter()]
+        sample[0] += 1
+        if exception:
+            sample[1] += 1
+        if response_time is not None:
+            sample[2][response_time_bucket(response_time)] += 1
+
+    def flush(self, everything: bool = False) -> None:
+        """Write out the seconds that are over (all of them when stopping)."""
+        current = int(time.time())
+        users = getattr(self.runner, "user_count", 0)
+        for second in sorted(self.seconds):
+            if second >= current and not everything:
+                break
+            requests, failures, response_times = self.seconds.pop(second)
+            self._write(
+                {
+                    "kind": "second",
+                    "ts": second,
+                    "scenario": self.scenario,
+                    "pid": os.getpid(),
+                    "requests": requests,
+                    "failures": failures,
+                    "users": users,
+                    "response_times": {str(k): v for k, v in response_times.items()},
+                }
+            )
+
+    def check_users(self) -> None:
+        target = getattr(self.runner, "target_user_count", None)
+        if target is not None and target != self.target_users:
+            self.target_users = target
+            self.mark(f"users {target}")
+
+    def run(self) -> None:
+        import gevent
+
+        while True:
+            gevent.sleep(FLUSH_INTERVAL)
+            if self.generates_load:
+                self.flush()
+            if self.writes_phases:
+                self.check_users()
+
+
+def mark_phase(phase: str) -> None:
+    """Add a phase marker to the timeline, if the scenario records one."""
+    if _timeline is not None:
+        _timeline.mark(phase)
+
+
+def record_timeline(scenario: str, ignore_names=()) -> Timeline:
+    """Write the scenario's phase markers and per-second load to the timeline.
+
+    `ignore_names` are extra events.request entries that are not requests.
+    """
+    global _timeline
+    import gevent
+    from locust import events
+    from locust.runners import MasterRunner, WorkerRunner
+
+    timeline = _timeline = Timeline(scenario, ignore_names)
+    flusher = {}
+
+    @events.test_start.add_listener
+    def on_test_start(environment, **kwargs):
+        timeline.runner = environment.runner
+        timeline.generates_load = not isinstance(environment.runner, MasterRunner)
+        timeline.writes_phases = not isinstance(environment.runner, WorkerRunner)
+        timeline.target_users = None
+        if timeline.writes_phases:
+            timeline.mark("start")
+        flusher["greenlet"] = gevent.spawn(timeline.run)
+
+    @events.spawning_complete.add_listener
+    def on_spawning_complete(user_count, **kwargs):
+        if timeline.writes_phases:
+            timeline.mark(f"spawned {user_count}")
+
+    @events.test_stop.add_listener
+    def on_test_stop(environment, **kwargs):
+        greenlet = flusher.pop("greenlet", None)
+        if greenlet is not None:
+            greenlet.kill(block=False)
+        if timeline.generates_load:
+            timeline.flush(everything=True)
+        if timeline.writes_phases:
+            timeline.mark("stop")
+
+    events.request.add_listener(timeline.on_request)
+    return timeline
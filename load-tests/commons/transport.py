@@ -0,0 +1,59 @@
+import os
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_SIZE = int(os.getenv("SWECC_HTTP_POOL_SIZE", "10"))
+
+_lock = threading.Lock()
+_adapter: Optional[HTTPAdapter] = None
+_shared_session: Optional[requests.Session] = None
+
+
+def configure_pool(size: int) -> None:
+    """Size the shared keep-alive pool, e.g. to the number of workers.
+
+    The shared session is moved onto the new pool, but bot sessions created
+    before this call keep the adapter they were given, so call it before
+    building bots.
+    """
+    global _adapter
+    with _lock:
+        _adapter = HTTPAdapter(pool_maxsize=size, pool_block=False)
+        if _shared_session is not None:
+            _shared_session.mount("http://", _adapter)
+            _shared_session.mount("https://", _adapter)
+
+
+def shared_adapter() -> HTTPAdapter:
+    global _adapter
+    with _lock:
+        if _adapter is None:
+            _adapter = HTTPAdapter(pool_maxsize=DEFAULT_POOL_SIZE, pool_block=False)
+        return _adapter
+
+
+def new_session() -> requests.Session:
+    """A session with its own cookie jar on top of the shared connection pool."""
+    session = requests.Session()
+    adapter = shared_adapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def shared_session() -> requests.Session:
+    """Cookie-less session for requests that are not made as a bot.
+
+    Used for API-key calls and health checks, which previously went through
+    module-level requests.get/put and opened a new connection each time.
+    """
+    global _shared_session
+    if _shared_session is None:
+        session = new_session()
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        _shared_session = session
+    return _shared_session
@@ -0,0 +1,120 @@
+"""
+Keystroke model for typeahead search load.
+
+A user picks a query from a Zipf-ranked corpus (the first queries are the
+popular ones) and types it one character at a time with log-normal gaps
+between keys. The client debounces: a prefix is only searched once no key
+has been pressed for DEBOUNCE seconds, and a search still running when the
+next key is pressed is cancelled, as a search box would do. Cancellations
+are counted by Cancellations rather than fired as events.request, so they
+don't count as requests in the stats, throughput, history or SLOs.
+"""
+
+import math
+import os
+import random
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .distributions import Zipf
+
+# the queries the scripts used to search for, most popular first
+DEFAULT_CORPUS = [
+    "advay",
+    "test",
+    "bot",
+    "asdfa",
+    "user",
+    "admin",
+    "elimelt",
+    "asdfwe",
+]
+
+CORPUS_FILE = os.getenv("SWECC_TYPEAHEAD_CORPUS")
+ZIPF_EXPONENT = float(os.getenv("SWECC_TYPEAHEAD_ZIPF", "1.1"))
+# median gap between keystrokes and its log-normal spread
+KEY_DELAY = float(os.getenv("SWECC_TYPEAHEAD_KEY_MS", "180")) / 1000
+KEY_DELAY_SIGMA = 0.5
+DEBOUNCE = float(os.getenv("SWECC_TYPEAHEAD_DEBOUNCE_MS", "150")) / 1000
+MIN_PREFIX = int(os.getenv("SWECC_TYPEAHEAD_MIN_PREFIX", "1"))
+# prefixes this long or longer share one stats entry
+MAX_PREFIX_BUCKET = 10
+
+
+def load_corpus(filename: Optional[str] = CORPUS_FILE) -> List[str]:
+    """Queries ordered by popularity, one per line, or the default corpus."""
+    if not filename:
+        return DEFAULT_CORPUS
+    with open(filename, "r") as f:
+        corpus = [line.strip() for line in f if line.strip()]
+    if not corpus:
+        raise ValueError(f"Typeahead corpus {filename} is empty")
+    return corpus
+
+
+def prefix_bucket(length: int) -> str:
+    if length >= MAX_PREFIX_BUCKET:
+        return f"{MAX_PREFIX_BUCKET}+"
+    return str(length)
+
+
+class KeystrokeModel:
+    def __init__(
+        self,
+        corpus: Optional[List[str]] = None,
+        zipf_exponent: float = ZIPF_EXPONENT,
+        key_delay: float = KEY_DELAY,
+        debounce: float = DEBOUNCE,
+        min_prefix: int = MIN_PREFIX,
+    ):
+        self.queries = Zipf(values=corpus or load_corpus(), s=zipf_exponent)
+        self.mu = math.log(key_delay)
+        self.debounce = debounce
+        self.min_prefix = min_prefix
+
+    def pick_query(self, rng: random.Random) -> str:
+        return self.queries.sample(rng)
+
+    def key_delay(self, rng: random.Random) -> float:
+        return rng.lognormvariate(self.mu, KEY_DELAY_SIGMA)
+
+    def keystrokes(
+        self, query: str, rng: random.Random
+    ) -> Iterator[Tuple[str, float, bool]]:
+        """Yield (prefix, pause after the key, whether the prefix is searched).
+
+        A prefix is searched when the pause before the next key is at least
+        the debounce delay; the full query always is, since typing stops.
+        """
+        for length in range(1, len(query) + 1):
+            last = length == len(query)
+            pause = math.inf if last else self.key_delay(rng)
+            searched = length >= self.min_prefix and pause >= self.debounce
+            yield query[:length], pause, searched
+
+
+class Cancellations:
+    """Searches cancelled by a newer keystroke, per prefix length bucket."""
+
+    def __init__(self):
+        self.counts: Dict[str, int] = Counter()
+        # milliseconds the cancelled searches had been running
+        self.running_ms: Dict[str, float] = Counter()
+
+    def record(self, prefix: str, running_ms: float) -> None:
+        bucket = prefix_bucket(len(prefix))
+        self.counts[bucket] += 1
+        self.running_ms[bucket] += running_ms
+
+    def report(self) -> None:
+        if not self.counts:
+            return
+        print(f"Cancelled searches: {sum(self.counts.values())}")
+        for bucket in sorted(self.counts, key=lambda b: int(b.rstrip("+"))):
+            count = self.counts[bucket]
+            print(
+                f"  len={bucket:<4} {count:>8} "
+                f"(ran {self.running_ms[bucket] / count:.0f}ms on average)"
+            )
+        self.counts.clear()
+        self.running_ms.clear()
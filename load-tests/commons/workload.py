@@ -0,0 +1,179 @@
+"""
+Workload files for scenario.py: which endpoints to hit and how often, with
+what parameters, and how many users over time. See workloads/*.json.
+"""
+
+import dataclasses
+import json
+import random
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from locust import between, constant, constant_throughput
+
+from .distributions import Constant, Distribution, make_distribution
+from .endpoints import DEFAULT_PARAMS, ENDPOINTS
+
+AUTH_MODES = ["session", "api_key"]
+SHAPES = ["stages", "ramp", "spike", "soak"]
+WORKLOAD_DIR = Path(__file__).resolve().parent.parent / "workloads"
+
+
+@dataclasses.dataclass
+class MixEntry:
+    endpoint: str
+    weight: float
+    params: Dict[str, Distribution]
+
+
+@dataclasses.dataclass
+class Stage:
+    # seconds since the start of the test at which this stage ends
+    end: float
+    users: int
+    spawn_rate: float
+
+
+@dataclasses.dataclass
+class Workload:
+    name: str
+    auth: str
+    mix: List[MixEntry]
+    wait_time: Any
+    stages: List[Stage]
+    seed: Optional[int] = None
+    # SLOs for commons.slo.check_slos
+    slo: Optional[Dict[str, Any]] = None
+
+    def pick(self, rng: random.Random) -> MixEntry:
+        return rng.choices(self.mix, weights=[entry.weight for entry in self.mix])[0]
+
+    def stage_at(self, run_time: float) -> Optional[Tuple[int, float]]:
+        """(users, spawn_rate) for a LoadTestShape, None once the last stage ends."""
+        for stage in self.stages:
+            if run_time < stage.end:
+                return stage.users, stage.spawn_rate
+        return None
+
+
+def _wait_time(spec: Optional[Dict[str, Any]]):
+    spec = spec or {"type": "between", "min": 1, "max": 5}
+    kind = spec.get("type")
+    if kind == "between":
+        return between(spec["min"], spec["max"])
+    if kind == "constant":
+        return constant(spec["seconds"])
+    if kind == "constant_throughput":
+        return constant_throughput(spec["per_second"])
+    raise ValueError(f"Unknown wait_time type {kind!r}")
+
+
+def shape_stages(spec: Optional[Dict[str, Any]]) -> List[Stage]:
+    """Expand a ramp/spike/soak shape into stages with cumulative end times."""
+    if not spec:
+        return []
+
+    kind = spec.get("type")
+    if kind == "stages":
+        stages = spec["stages"]
+    elif kind == "ramp":
+        # spawn_rate spreads the ramp over ramp_seconds, then the load holds
+        stages = [
+            {
+                "duration": spec["ramp_seconds"] + spec["hold_seconds"],
+                "users": spec["users"],
+                "spawn_rate": spec["users"] / max(spec["ramp_seconds"], 1),
+            }
+        ]
+    elif kind == "spike":
+        base = {"users": spec["base_users"], "spawn_rate": spec.get("spawn_rate", 10)}
+        stages = [
+            {**base, "duration": spec["warmup_seconds"]},
+            {
+                "duration": spec["spike_seconds"],
+                "users": spec["spike_users"],
+                "spawn_rate": spec.get("spike_spawn_rate", spec["spike_users"]),
+            },
+            {**base, "duration": spec["recovery_seconds"]},
+        ]
+    elif kind == "soak":
+        stages = [
+            {
+                "duration": spec["duration"],
+                "users": spec["users"],
+                "spawn_rate": spec.get("spawn_rate", 10),
+            }
+        ]
+    else:
+        raise ValueError(f"Unknown shape type {kind!r}, expected one of {SHAPES}")
+
+    end = 0.0
+    result = []
+    for stage in stages:
+        end += stage["duration"]
+        result.append(Stage(end, int(stage["users"]), float(stage["spawn_rate"])))
+    return result
+
+
+def resolve_workload_path(path: str) -> Path:
+    """Accept a path, or a bare name from the workloads directory."""
+    candidate = Path(path)
+    if candidate.exists():
+        return candidate
+    for name in (path, f"{path}.json"):
+        candidate = WORKLOAD_DIR / name
+        if candidate.exists():
+            return candidate
+    raise FileNotFoundError(f"Workload file {path} not found")
+
+
+def load_workload(path: str) -> Workload:
+    workload_file = resolve_workload_path(path)
+    with open(workload_file, "r") as f:
+        data = json.load(f)
+
+    auth = data.get("auth", "session")
+    if auth not in AUTH_MODES:
+        raise ValueError(f"{workload_file}: auth must be one of {AUTH_MODES}")
+
+    mix = []
+    for entry in data["mix"]:
+        name = entry["endpoint"]
+        if name not in ENDPOINTS:
+            raise ValueError(
+                f"{workload_file}: unknown endpoint {name!r}, "
+                f"expected one of {sorted(ENDPOINTS)}"
+            )
+        params = entry.get("params", {})
+        unknown = set(params) - set(DEFAULT_PARAMS[name])
+        if unknown:
+            raise ValueError(f"{workload_file}: {name} has no parameters {unknown}")
+        # parameters defaulting to None are taken from the user's bot
+        missing = {
+            param
+            for param, default in DEFAULT_PARAMS[name].items()
+            if isinstance(default, Constant) and default.value is None
+        } - set(params)
+        if auth == "api_key" and missing:
+            raise ValueError(
+                f"{workload_file}: {name} needs {sorted(missing)} without a bot session"
+            )
+        mix.append(
+            MixEntry(
+                endpoint=name,
+                weight=float(entry.get("weight", 1)),
+                params={k: make_distribution(v) for k, v in params.items()},
+            )
+        )
+    if not mix:
+        raise ValueError(f"{workload_file}: the mix is empty")
+
+    return Workload(
+        name=data.get("name", workload_file.stem),
+        auth=auth,
+        mix=mix,
+        wait_time=_wait_time(data.get("wait_time")),
+        stages=shape_stages(data.get("shape")),
+        seed=data.get("seed"),
+        slo=data.get("slo"),
+    )
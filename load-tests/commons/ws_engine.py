@@ -0,0 +1,301 @@
+import itertools
+import json
+import os
+import random
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+import gevent
+import websocket
+from gevent.lock import BoundedSemaphore
+from locust import events
+
+from .bot import BASE_URL_WS
+
+# echo connections opened per Locust user
+CONNECTIONS_PER_USER = int(os.getenv("SWECC_WS_CONNECTIONS_PER_USER", "1"))
+# echoes still unanswered after this many seconds are reported as failures
+ECHO_TIMEOUT = float(os.getenv("SWECC_WS_ECHO_TIMEOUT", "10"))
+CONNECT_TIMEOUT = 10.0
+SWEEP_INTERVAL = 1.0
+
+# reconnects back off exponentially with full jitter, so sockets dropped
+# together by a server restart do not come back in lockstep
+RECONNECT_BASE_DELAY = float(os.getenv("SWECC_WS_RECONNECT_BASE_DELAY", "0.5"))
+RECONNECT_MAX_DELAY = float(os.getenv("SWECC_WS_RECONNECT_MAX_DELAY", "30"))
+# handshakes in flight at once across the process while reconnecting
+MAX_CONCURRENT_RECONNECTS = int(os.getenv("SWECC_WS_MAX_RECONNECTS", "50"))
+
+# handshake statuses meaning the JWT was turned down
+REJECTED_STATUSES = (401, 403)
+
+# called with refresh=True when the server rejected the last token
+TokenProvider = Callable[[bool], Optional[str]]
+
+
+class EchoTimeout(Exception):
+    pass
+
+
+def _find_seq(payload) -> Optional[int]:
+    """Find our seq tag in an echo reply, which may wrap the sent message."""
+    if isinstance(payload, dict):
+        if isinstance(payload.get("seq"), int):
+            return payload["seq"]
+        for value in payload.values():
+            seq = _find_seq(value)
+            if seq is not None:
+                return seq
+    elif isinstance(payload, str) and payload.startswith("{"):
+        try:
+            return _find_seq(json.loads(payload))
+        except ValueError:
+            return None
+    return None
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given (0-based) attempt."""
+    delay = min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * 2**attempt)
+    return random.uniform(0, delay)
+
+
+class EchoConnection:
+    """One /ws/<service>/<jwt> socket plus the echoes it is still waiting on.
+
+    A socket that drops is reopened in the background until the connection
+    is closed by its user; sends in the meantime are skipped.
+    """
+
+    def __init__(
+        self, engine: "WSEngine", token_provider: TokenProvider, service: str
+    ):
+        self.engine = engine
+        self.token_provider = token_provider
+        self.service = service
+        self.ws: Optional[websocket.WebSocket] = None
+        # seq -> perf_counter at send, oldest first
+        self.pending: "OrderedDict[int, float]" = OrderedDict()
+        self.reader: Optional[gevent.Greenlet] = None
+        self.reconnector: Optional[gevent.Greenlet] = None
+        self.closed = False
+        # set when the server turned the last JWT down
+        self.open_refresh = False
+
+    @property
+    def connected(self) -> bool:
+        return self.ws is not None and self.ws.connected
+
+    def open(self, refresh_token: bool = False) -> bool:
+        """Open the socket once; returns whether the handshake succeeded."""
+        start = time.perf_counter()
+        token = self.token_provider(refresh_token)
+        if not token:
+            self.engine.report("connect", start, exception=ValueError("no JWT token"))
+            return False
+
+        url = f"{BASE_URL_WS}/ws/{self.service}/{token}"
+        try:
+            self.ws = websocket.create_connection(url, timeout=CONNECT_TIMEOUT)
+            # reads block in the reader greenlet, which only yields to the hub
+            self.ws.settimeout(None)
+        except Exception as e:
+            self.ws = None
+            self.engine.report("connect", start, exception=e)
+            if getattr(e, "status_code", None) in REJECTED_STATUSES:
+                self.engine.rejected_tokens += 1
+                self.open_refresh = True
+            return False
+        self.engine.report("connect", start)
+        self.reader = gevent.spawn(self._read_loop)
+        return True
+
+    def start(self) -> None:
+        """Connect now, falling back to background reconnects on failure."""
+        if not self.open():
+            self._schedule_reconnect(time.perf_counter())
+
+    def send_echo(self, content: str) -> bool:
+        if not self.connected:
+            return False
+        seq = next(self.engine.seq)
+        sent_at = time.perf_counter()
+        message = {"type": "echo", "seq": seq, "sent_at": sent_at, "content": content}
+        try:
+            self.ws.send(json.dumps(message))
+        except Exception as e:
+            self.engine.report("echo", sent_at, exception=e)
+            # the reader notices the dead socket and schedules the reconnect
+            self.ws.shutdown()
+            return False
+        self.pending[seq] = sent_at
+        return True
+
+    def _read_loop(self) -> None:
+        while True:
+            try:
+                message = self.ws.recv()
+            except Exception:
+                break
+            received = time.perf_counter()
+            seq = _find_seq(message)
+            if seq is None and self.pending:
+                # server dropped our tag; echoes on one socket come back in order
+                seq = next(iter(self.pending))
+            sent_at = self.pending.pop(seq, None)
+            if sent_at is not None:
+                self.engine.report("echo", sent_at, len(message), end=received)
+
+        disconnected = time.perf_counter()
+        self.reader = None
+        self._drop_socket()
+        self._fail_pending(ConnectionError("WebSocket closed"))
+        if not self.closed:
+            self._schedule_reconnect(disconnected)
+
+    def _schedule_reconnect(self, disconnected: float) -> None:
+        if self.reconnector is None and not self.closed:
+            self.engine.disconnects += 1
+            self.reconnector = gevent.spawn(self._reconnect, disconnected)
+
+    def _reconnect(self, disconnected: float) -> None:
+        attempt = 0
+        try:
+            while not self.closed:
+                gevent.sleep(backoff_delay(attempt))
+                attempt += 1
+                with self.engine.reconnect_slots:
+                    if self.closed:
+                        return
+                    refresh, self.open_refresh = self.open_refresh, False
+                    if self.open(refresh_token=refresh):
+                        break
+            else:
+                return
+        finally:
+            self.reconnector = None
+
+        self.engine.reconnects += 1
+        # time to reconnect, from the drop to the completed handshake
+        self.engine.report("reconnect", disconnected)
+        self.engine.reconnect_attempts += attempt
+
+    def expire(self, now: float) -> None:
+        while self.pending:
+            seq, sent_at = next(iter(self.pending.items()))
+            if now - sent_at < ECHO_TIMEOUT:
+                break
+            del self.pending[seq]
+            self.engine.report("echo", sent_at, exception=EchoTimeout(f"seq {seq}"))
+
+    def _fail_pending(self, exception: Exception) -> None:
+        for sent_at in self.pending.values():
+            self.engine.report("echo", sent_at, exception=exception)
+        self.pending.clear()
+
+    def _drop_socket(self) -> None:
+        ws, self.ws = self.ws, None
+        if ws is not None:
+            try:
+                ws.shutdown()
+            except Exception:
+                pass
+
+    def close(self) -> None:
+        self.closed = True
+        for greenlet in (self.reconnector, self.reader):
+            if greenlet is not None:
+                greenlet.kill(block=False)
+        self.reconnector = None
+        self.reader = None
+        ws, self.ws = self.ws, None
+        if ws is not None:
+            try:
+                ws.close(timeout=1)
+            except Exception:
+                pass
+        self._fail_pending(ConnectionError("WebSocket closed"))
+
+
+class WSEngine:
+    """Drives all echo WebSockets of a process from Locust's gevent loop.
+
+    Locust already runs every user on one gevent hub per process, so each
+    socket only costs a reader greenlet instead of a WebSocketApp and an OS
+    thread. Echoes carry a seq and their send time; the reader matches the
+    reply and fires events.request with the round trip, so it shows up in
+    Locust's latency percentiles as "WS echo". Dropped sockets come back
+    through "WS reconnect", whose response time is the time to reconnect.
+    """
+
+    def __init__(self):
+        self.seq = itertools.count()
+        self.connections: List[EchoConnection] = []
+        self.reconnect_slots = BoundedSemaphore(MAX_CONCURRENT_RECONNECTS)
+        self.disconnects = 0
+        self.reconnects = 0
+        self.reconnect_attempts = 0
+        self.rejected_tokens = 0
+        self._sweeper: Optional[gevent.Greenlet] = None
+
+    def report(
+        self,
+        name: str,
+        start: float,
+        response_length: int = 0,
+        exception: Optional[Exception] = None,
+        end: Optional[float] = None,
+    ) -> None:
+        end = time.perf_counter() if end is None else end
+        events.request.fire(
+            request_type="WS",
+            name=name,
+            response_time=(end - start) * 1000,
+            response_length=response_length,
+            exception=exception,
+            context={},
+        )
+
+    def connect(
+        self, token_provider: TokenProvider, service: str = "echo"
+    ) -> EchoConnection:
+        """Open a managed connection; it reconnects on its own until closed."""
+        connection = EchoConnection(self, token_provider, service)
+        self.connections.append(connection)
+        if self._sweeper is None:
+            self._sweeper = gevent.spawn(self._sweep)
+        connection.start()
+        return connection
+
+    def close(self, connection: EchoConnection) -> None:
+        connection.close()
+        if connection in self.connections:
+            self.connections.remove(connection)
+
+    def _sweep(self) -> None:
+        while True:
+            gevent.sleep(SWEEP_INTERVAL)
+            now = time.perf_counter()
+            for connection in list(self.connections):
+                connection.expire(now)
+
+    def stats(self) -> str:
+        open_count = sum(1 for c in self.connections if c.connected)
+        pending = sum(len(c.pending) for c in self.connections)
+        return (
+            f"{open_count} open WebSockets, {pending} echoes in flight, "
+            f"{self.disconnects} disconnects, {self.reconnects} reconnects "
+            f"({self.reconnect_attempts} attempts, {self.rejected_tokens} rejected JWTs)"
+        )
+
+
+_engine: Optional[WSEngine] = None
+
+
+def get_ws_engine() -> WSEngine:
+    """The process-wide engine shared by all Locust users."""
+    global _engine
+    if _engine is None:
+        _engine = WSEngine()
+    return _engine
@@ -1,16 +1,39 @@
 import os
 import random
-from locust import HttpUser, task, between, events
-import json
 import time
+from typing import Optional
 
+import gevent
+from locust import task, between, events
+
+from commons.clients import user_base
+from commons.open_loop import intended_start, open_loop, set_intended_start
+from commons.profiling import section
+from commons.run_hooks import register_run_hooks
+from commons.typeahead import Cancellations, KeystrokeModel, prefix_bucket
+
+register_run_hooks("directory", throughput=True)
+CANCELLATIONS = Cancellations()
+
+
+@open_loop
+class BotUser(user_base()):
+    """Types directory searches like a person at a search box.
+
+    Each task types one query from a Zipf-ranked corpus with realistic gaps
+    between keys. Searches are debounced, and a search still running when
+    the next key is pressed is cancelled. Stats are split by prefix length
+    as "Search Directory [len=N]"; cancelled searches are counted apart and
+    printed at the end of the run.
+
+    In open-loop mode an arrival is a user starting to type: keystrokes
+    follow the arrival's schedule, and each search is timed from when its
+    keystroke was due.
+    """
 
-class BotUser(HttpUser):
     wait_time = between(1, 5)
 
-    queries = ["advay", "asdfa", "test", "asdfwe"]
-    current_query_index = 0
-    current_query_progress = 0
+    model = KeystrokeModel()
 
     def on_start(self):
         self.api_key = os.getenv("SWECC_API_KEY")
@@ -21,45 +44,69 @@ class BotUser(HttpUser):
             "Authorization": f"Api-Key {self.api_key}",
             "Content-Type": "application/json",
         }
+        self.rng = random.Random()
 
-    def keystroke(self):
-        return random.randrange(
-            self.current_query_progress, len(self.queries[self.current_query_index])
-        )
-
-    @task
-    def send_message(self):
-
-        start_time = time.time()
-
-        new_index = self.keystroke()
-        query = self.queries[self.current_query_index][:new_index]
-        self.current_query_progress = new_index
-
-        if self.current_query_progress >= len(self.queries[self.current_query_index]):
-            self.current_query_index = (self.current_query_index + 1) % self.queries
-
+    def search(self, prefix: str, intended: Optional[float] = None):
+        if intended is not None:
+            set_intended_start(intended)
+        name = f"Search Directory [len={prefix_bucket(len(prefix))}]"
         with self.client.get(
-            f"/directory/search/?q={query}", headers=self.headers, catch_response=True
+            f"/directory/search/?q={prefix}",
+            headers=self.headers,
+            name=name,
+            catch_response=True,
         ) as response:
-            duration = time.time() - start_time
-
             if response.status_code == 200:
                 response.success()
-                events.request.fire(
-                    request_type="POST",
-                    name="message_success",
-                    response_time=duration * 1000,
-                    response_length=len(response.text),
-                    context={"query": query},
-                )
             else:
                 response.failure(f"Unexpected status code: {response.status_code}")
-                print(
-                    f"Error sending message - Status: {response.status_code}, "
-                    f"Query: {query}, "
-                    f"Response: {response.text}"
+                with section("print"):
+                    print(
+                        f"Error searching directory - Status: {response.status_code}, "
+                        f"Query: {prefix}, "
+                        f"Response: {response.text}"
+                    )
+
+    def cancel(self, search: gevent.Greenlet, prefix: str, started: float):
+        """Abort a superseded search, as the client would on a new keystroke."""
+        search.kill(block=True)
+        CANCELLATIONS.record(prefix, (time.perf_counter() - started) * 1000)
+
+    @task
+    def type_query(self):
+        query = self.model.pick_query(self.rng)
+        in_flight = None
+        arrival = intended_start()
+        # keys are pressed on a schedule, so time spent cancelling or behind
+        # a busy worker doesn't push the rest of the query back
+        due = time.perf_counter() if arrival is None else arrival
+
+        for prefix, pause, searched in self.model.keystrokes(query, self.rng):
+            if searched:
+                due += self.model.debounce
+                gevent.sleep(max(due - time.perf_counter(), 0))
+                started = time.perf_counter()
+                intended = None if arrival is None else due
+                in_flight = (
+                    gevent.spawn(self.search, prefix, intended),
+                    prefix,
+                    started,
                 )
+                pause -= self.model.debounce
+
+            if pause == float("inf"):
+                break
+            due += pause
+            gevent.sleep(max(due - time.perf_counter(), 0))
+
+            # the next key is pressed; drop the search for the old prefix
+            if in_flight and not in_flight[0].dead:
+                self.cancel(*in_flight)
+            in_flight = None
+
+        # the user waits for the results of the full query
+        if in_flight:
+            in_flight[0].join()
 
 
 @events.test_start.add_listener
@@ -69,4 +116,5 @@ def on_test_start(environment, **kwargs):
 
 @events.test_stop.add_listener
 def on_test_stop(environment, **kwargs):
+    CANCELLATIONS.report()
     print("Load test completed.")
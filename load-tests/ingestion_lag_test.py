@@ -0,0 +1,40 @@
+"""
+Sends engagement messages in bursts and measures how long they take to be
+applied, not just accepted (see commons/ingestion.py):
+
+SWECC_INGESTION_BURST=50 SWECC_INGESTION_BURST_INTERVAL=5 locust -f ingestion_lag_test.py ...
+"""
+
+import os
+
+import gevent
+from locust import task, constant
+
+from commons.engagement import KEYS_PARAMS, MessageUser
+from commons.ingestion import track_ingestion
+from commons.run_hooks import register_run_hooks
+
+# messages per burst, seconds between a user's bursts, and ms between messages
+BURST = int(os.getenv("SWECC_INGESTION_BURST", "20"))
+BURST_INTERVAL = float(os.getenv("SWECC_INGESTION_BURST_INTERVAL", "10"))
+BURST_SPACING = float(os.getenv("SWECC_INGESTION_BURST_SPACING", "0"))
+PARAMS = {**KEYS_PARAMS, "burst": BURST, "burst_interval": BURST_INTERVAL}
+
+register_run_hooks("ingestion_lag", PARAMS, throughput=True)
+INGESTION = track_ingestion("ingestion_lag")
+
+
+class BotUser(MessageUser):
+    wait_time = constant(BURST_INTERVAL)
+
+    @task
+    def send_burst(self):
+        for i in range(BURST):
+            if i and BURST_SPACING:
+                gevent.sleep(BURST_SPACING / 1000)
+            key = self.next_key()
+            if not INGESTION.prepare(key):
+                continue
+            started = self.post_message(key)
+            if started is not None:
+                INGESTION.sent(key, started)
@@ -1,66 +1,19 @@
-import os
-import random
-from locust import HttpUser, task, between, events
-import json
-import time
+from locust import task, between, events
 
-class BotUser(HttpUser):
-    wait_time = between(1, 5)
+from commons.engagement import KEYS_PARAMS, MessageUser
+from commons.open_loop import open_loop
+from commons.run_hooks import register_run_hooks
 
-    channel_ids = list(range(1, 11))
-    user_ids = list(range(1, 11))
+register_run_hooks("message_ingestion", KEYS_PARAMS, throughput=True)
 
-    def on_start(self):
-        self.api_key = os.getenv('SWECC_API_KEY')
-        if not self.api_key:
-            raise ValueError("SWECC_API_KEY environment variable not set")
 
-        self.headers = {
-            "Authorization": f"Api-Key {self.api_key}",
-            "Content-Type": "application/json",
-        }
+@open_loop
+class BotUser(MessageUser):
+    wait_time = between(1, 5)
 
     @task
     def send_message(self):
-        channel_id = random.choice(self.channel_ids)
-        user_id = random.choice(self.user_ids)
-
-        data = {
-            "channel_id": channel_id,
-            "discord_id": user_id,
-        }
-
-        start_time = time.time()
-
-        with self.client.post(
-            "/engagement/message/",
-            json=data,
-            headers=self.headers,
-            catch_response=True
-        ) as response:
-            duration = time.time() - start_time
-
-            if response.status_code == 202:
-                response.success()
-                events.request.fire(
-                    request_type="POST",
-                    name="message_success",
-                    response_time=duration * 1000,
-                    response_length=len(response.text),
-                    context={
-                        "channel_id": channel_id,
-                        "user_id": user_id
-                    }
-                )
-            elif response.status_code == 404:
-                response.failure(f"User not found: {user_id}")
-            else:
-                response.failure(f"Unexpected status code: {response.status_code}")
-
-            if response.status_code != 202:
-                print(f"Error sending message - Status: {response.status_code}, "
-                      f"Channel: {channel_id}, User: {user_id}, "
-                      f"Response: {response.text}")
+        self.post_message(self.next_key())
 
 @events.test_start.add_listener
 def on_test_start(environment, **kwargs):
@@ -0,0 +1,97 @@
+"""
+Runs any workload file instead of a hand-written script:
+
+SWECC_WORKLOAD=workloads/browse.json locust -f scenario.py --host=...
+"""
+
+import itertools
+import os
+import random
+
+from locust import HttpUser, LoadTestShape, task, events
+
+from commons.bot import check_connection
+from commons.clients import set_default_headers, user_base
+from commons.endpoints import call_endpoint
+from commons.open_loop import open_loop
+from commons.run_hooks import register_run_hooks
+from commons.session_pool import PooledBotMixin
+from commons.transport import DEFAULT_POOL_SIZE, configure_pool
+from commons.workload import load_workload
+
+WORKLOAD = load_workload(os.getenv("SWECC_WORKLOAD", "browse"))
+register_run_hooks(f"workload:{WORKLOAD.name}", slo=WORKLOAD.slo)
+
+# session workloads run as pooled bots, which needs the requests cookie jar
+if WORKLOAD.auth == "session":
+    BASES = (PooledBotMixin, HttpUser)
+else:
+    BASES = (user_base(),)
+
+_user_numbers = itertools.count()
+
+
+@open_loop
+class ScenarioUser(*BASES):
+    wait_time = WORKLOAD.wait_time
+
+    def on_start(self):
+        if WORKLOAD.seed is None:
+            self.rng = random.Random()
+        else:
+            # the same seed replays the same request sequence per user
+            worker = getattr(self.environment.runner, "worker_index", 0)
+            self.rng = random.Random(
+                f"{WORKLOAD.seed}:{worker}:{next(_user_numbers)}"
+            )
+
+        if WORKLOAD.auth == "session":
+            self.checkout_bot()
+            return
+
+        api_key = os.getenv("SWECC_API_KEY")
+        if not api_key:
+            raise ValueError("SWECC_API_KEY environment variable not set")
+        set_default_headers(
+            self,
+            {"Authorization": f"Api-Key {api_key}", "Content-Type": "application/json"},
+        )
+
+    def on_stop(self):
+        if WORKLOAD.auth == "session":
+            self.checkin_bot()
+
+    @task
+    def run_mix(self):
+        """Make one request from the workload's endpoint mix."""
+        entry = WORKLOAD.pick(self.rng)
+        call_endpoint(entry.endpoint, self, entry.params, self.rng)
+
+
+if WORKLOAD.stages:
+
+    class WorkloadShape(LoadTestShape):
+        """Users over time from the workload's ramp/spike/soak shape."""
+
+        def tick(self):
+            return WORKLOAD.stage_at(self.get_run_time())
+
+
+@events.test_start.add_listener
+def on_test_start(environment, **kwargs):
+    """Check connection to the server before starting the test."""
+    num_users = getattr(environment.parsed_options, "num_users", None)
+    if WORKLOAD.stages:
+        num_users = max(stage.users for stage in WORKLOAD.stages)
+    configure_pool(num_users or DEFAULT_POOL_SIZE)
+
+    if WORKLOAD.auth == "session" and not check_connection():
+        environment.runner.quit()
+        return
+
+    print(f"Starting workload {WORKLOAD.name}...")
+
+
+@events.test_stop.add_listener
+def on_test_stop(environment, **kwargs):
+    print(f"Workload {WORKLOAD.name} completed.")
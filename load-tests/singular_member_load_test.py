@@ -1,14 +1,27 @@
 import os
 import random
-from locust import HttpUser, task, between, events
+from locust import task, between, events
 import json
 import time
 
+from commons.clients import user_base
+from commons.distributions import key_space
+from commons.open_loop import open_loop
+from commons.profiling import section
+from commons.run_hooks import register_run_hooks
 
-class BotUser(HttpUser):
-    wait_time = between(1, 5)
 
-    all_users = range(1, 4)
+# e.g. SWECC_MEMBER_KEYS=zipf:n=1000,s=1.1 or hotset:n=1000,hot=0.05,share=0.9
+MEMBER_KEYS = key_space(os.getenv("SWECC_MEMBER_KEYS"), 3)
+
+register_run_hooks(
+    "singular_member", {"member_keys": MEMBER_KEYS.label}, throughput=True
+)
+
+
+@open_loop
+class BotUser(user_base()):
+    wait_time = between(1, 5)
 
     def on_start(self):
         self.api_key = os.getenv("SWECC_API_KEY")
@@ -25,29 +38,34 @@ class BotUser(HttpUser):
 
         start_time = time.time()
 
-        requested_user = random.choice(self.all_users)
+        requested_user = MEMBER_KEYS.sample(random)
 
         with self.client.get(
-            f"/directory/{requested_user}/", headers=self.headers, catch_response=True
+            f"/directory/{requested_user}/",
+            headers=self.headers,
+            name=f"/directory/[id]/ [{MEMBER_KEYS.label}]",
+            catch_response=True,
         ) as response:
             duration = time.time() - start_time
 
             if response.status_code == 200:
                 response.success()
-                events.request.fire(
-                    request_type="POST",
-                    name="message_success",
-                    response_time=duration * 1000,
-                    response_length=len(response.text),
-                    context={"user": requested_user},
-                )
+                with section("extra_event"):
+                    events.request.fire(
+                        request_type="POST",
+                        name="message_success",
+                        response_time=duration * 1000,
+                        response_length=len(response.text),
+                        context={"user": requested_user},
+                    )
             else:
                 response.failure(f"Unexpected status code: {response.status_code}")
-                print(
-                    f"Error sending message - Status: {response.status_code}, "
-                    f"User: {requested_user}, "
-                    f"Response: {response.text}"
-                )
+                with section("print"):
+                    print(
+                        f"Error sending message - Status: {response.status_code}, "
+                        f"User: {requested_user}, "
+                        f"Response: {response.text}"
+                    )
 
 
 @events.test_start.add_listener